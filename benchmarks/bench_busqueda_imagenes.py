@@ -0,0 +1,157 @@
+"""
+Prueba y benchmark de downloadimages.py contra una página de búsqueda local.
+
+Sirve desde un servidor HTTP local una página que imita a la búsqueda de imágenes:
+la miniatura (img.Q4LuWd) aparece tras un retraso y, al pulsarla, la imagen grande
+(img.n3VNCb) primero muestra una URL "encrypted-tbn" y después la real, igual que la
+página de verdad. Algunas consultas no tienen resultados. Ejecuta el pool de
+navegadores sobre los primeros títulos de mangas_filtered.json y comprueba que:
+- cada título con resultado obtiene su URL y los demás, cuya búsqueda agota el tiempo
+  de espera, no entran en la caché
+- una segunda ejecución solo vuelve a buscar esos títulos pendientes
+
+Muestra cuántos títulos por segundo resuelve con cada número de navegadores.
+Necesita selenium y Chrome.
+
+Uso: python benchmarks/bench_busqueda_imagenes.py [--titulos N] [--trabajadores 1 4]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from downloadimages import descubrir_portadas  # noqa: E402
+
+MANGAS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mangas_filtered.json')
+
+PAGINA = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Búsqueda</title></head>
+<body>
+<div id="resultados"></div>
+<script>
+var real = {real};
+setTimeout(function () {{
+  if (!real) return;
+  var mini = document.createElement('img');
+  mini.className = 'Q4LuWd';
+  mini.width = 100;
+  mini.height = 100;
+  mini.src = 'data:image/gif;base64,R0lGODlhAQABAAAAACw=';
+  mini.onclick = function () {{
+    var grande = document.createElement('img');
+    grande.className = 'n3VNCb';
+    grande.src = 'https://encrypted-tbn0.gstatic.com/miniatura';
+    document.body.appendChild(grande);
+    setTimeout(function () {{ grande.src = real; }}, {retraso});
+  }};
+  document.getElementById('resultados').appendChild(mini);
+}}, {retraso});
+</script>
+</body></html>
+"""
+
+
+# URL que devuelve la página local para una consulta (o None si no tiene resultados)
+def url_esperada(consulta):
+    if sum(consulta.encode('utf-8')) % 10 == 0:
+        return None
+    return f"https://imagenes.example/{quote(consulta)}.jpg"
+
+
+class ManejadorBusqueda(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        consulta = parse_qs(url.query).get('q', [''])[0]
+        with self.server.lock:
+            self.server.busquedas += 1
+        real = url_esperada(consulta)
+        cuerpo = PAGINA.format(real=json.dumps(real), retraso=self.server.retraso).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+def ejecutar(directorio, entrada, trabajadores, plantilla):
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        descubrir_portadas(entrada, os.path.join(directorio, 'urls.txt'), trabajadores=trabajadores,
+                           cache_path=os.path.join(directorio, 'cache.json'), espera=5, url_busqueda=plantilla)
+        return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba el pool de navegadores contra una búsqueda local")
+    parser.add_argument("--titulos", type=int, default=40)
+    parser.add_argument("--trabajadores", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--retraso", type=int, default=200, help="Milisegundos que tarda la página en cada paso")
+    args = parser.parse_args()
+
+    with open(MANGAS_JSON, 'r', encoding='utf-8') as f:
+        mangas = json.load(f)[:args.titulos]
+    titulos = list(dict.fromkeys(m["titulo"] for m in mangas if m.get("titulo")))
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ManejadorBusqueda)
+    servidor.retraso = args.retraso
+    servidor.busquedas = 0
+    servidor.lock = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    plantilla = f"http://127.0.0.1:{servidor.server_address[1]}/search?q={{consulta}}"
+
+    errores = 0
+    try:
+        for trabajadores in args.trabajadores:
+            directorio = tempfile.mkdtemp(prefix="bench_busqueda_")
+            try:
+                entrada = os.path.join(directorio, 'mangas.json')
+                with open(entrada, 'w', encoding='utf-8') as f:
+                    json.dump(mangas, f, ensure_ascii=False)
+
+                busquedas = servidor.busquedas
+                tiempo = ejecutar(directorio, entrada, trabajadores, plantilla)
+                with open(os.path.join(directorio, 'cache.json'), 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+                pendientes = 0
+                for titulo in titulos:
+                    esperada = url_esperada(f"manga {titulo} castellano")
+                    pendientes += esperada is None
+                    if cache.get(titulo, "sin entrada") != (esperada or "sin entrada"):
+                        print(f"ERROR: {titulo!r}: {cache.get(titulo, 'sin entrada')!r} en lugar de {esperada!r}")
+                        errores += 1
+
+                # Segunda ejecución: solo se buscan los títulos que quedaron pendientes
+                antes = servidor.busquedas
+                ejecutar(directorio, entrada, trabajadores, plantilla)
+                if servidor.busquedas - antes != pendientes:
+                    print(f"ERROR: la segunda ejecución hizo {servidor.busquedas - antes} búsquedas "
+                          f"en lugar de {pendientes}")
+                    errores += 1
+
+                print(f"{trabajadores} navegadores: {len(titulos)} títulos en {tiempo:.1f} s "
+                      f"({len(titulos) / tiempo:.2f} títulos/s, {antes - busquedas} búsquedas)")
+            finally:
+                shutil.rmtree(directorio, ignore_errors=True)
+    finally:
+        servidor.shutdown()
+
+    if errores:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
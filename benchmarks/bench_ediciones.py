@@ -0,0 +1,90 @@
+"""
+Benchmark de la agrupación de ediciones (edition_clusters.py).
+
+Compara la agrupación con MinHash/LSH con la comparación exacta de todos los pares
+(O(n²)) aplicando las mismas reglas, pero con la similitud de Jaccard exacta de los
+n-gramas en lugar de la estimada con las firmas. Muestra el tiempo de cada una y
+cuántos de los pares de mangas que la comparación exacta pone en la misma obra
+encuentra también el LSH (y al revés).
+
+Por defecto usa el catálogo del backend (manga-app-backend/data/mangas.json).
+
+Uso: python benchmarks/bench_ediciones.py [mangas.json] [--limite N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from edition_clusters import (UMBRAL_SINOPSIS, UMBRAL_TITULO, agrupar_ediciones,  # noqa: E402
+                              autores_compatibles, ngramas_sinopsis, ngramas_titulo)
+
+MANGAS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'manga-app-backend', 'data',
+                           'mangas.json')
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# Las mismas reglas que agrupar_ediciones, comparando todos los pares con Jaccard exacto
+def agrupar_exacto(mangas):
+    titulos = [ngramas_titulo(manga.get("titulo")) for manga in mangas]
+    sinopsis = [ngramas_sinopsis(manga.get("sinopsis")) for manga in mangas]
+    padres = list(range(len(mangas)))
+
+    def raiz(posicion):
+        while padres[posicion] != posicion:
+            padres[posicion] = padres[padres[posicion]]
+            posicion = padres[posicion]
+        return posicion
+
+    for a, b in combinations(range(len(mangas)), 2):
+        if ((jaccard(titulos[a], titulos[b]) >= UMBRAL_TITULO
+             or jaccard(sinopsis[a], sinopsis[b]) >= UMBRAL_SINOPSIS)
+                and autores_compatibles(mangas[a].get("autor"), mangas[b].get("autor"))):
+            padres[raiz(a)] = raiz(b)
+    return {manga["id"]: raiz(posicion) for posicion, manga in enumerate(mangas)}
+
+
+# Pares de mangas que quedan en la misma obra
+def pares(work_id):
+    grupos = {}
+    for manga_id, obra in work_id.items():
+        grupos.setdefault(obra, []).append(manga_id)
+    return {par for miembros in grupos.values() for par in combinations(sorted(miembros), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrupación de ediciones con LSH frente a todos los pares")
+    parser.add_argument("mangas_json", nargs="?", default=MANGAS_JSON)
+    parser.add_argument("--limite", type=int, default=None, help="Usar solo los primeros N mangas")
+    args = parser.parse_args()
+
+    with open(args.mangas_json, 'r', encoding='utf-8') as f:
+        mangas = json.load(f)[:args.limite]
+
+    inicio = time.perf_counter()
+    lsh = pares(agrupar_ediciones(mangas))
+    tiempo_lsh = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    exacto = pares(agrupar_exacto(mangas))
+    tiempo_exacto = time.perf_counter() - inicio
+
+    comunes = len(lsh & exacto)
+    print(f"{len(mangas)} mangas")
+    print(f"MinHash/LSH:     {tiempo_lsh:8.2f} s, {len(lsh)} pares en la misma obra")
+    print(f"todos los pares: {tiempo_exacto:8.2f} s, {len(exacto)} pares en la misma obra")
+    print(f"el LSH encuentra {comunes / len(exacto):.1%} de los pares exactos; "
+          f"{len(lsh) - comunes} pares solo en el LSH" if exacto else "sin pares")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark del índice de puntos de referencia (html_landmarks.IndiceHitos).
+
+Compara, página a página, la extracción de título, sinopsis, autor y volúmenes
+recorriendo el árbol en cada extractor (como se hacía antes: varias búsquedas de
+texto sobre todo el documento, find_all('h2') y find_all('img')) con la extracción
+a partir del índice creado en un único recorrido. Comprueba que el resultado es
+idéntico y muestra el tiempo medio por página de cada forma, sin contar la creación
+del árbol (que es la misma en las dos).
+
+Por defecto usa las páginas de fixtures/; se puede pasar un directorio con más
+páginas .html guardadas.
+
+Uso: python benchmarks/bench_hitos.py [directorio] [--repeticiones N] [--parser lxml]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extract_manga_details import extract_autor, extract_sinopsis, extract_titulo, extract_volumes  # noqa: E402
+from html_landmarks import IndiceHitos, buscar_marcador  # noqa: E402
+from html_parser import BACKEND_POR_DEFECTO, BACKENDS, crear_soup  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+URL = "https://www.listadomanga.es/coleccion.php?id=1"
+
+
+# Mismos pasos y en el mismo orden que parse_manga_details (la sinopsis modifica el árbol)
+def extraer(soup, con_indice):
+    indice = IndiceHitos(soup) if con_indice else None
+    titulo = extract_titulo(soup, indice)
+    sinopsis = extract_sinopsis(soup, indice=indice)
+    autor = extract_autor(soup, indice)
+    volumenes = []
+    if buscar_marcador(soup, "numeros_editados", indice):
+        volumenes = extract_volumes(soup, 1, URL, indice)
+    return titulo, sinopsis, autor, volumenes
+
+
+def medir(contenido, backend, con_indice, repeticiones):
+    total = 0.0
+    for _ in range(repeticiones):
+        soup = crear_soup(contenido, backend)
+        inicio = time.perf_counter()
+        resultado = extraer(soup, con_indice)
+        total += time.perf_counter() - inicio
+    return total / repeticiones, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extracción con y sin el índice de puntos de referencia")
+    parser.add_argument("directorio", nargs="?", default=FIXTURES_DIR)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--parser", choices=BACKENDS, default=BACKEND_POR_DEFECTO)
+    args = parser.parse_args()
+
+    nombres = sorted(n for n in os.listdir(args.directorio) if n.endswith('.html'))
+    print(f"{'página':32} {'sin índice':>11} {'con índice':>11} {'mejora':>7} {'volúmenes':>10}")
+    errores = 0
+    total_antes = total_despues = 0.0
+    for nombre in nombres:
+        with open(os.path.join(args.directorio, nombre), 'rb') as f:
+            contenido = f.read()
+        antes, esperado = medir(contenido, args.parser, False, args.repeticiones)
+        despues, obtenido = medir(contenido, args.parser, True, args.repeticiones)
+        if obtenido != esperado:
+            print(f"ERROR: {nombre} produce un resultado distinto con el índice")
+            errores += 1
+        total_antes += antes
+        total_despues += despues
+        print(f"{nombre:32} {antes * 1000:9.2f}ms {despues * 1000:9.2f}ms {antes / despues:6.1f}x "
+              f"{len(obtenido[3]):10}")
+
+    if nombres:
+        print(f"{'media por página':32} {total_antes / len(nombres) * 1000:9.2f}ms "
+              f"{total_despues / len(nombres) * 1000:9.2f}ms {total_antes / total_despues:6.1f}x")
+    if errores:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Benchmark de extremo a extremo de extract_manga_details.py sin acceder a la red.
+
+Sirve las páginas de fixtures/ (pequeña, mediana, grande, sin sinopsis y solo con
+Dibujo) desde un servidor HTTP local, repetidas `--copias` veces como colecciones
+distintas y con imágenes falsas, y ejecuta el extractor completo en un directorio
+temporal dos veces:
+- completo: descarga de páginas e imágenes, análisis, salidas, catálogo y tomos.zip
+- sin_conexion: reanálisis desde el archivo de páginas de la primera ejecución (--offline)
+
+De cada ejecución mide el tiempo total, páginas/s, volúmenes/s y la memoria residente
+máxima, y guarda además los tiempos por etapa del informe de la ejecución. Comprueba
+que salen todos los mangas y volúmenes esperados.
+
+Los resultados se añaden a resultados/pipeline.jsonl junto con el commit, y se comparan
+con la última ejecución con los mismos parámetros: con --fallar-si-empeora termina con
+código 1 si el tiempo o la memoria empeoran más de --umbral por ciento.
+
+Uso: python benchmarks/bench_pipeline.py [--copias N] [--concurrencia N] [--procesos N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import resource
+except ImportError:  # Windows: sin medida de memoria
+    resource = None
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIRECTORIO, '..'))
+
+from extract_manga_details import parse_manga_details  # noqa: E402
+
+FIXTURES_DIR = os.path.join(DIRECTORIO, 'fixtures')
+EXTRACTOR = os.path.join(DIRECTORIO, '..', 'extract_manga_details.py')
+HISTORIAL_POR_DEFECTO = os.path.join(DIRECTORIO, 'resultados', 'pipeline.jsonl')
+IMAGENES_RE = re.compile(rb'https?://static\.listadomanga\.com/')
+# Cabecera JPEG mínima: el extractor no decodifica las imágenes
+IMAGEN_FALSA = b'\xff\xd8\xff\xe0' + bytes(2048) + b'\xff\xd9'
+
+
+# Corpus: cada colección es una copia de una de las páginas escritas a mano de fixtures/
+def cargar_corpus(copias):
+    fixtures = []
+    for nombre in sorted(os.listdir(FIXTURES_DIR)):
+        if nombre.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, nombre), 'rb') as f:
+                contenido = f.read()
+            with contextlib.redirect_stdout(io.StringIO()):
+                volumenes = len(parse_manga_details(contenido, 1)['volumes'])
+            fixtures.append((nombre, contenido, volumenes))
+    return [fixtures[n % len(fixtures)] for n in range(copias * len(fixtures))]
+
+
+class ServidorCorpus(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, corpus, latencia):
+        self.corpus = corpus
+        self.latencia = latencia
+        super().__init__(('127.0.0.1', 0), ManejadorCorpus)
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class ManejadorCorpus(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+        cuerpo = None
+        if url.path == '/coleccion.php':
+            try:
+                _, contenido, _ = self.server.corpus[int(parse_qs(url.query)['id'][0]) - 1]
+            except (KeyError, ValueError, IndexError):
+                contenido = None
+            if contenido is not None:
+                # Imágenes propias de cada colección, servidas por este mismo servidor
+                coleccion = parse_qs(url.query)['id'][0]
+                cuerpo = IMAGENES_RE.sub(f"{self.server.base}/img/{coleccion}/".encode(), contenido)
+                tipo = 'text/html; charset=utf-8'
+        elif url.path.startswith('/img/'):
+            cuerpo = IMAGEN_FALSA
+            tipo = 'image/jpeg'
+        if cuerpo is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+# Ejecutar el extractor en `directorio` y medir tiempo y memoria máxima del proceso
+def ejecutar(directorio, argumentos):
+    inicio = time.perf_counter()
+    with open(os.path.join(directorio, 'salida.log'), 'ab') as log:
+        proceso = subprocess.Popen([sys.executable, EXTRACTOR, *argumentos], cwd=directorio,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        if resource is not None:
+            # wait4 da el consumo de este proceso (y de sus procesos de análisis)
+            _, estado, uso = os.wait4(proceso.pid, 0)
+            proceso.returncode = os.waitstatus_to_exitcode(estado)
+            # ru_maxrss está en KiB en Linux y en bytes en macOS
+            rss_mb = uso.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        else:
+            proceso.wait()
+            rss_mb = None
+    tiempo = time.perf_counter() - inicio
+    if proceso.returncode != 0:
+        raise RuntimeError(f"El extractor terminó con código {proceso.returncode} (ver {directorio}/salida.log)")
+    return tiempo, rss_mb
+
+
+def medir_modo(directorio, argumentos, informe, paginas, volumenes_esperados):
+    tiempo, rss_mb = ejecutar(directorio, [*argumentos, '--informe', informe])
+    with open(os.path.join(directorio, informe), 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    if datos['mangas'] != paginas or datos['volumenes'] != volumenes_esperados:
+        raise RuntimeError(f"Salida incompleta: {datos['mangas']}/{paginas} mangas, "
+                           f"{datos['volumenes']}/{volumenes_esperados} volúmenes")
+    return {
+        "tiempo_s": round(tiempo, 3),
+        "paginas_por_s": round(paginas / tiempo, 2),
+        "volumenes_por_s": round(volumenes_esperados / tiempo, 2),
+        "rss_max_mb": round(rss_mb, 1) if rss_mb is not None else None,
+        "etapas_s": {etapa: d["total_s"] for etapa, d in datos["etapas"].items()},
+    }
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ultimo_resultado(historial, parametros):
+    anterior = None
+    if os.path.exists(historial):
+        with open(historial, 'r', encoding='utf-8') as f:
+            for linea in f:
+                if linea.strip():
+                    resultado = json.loads(linea)
+                    if resultado["parametros"] == parametros:
+                        anterior = resultado
+    return anterior
+
+
+# Comparar con la ejecución anterior: más tiempo o más memoria es peor
+def comparar(actual, anterior, umbral):
+    empeora = False
+    print(f"\nComparación con {anterior['commit']} ({anterior['fecha']}):")
+    for modo, medidas in actual["modos"].items():
+        previas = anterior["modos"].get(modo)
+        if not previas:
+            continue
+        for medida in ("tiempo_s", "rss_max_mb"):
+            if not medidas.get(medida) or not previas.get(medida):
+                continue
+            cambio = (medidas[medida] - previas[medida]) / previas[medida] * 100
+            aviso = ""
+            if cambio > umbral:
+                aviso = "  <-- empeora"
+                empeora = True
+            print(f"  {modo:13} {medida:11} {previas[medida]:>9} -> {medidas[medida]:>9} ({cambio:+.1f}%){aviso}")
+    return empeora
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo del extractor")
+    parser.add_argument("--copias", type=int, default=10, help="Veces que se repite cada página del corpus")
+    parser.add_argument("--concurrencia", type=int, default=4)
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de espera por petición")
+    parser.add_argument("--historial", default=HISTORIAL_POR_DEFECTO)
+    parser.add_argument("--sin-guardar", action="store_true", help="No añadir el resultado al historial")
+    parser.add_argument("--umbral", type=float, default=10.0, help="Porcentaje de empeoramiento tolerado")
+    parser.add_argument("--fallar-si-empeora", action="store_true")
+    parser.add_argument("--conservar", action="store_true", help="No borrar el directorio de trabajo")
+    args = parser.parse_args()
+
+    corpus = cargar_corpus(args.copias)
+    paginas = len(corpus)
+    volumenes = sum(v for _, _, v in corpus)
+    casos = sorted({nombre for nombre, _, _ in corpus})
+    print(f"Corpus: {paginas} páginas ({', '.join(casos)}), {volumenes} volúmenes")
+
+    servidor = ServidorCorpus(corpus, args.latencia)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    directorio = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        entrada = [{"url": f"{servidor.base}/coleccion.php?id={n + 1}", "tipo": "manga"}
+                   for n in range(paginas)]
+        with open(os.path.join(directorio, 'entrada.json'), 'w', encoding='utf-8') as f:
+            json.dump(entrada, f)
+
+        comunes = ['entrada.json', '--tasa', '0', '--concurrencia', str(args.concurrencia),
+                   '--procesos', str(args.procesos), '--archivo', 'archivo_html']
+        modos = {
+            "completo": medir_modo(directorio, comunes, 'informe_completo.json', paginas, volumenes),
+            "sin_conexion": medir_modo(directorio, [*comunes, '--offline'], 'informe_sin_conexion.json',
+                                       paginas, volumenes),
+        }
+    finally:
+        servidor.shutdown()
+        if args.conservar:
+            print(f"Directorio de trabajo: {directorio}")
+        else:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    parametros = {"copias": args.copias, "concurrencia": args.concurrencia, "procesos": args.procesos,
+                  "latencia": args.latencia}
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": parametros,
+        "corpus": {"paginas": paginas, "volumenes": volumenes, "casos": casos},
+        "modos": modos,
+    }
+
+    print(f"\n{'modo':13} {'tiempo':>9} {'páginas/s':>10} {'volúmenes/s':>12} {'RSS máx.':>10}")
+    for modo, medidas in modos.items():
+        rss = f"{medidas['rss_max_mb']:.1f} MB" if medidas['rss_max_mb'] is not None else "-"
+        print(f"{modo:13} {medidas['tiempo_s']:8.2f}s {medidas['paginas_por_s']:10.1f} "
+              f"{medidas['volumenes_por_s']:12.1f} {rss:>10}")
+
+    anterior = ultimo_resultado(args.historial, parametros)
+    empeora = comparar(resultado, anterior, args.umbral) if anterior else False
+
+    if not args.sin_guardar:
+        os.makedirs(os.path.dirname(os.path.abspath(args.historial)), exist_ok=True)
+        with open(args.historial, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        print(f"\nResultado añadido a {args.historial}")
+
+    if empeora and args.fallar_si_empeora:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
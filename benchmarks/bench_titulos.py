@@ -0,0 +1,237 @@
+"""
+Benchmark y comprobación de salida de referencia para `limpiar_titulo_html_mejorado`.
+
+Compara la versión con reglas precompiladas con la implementación original (copiada
+abajo tal cual) sobre un conjunto de títulos, comprueba que ambas devuelven exactamente
+lo mismo para cada uno y muestra cuántos títulos por segundo limpia cada versión.
+
+Por defecto usa los títulos de las páginas de fixtures/ más variantes sintéticas que
+recorren todas las ramas; para comprobar el catálogo completo, pasar un volumes.json
+(o volumes.jsonl) generado por extract_manga_details.py.
+
+Uso: python benchmarks/bench_titulos.py [volumes.json] [--repeticiones N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extract_manga_details import limpiar_titulo_html_mejorado, parse_manga_details  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+# Implementación original, conservada como referencia
+def limpiar_titulo_referencia(original_title):
+    """
+    Función mejorada que utiliza la estructura HTML para separar el título del número de páginas.
+    Busca el carácter "nº" y, si existe, divide por el siguiente <br> después de ese carácter.
+    """
+    # Si hay un <br> en el título, podemos usar eso para separar
+    if '<div style="height: 8px"></div>' and 'páginas' in original_title:
+        marcador_inicio = '<div style="height: 8px"></div>'
+        indice_inicio = original_title.find(marcador_inicio)
+        subcadena = original_title[indice_inicio + len(marcador_inicio):]
+
+        indice_inicio = subcadena.find('página')
+        subcadena2 = subcadena[:indice_inicio]
+        partes = subcadena2.split('<br/>')
+
+        titulo = ' '.join(partes[:-1])
+        return titulo
+    
+    if '<br>' in original_title:
+        # Buscar el carácter "nº"
+        if 'nº' in original_title:
+            # Encontrar la posición de "nº"
+            pos_num = original_title.find('nº')
+            # Buscar el siguiente <br> después de "nº"
+            pos_br = original_title.find('<br>', pos_num)
+            
+            if pos_br != -1:
+                # Extraer el título hasta el <br> después de "nº"
+                clean_title = original_title[:pos_br].strip()
+                return clean_title
+        
+        # Si no hay "nº" o no hay <br> después de "nº", dividir por el primer <br>
+        parts = original_title.split('<br>', 1)
+        clean_title = parts[0].strip()
+        return clean_title
+    
+    # Si no hay <br>, usar las expresiones regulares como respaldo
+    # Caso para volúmenes con número y páginas juntos (ej: "nº1192 páginas")
+    match = re.search(r'(nº\s*)(\d{1})(\d{3})(\s*páginas)', original_title)
+    if match:
+        # Volumen de 1 dígito seguido de 3 dígitos (páginas)
+        prefix = match.group(1)  # "nº"
+        volume_number = match.group(2)  # Número del volumen (1 dígito)
+        
+        # Construir el título limpio
+        parts = original_title.split(match.group(0), 1)
+        base_title = parts[0].strip()
+        clean_title = f"{base_title} {prefix}{volume_number}"
+        return clean_title
+    
+    # Caso para volúmenes de 2 dígitos (ej: "nº10192 páginas")
+    match = re.search(r'(nº\s*)(\d{2})(\d{3})(\s*páginas)', original_title)
+    if match:
+        # Volumen de 2 dígitos seguido de 3 dígitos (páginas)
+        prefix = match.group(1)  # "nº"
+        volume_number = match.group(2)  # Número del volumen (2 dígitos)
+        
+        # Construir el título limpio
+        parts = original_title.split(match.group(0), 1)
+        base_title = parts[0].strip()
+        clean_title = f"{base_title} {prefix}{volume_number}"
+        return clean_title
+    
+    # Caso para volúmenes de 3 dígitos (ej: "nº100192 páginas")
+    match = re.search(r'(nº\s*)(\d{3})(\d{3})(\s*páginas)', original_title)
+    if match:
+        # Volumen de 3 dígitos seguido de 3 dígitos (páginas)
+        prefix = match.group(1)  # "nº"
+        volume_number = match.group(2)  # Número del volumen (3 dígitos)
+        
+        # Construir el título limpio
+        parts = original_title.split(match.group(0), 1)
+        base_title = parts[0].strip()
+        clean_title = f"{base_title} {prefix}{volume_number}"
+        return clean_title
+    
+    # Caso para volúmenes con formato diferente (ej: "nº1 192 páginas")
+    match = re.search(r'(nº\s*)(\d+)(\s+\d+\s*páginas)', original_title)
+    if match:
+        prefix = match.group(1)  # "nº"
+        volume_number = match.group(2)  # Número del volumen
+        
+        # Construir el título limpio
+        parts = original_title.split(match.group(0), 1)
+        base_title = parts[0].strip()
+        clean_title = f"{base_title} {prefix}{volume_number}"
+        return clean_title
+    
+    # Intentar con otros patrones comunes si no encontramos los patrones específicos
+    match = re.search(r'(n[°º]\s*)(\d+)', original_title)
+    if match:
+        prefix = match.group(1)  # "nº" o "n°"
+        volume_number = match.group(2)  # Número del volumen
+        
+        # Construir el título limpio
+        parts = original_title.split(match.group(0), 1)
+        base_title = parts[0].strip()
+        clean_title = f"{base_title} {prefix}{volume_number}"
+        return clean_title
+    
+    # Otros formatos (Vol., #, etc.)
+    match = re.search(r'(#\s*(\d+)|[Vv]ol\.\s*(\d+))', original_title)
+    if match:
+        # Determinar qué grupo capturó el número
+        volume_number = None
+        for group_index in range(2, 4):
+            if match.group(group_index):
+                volume_number = match.group(group_index)
+                break
+        
+        prefix_text = match.group(1).split(volume_number)[0]
+        
+        # Dividir el título en la parte base
+        parts = original_title.split(match.group(1), 1)
+        base_title = parts[0].strip()
+        
+        # Construir el título limpio
+        clean_title = f"{base_title} {prefix_text}{volume_number}"
+        return clean_title
+    
+    # Si no encontramos ningún patrón conocido, simplemente eliminar información adicional
+    clean_title = re.sub(r'\d+\s*páginas|\d+\s*€|en\s+B\/N|\d+,\d+\s*€', '', original_title)
+    clean_title = re.sub(r'\s+,', ',', clean_title)  # Eliminar espacios antes de comas
+    return clean_title.strip()
+
+
+
+# Variantes sintéticas que pasan por cada una de las reglas del limpiador
+def titulos_sinteticos():
+    bases = ["One Piece", "17 Años", "Ranma ½", "Dragon Ball (Edición Definitiva)", "Monster, Perfect Edition"]
+    formas = [
+        '<td class="cen"><img src="x.jpg"/><div style="height: 8px"></div>{b} nº{n}<br/>192 páginas en B/N<br/>7,95 €</td>',
+        '<td class="cen"><img src="x.jpg"/>{b} nº{n}<br/>192 páginas en B/N</td>',
+        '{b} nº{n}<br>192 páginas<br>Marzo 2007',
+        '{b}<br>Tomo único<br>Marzo 2007',
+        '{b} nº{n}192 páginas',
+        '{b} nº {n} 192 páginas',
+        '{b} n°{n}',
+        '{b} nº {n} Edición especial',
+        '{b} #{n}',
+        '{b} Vol. {n}',
+        '{b} vol.{n} #3',
+        '{b} 7,95 € en B/N',
+        '{b}   , 12 €',
+    ]
+    for base in bases:
+        for n in (1, 10, 100):
+            for forma in formas:
+                yield forma.format(b=base, n=n)
+
+
+def titulos_fixtures():
+    for nombre in sorted(os.listdir(FIXTURES_DIR)):
+        if nombre.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, nombre), 'rb') as f, contextlib.redirect_stdout(io.StringIO()):
+                resultado = parse_manga_details(f.read(), 1)
+            for volume in resultado["volumes"]:
+                yield volume["titulo"]
+
+
+def cargar_titulos(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        if ruta.endswith('.jsonl'):
+            return [json.loads(linea)["titulo"] for linea in f if linea.strip()]
+        return [volume["titulo"] for volume in json.load(f)]
+
+
+def medir(funcion, titulos, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for titulo in titulos:
+            funcion(titulo)
+    return len(titulos) * repeticiones / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("volumes", nargs="?", help="volumes.json o volumes.jsonl con títulos sin limpiar")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.volumes:
+        titulos = cargar_titulos(args.volumes)
+    else:
+        titulos = list(titulos_fixtures()) + list(titulos_sinteticos())
+
+    diferencias = 0
+    for titulo in titulos:
+        esperado = limpiar_titulo_referencia(titulo)
+        obtenido = limpiar_titulo_html_mejorado(titulo)
+        if esperado != obtenido:
+            diferencias += 1
+            if diferencias <= 10:
+                print(f"DIFERENCIA en {titulo!r}: {esperado!r} != {obtenido!r}")
+    if diferencias:
+        print(f"{diferencias} de {len(titulos)} títulos no coinciden con la implementación original")
+        sys.exit(1)
+    print(f"{len(titulos)} títulos idénticos a la implementación original")
+
+    original = medir(limpiar_titulo_referencia, titulos, args.repeticiones)
+    nuevo = medir(limpiar_titulo_html_mejorado, titulos, args.repeticiones)
+    print(f"original:     {original:12,.0f} títulos/s")
+    print(f"precompilado: {nuevo:12,.0f} títulos/s ({nuevo / original:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark de la extracción de volúmenes sobre las páginas escritas a mano de fixtures/.
+
+Compara el recorrido anterior (todas las tablas x todas sus imágenes) con
+`extract_volumes`, que recorre el documento una sola vez, y comprueba que el
+resultado es idéntico al del método anterior una vez eliminadas las celdas repetidas.
+
+Uso: python benchmarks/bench_volumenes.py [repeticiones]
+"""
+import os
+import re
+import sys
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extract_manga_details import extract_volumes  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+# Recorrido anterior: cada tabla anidada vuelve a visitar las mismas imágenes
+def extract_volumes_anterior(soup, manga_id):
+    volumes_data = []
+    volume_number = 1
+    for table in soup.find_all('table'):
+        for img_tag in table.find_all('img'):
+            parent_td = img_tag.find_parent('td')
+            if parent_td and parent_td.text and ('páginas' in parent_td.text or 'nº' in parent_td.text.lower()):
+                volume = {
+                    "id_manga": manga_id,
+                    "numero": volume_number,
+                    "titulo": "",
+                    "fecha": "",
+                    "imagen": f"tomos/{manga_id}/{volume_number}.jpg",
+                    "amazon_link": ""
+                }
+                cell_text = parent_td.text.strip()
+                text_lines = [line.strip() for line in cell_text.split('\n') if line.strip()]
+                if text_lines:
+                    volume["titulo"] = str(parent_td)
+                fecha_element = parent_td.find('a', string=re.compile(r'\w+ \d{4}'))
+                if fecha_element:
+                    volume["fecha"] = fecha_element.text.strip()
+                elif len(text_lines) > 1:
+                    for line in text_lines:
+                        if re.search(r'\w+ \d{4}', line):
+                            volume["fecha"] = line
+                            break
+                    if not volume["fecha"] and len(text_lines) > 1:
+                        volume["fecha"] = text_lines[-1]
+                img_url = img_tag.get('src', "")
+                if img_url and not img_url.startswith('http'):
+                    img_url = urljoin("https://www.listadomanga.es/", img_url)
+                amazon_link = parent_td.find('a', href=re.compile("amazon"))
+                if amazon_link:
+                    volume["amazon_link"] = amazon_link['href']
+                volumes_data.append((volume, img_url, parent_td))
+                volume_number += 1
+    return volumes_data
+
+
+# Quitar las celdas repetidas del método anterior y renumerar
+def deduplicar_por_celda(volumes_data, manga_id):
+    resultado = []
+    vistas = set()
+    for volume, img_url, parent_td in volumes_data:
+        if id(parent_td) in vistas:
+            continue
+        vistas.add(id(parent_td))
+        numero = len(resultado) + 1
+        volume = dict(volume, numero=numero, imagen=f"tomos/{manga_id}/{numero}.jpg")
+        resultado.append((volume, img_url))
+    return resultado
+
+
+def medir(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'fixture':32} {'anterior':>10} {'nuevo':>10} {'mejora':>8} {'vol. ant.':>10} {'vol. nuevos':>11}")
+    for nombre in sorted(os.listdir(FIXTURES_DIR)):
+        if not nombre.endswith('.html'):
+            continue
+        with open(os.path.join(FIXTURES_DIR, nombre), 'rb') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+
+        anterior = extract_volumes_anterior(soup, 1)
+        nuevo = extract_volumes(soup, 1)
+        if deduplicar_por_celda(anterior, 1) != nuevo:
+            print(f"ERROR: {nombre} produce un resultado distinto")
+            sys.exit(1)
+
+        t_anterior = medir(lambda: extract_volumes_anterior(soup, 1), repeticiones)
+        t_nuevo = medir(lambda: extract_volumes(soup, 1), repeticiones)
+        print(f"{nombre:32} {t_anterior * 1000:8.2f}ms {t_nuevo * 1000:8.2f}ms "
+              f"{t_anterior / t_nuevo:7.1f}x {len(anterior):10} {len(nuevo):11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Comprobación de que crawl_pages respeta --concurrencia.
+
+Sirve páginas con una latencia fija desde un servidor HTTP local que cuenta cuántas
+peticiones tiene en curso a la vez, y rastrea con crawl_async.crawl_pages con cada
+concurrencia de `--concurrencias`: el máximo de peticiones simultáneas tiene que ser
+exactamente esa concurrencia, también por encima del límite del ejecutor por defecto
+de asyncio (min(32, núcleos + 4)) y con un manejador lento, que no debe quitar hilos
+a las descargas. Termina con código 1 si alguna no coincide.
+
+Uso: python benchmarks/comprobar_concurrencia.py [--concurrencias 4 30 64] [--latencia 1.0]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from crawl_async import crawl_pages  # noqa: E402
+
+
+class ServidorContador(ThreadingHTTPServer):
+    daemon_threads = True
+    # Que las conexiones no esperen en la cola del socket con concurrencias altas
+    request_queue_size = 256
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.en_curso = 0
+        self.maximo = 0
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), ManejadorContador)
+
+    def reiniciar(self):
+        with self.lock:
+            self.maximo = 0
+
+
+class ManejadorContador(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        servidor = self.server
+        with servidor.lock:
+            servidor.en_curso += 1
+            servidor.maximo = max(servidor.maximo, servidor.en_curso)
+        try:
+            time.sleep(servidor.latencia)
+        finally:
+            with servidor.lock:
+                servidor.en_curso -= 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peticiones simultáneas de crawl_pages frente a --concurrencia")
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[4, 30, 64])
+    parser.add_argument("--latencia", type=float, default=1.0, help="Segundos que tarda cada respuesta")
+    parser.add_argument("--espera-manejador", type=float, default=0.05,
+                        help="Segundos que el manejador bloquea su hilo en cada página")
+    args = parser.parse_args()
+
+    servidor = ServidorContador(args.latencia)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    print(f"Ejecutor por defecto de asyncio: {min(32, (os.cpu_count() or 1) + 4)} hilos")
+    errores = 0
+    try:
+        for concurrencia in args.concurrencias:
+            urls = [f"http://127.0.0.1:{servidor.server_address[1]}/coleccion.php?id={n}"
+                    for n in range(concurrencia * 3)]
+            servidor.reiniciar()
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                crawl_pages(urls, lambda indice, url, pagina: time.sleep(args.espera_manejador),
+                            concurrencia=concurrencia, tasa=0)
+            segundos = time.perf_counter() - inicio
+            correcto = servidor.maximo == concurrencia
+            errores += not correcto
+            print(f"concurrencia {concurrencia:4}: {servidor.maximo:4} peticiones simultáneas como máximo, "
+                  f"{segundos:6.2f} s  {'correcto' if correcto else 'DIFERENTE'}")
+    finally:
+        servidor.shutdown()
+    if errores:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Comprobación de los agregados de catalog_analytics.py frente a un recuento directo.
+
+Genera un catálogo sintético con fechas de todos los tipos que salen del extractor
+("MM/YYYY" en los mangas; "Marzo 2001", solo el año o vacías en los volúmenes) y con
+mangas y volúmenes sin año, lo exporta en Parquet y en Arrow con columnar_export.py y
+compara el resumen de catalog_analytics.py con el mismo recuento hecho en Python sobre
+los JSON. Termina con código 1 si algo no coincide (p. ej. años como "2020.0").
+
+Se puede pasar un directorio con mangas_detailed.json y volumes_fixed.json reales
+para comprobarlos también.
+
+Uso: python benchmarks/paridad_columnar.py [directorio] [--mangas N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from catalog_aggregates import MESES  # noqa: E402
+from catalog_analytics import cargar, resumen  # noqa: E402
+from columnar_export import FORMATOS, anio_mes, exportar_columnar  # noqa: E402
+
+
+def catalogo_sintetico(numero, semilla=1):
+    azar = random.Random(semilla)
+    mangas, volumenes = [], []
+    for manga_id in range(1, numero + 1):
+        # Uno de cada cinco mangas sin fecha, así que la columna del año tiene nulos
+        fecha = "" if manga_id % 5 == 0 else f"{azar.randint(1, 12):02d}/{azar.randint(1995, 2024)}"
+        mangas.append({"id": manga_id, "titulo": f"Manga {manga_id}", "autor": f"Autor {manga_id % 7}",
+                       "tipo": azar.choice(["", "catalan", "bl"]), "fecha": fecha, "volumenes": 0})
+        for numero_tomo in range(1, azar.randint(0, 6) + 1):
+            anio = azar.randint(1995, 2024)
+            fecha = azar.choice([f"{MESES[azar.randint(0, 11)].capitalize()} {anio}", str(anio), "",
+                                 "Fecha por determinar"])
+            volumenes.append({"id_manga": manga_id, "numero": numero_tomo, "titulo": f"Tomo {numero_tomo}",
+                              "fecha": fecha})
+    return mangas, volumenes
+
+
+# El mismo resumen, contado registro a registro sobre los JSON
+def resumen_esperado(mangas, volumenes):
+    autor = {manga["id"]: manga.get("autor") for manga in mangas}
+    tipo = {manga["id"]: manga.get("tipo") for manga in mangas}
+    anios_mangas = Counter(anio_mes(manga.get("fecha"))[0] for manga in mangas)
+    fechas = [anio_mes(volumen.get("fecha")) for volumen in volumenes]
+    anios_volumenes = Counter(anio for anio, _ in fechas)
+    meses = Counter(f"{anio}-{mes:02d}" for anio, mes in fechas if anio is not None and mes is not None)
+    anios_mangas.pop(None, None)
+    anios_volumenes.pop(None, None)
+    return {
+        "mangas": len(mangas),
+        "volumenes": len(volumenes),
+        "mangas_por_anio": dict(sorted(anios_mangas.items())),
+        "volumenes_por_anio": dict(sorted(anios_volumenes.items())),
+        "volumenes_por_mes": dict(sorted(meses.items())),
+        "volumenes_por_tipo": dict(Counter(tipo[v["id_manga"]] for v in volumenes if v["id_manga"] in tipo)),
+        "volumenes_por_autor": dict(Counter(autor[v["id_manga"]] for v in volumenes if v["id_manga"] in autor)),
+    }
+
+
+def comprobar(nombre, mangas, volumenes, directorio):
+    entrada_mangas = os.path.join(directorio, 'mangas.json')
+    entrada_volumenes = os.path.join(directorio, 'volumes.json')
+    for ruta, registros in ((entrada_mangas, mangas), (entrada_volumenes, volumenes)):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(registros, f, ensure_ascii=False)
+    esperado = resumen_esperado(mangas, volumenes)
+
+    errores = 0
+    for formato in FORMATOS:
+        salida = os.path.join(directorio, formato)
+        with contextlib.redirect_stdout(io.StringIO()):
+            exportar_columnar(entrada_mangas, entrada_volumenes, salida, formato)
+        # Sin límite de autores para poder comparar el ranking completo
+        obtenido = resumen(*cargar(salida), top=len(mangas))
+        for clave, valor in esperado.items():
+            comparado = obtenido[clave]
+            if clave in ("volumenes_por_tipo", "volumenes_por_autor"):
+                # Rankings: el orden entre empates no importa y los ceros no se muestran
+                comparado = {k: v for k, v in comparado.items() if v}
+                valor = {k: v for k, v in valor.items() if v}
+            if comparado != valor:
+                print(f"DIFERENCIA: {nombre} ({formato}), {clave}:\n  esperado {valor}\n  obtenido {comparado}")
+                errores += 1
+    print(f"{nombre}: {len(mangas)} mangas, {len(volumenes)} volúmenes, "
+          f"{'correcto' if not errores else f'{errores} diferencias'}")
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregados columnares frente a un recuento directo")
+    parser.add_argument("directorio", nargs="?", default=None,
+                        help="Directorio con mangas_detailed.json y volumes_fixed.json para comprobar también")
+    parser.add_argument("--mangas", type=int, default=300, help="Mangas del catálogo sintético")
+    args = parser.parse_args()
+
+    trabajo = tempfile.mkdtemp(prefix="paridad_columnar_")
+    try:
+        errores = comprobar("sintético", *catalogo_sintetico(args.mangas), trabajo)
+        if args.directorio:
+            with open(os.path.join(args.directorio, 'mangas_detailed.json'), 'r', encoding='utf-8') as f:
+                mangas = json.load(f)
+            with open(os.path.join(args.directorio, 'volumes_fixed.json'), 'r', encoding='utf-8') as f:
+                volumenes = json.load(f)
+            errores += comprobar(args.directorio, mangas, volumenes, trabajo)
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+    if errores:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Comprobación de paridad entre backends de análisis HTML sobre las páginas de fixtures/.
+
+Analiza cada página con todos los backends disponibles (a partir de los bytes sin
+decodificar) y compara el resultado completo de `parse_manga_details` con el de
+referencia: html.parser sobre el texto ya decodificado, que es como se analizaba antes.
+Termina con código 1 si algún backend produce un resultado distinto, y muestra el
+tiempo medio de análisis por página para cada uno.
+
+Las páginas de fixtures/ están escritas a mano y son HTML bien formado, así que esta
+comprobación no basta para cambiar el backend por defecto: para eso habría que añadir
+páginas reales del sitio, con su HTML mal cerrado incluido.
+
+Uso: python benchmarks/paridad_parsers.py [repeticiones]
+"""
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extract_manga_details import limpiar_titulo_html_mejorado, parse_manga_details  # noqa: E402
+from html_parser import BACKENDS  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def analizar(contenido, backend):
+    # parse_manga_details informa por consola de cada manga; aquí solo interesa el resultado
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse_manga_details(contenido, 1, "https://www.listadomanga.es/coleccion.php?id=1",
+                                   backend=backend)
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    disponibles = [b for b in BACKENDS if b == "html.parser" or importlib.util.find_spec(b)]
+    print(f"Backends disponibles: {', '.join(disponibles)}")
+
+    errores = 0
+    tiempos = {backend: 0.0 for backend in disponibles}
+    fixtures = sorted(n for n in os.listdir(FIXTURES_DIR) if n.endswith('.html'))
+    for nombre in fixtures:
+        with open(os.path.join(FIXTURES_DIR, nombre), 'rb') as f:
+            contenido = f.read()
+        referencia = analizar(contenido.decode('utf-8'), "html.parser")
+        titulos_referencia = [limpiar_titulo_html_mejorado(v["titulo"]) for v in referencia["volumes"]]
+
+        for backend in disponibles:
+            resultado = analizar(contenido, backend)
+            titulos = [limpiar_titulo_html_mejorado(v["titulo"]) for v in resultado["volumes"]]
+            if resultado != referencia or titulos != titulos_referencia:
+                errores += 1
+                print(f"DIFERENCIA: {nombre} con {backend}")
+
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                analizar(contenido, backend)
+            tiempos[backend] += (time.perf_counter() - inicio) / repeticiones
+
+    for backend in disponibles:
+        print(f"{backend:12} {tiempos[backend] / len(fixtures) * 1000:8.2f} ms/página")
+    if errores:
+        sys.exit(1)
+    print("Todos los backends producen el mismo resultado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Comprobación de paridad entre una ejecución de un solo proceso y una repartida en shards.
+
+Sirve el corpus de bench_pipeline.py (las páginas de fixtures/ repetidas `--copias`
+veces, con imágenes falsas) desde un servidor HTTP local y ejecuta el extractor:
+- un_proceso: la ejecución normal, que sirve de referencia
+- shards_N: con --shards N (N procesos locales y fusión al final)
+- separados: cada --shard k/N en su propio directorio, como en máquinas distintas, y
+  después --fusionar con los directorios de todos
+
+Compara byte a byte los JSON, los JSON Lines y los ficheros derivados con los de
+referencia y termina con código 1 si alguno difiere. Muestra el tiempo de cada
+ejecución; con --latencia se ve cuánto gana el reparto cuando el servidor es lento.
+
+Uso: python benchmarks/paridad_shards.py [--copias N] [--shards 2 4] [--latencia 0.05]
+"""
+import argparse
+import filecmp
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench_pipeline import EXTRACTOR, ServidorCorpus, cargar_corpus, ejecutar
+
+# Salidas que tienen que coincidir con las de un solo proceso
+SALIDAS = ("mangas_detailed.json", "volumes.json", "volumes_fixed.json", "mangas_detailed.jsonl",
+           "volumes.jsonl", "volumes_fixed.jsonl", "catalogo.bin", "indice_busqueda.bin", "agregados.json",
+           "ediciones.json")
+
+
+def diferencias(referencia, directorio):
+    return [salida for salida in SALIDAS
+            if not filecmp.cmp(os.path.join(referencia, salida), os.path.join(directorio, salida), shallow=False)]
+
+
+# Cada shard en su propio directorio y proceso, como si fueran máquinas distintas
+def ejecutar_separados(directorio, comunes, shards):
+    inicio = time.perf_counter()
+    procesos = []
+    for numero in range(1, shards + 1):
+        destino = os.path.join(directorio, f"maquina-{numero}")
+        os.makedirs(destino)
+        log = open(os.path.join(destino, 'salida.log'), 'wb')
+        procesos.append((subprocess.Popen([sys.executable, EXTRACTOR, *comunes, '--shard', f"{numero}/{shards}"],
+                                          cwd=destino, stdout=log, stderr=subprocess.STDOUT), log, destino))
+    for proceso, log, destino in procesos:
+        proceso.wait()
+        log.close()
+        if proceso.returncode != 0:
+            raise RuntimeError(f"El shard de {destino} terminó con código {proceso.returncode}")
+    ejecutar(directorio, ['--fusionar', *(destino for _, _, destino in procesos)])
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad de la ejecución en shards con la de un solo proceso")
+    parser.add_argument("--copias", type=int, default=4, help="Veces que se repite cada página del corpus")
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--concurrencia", type=int, default=2, help="Peticiones simultáneas de cada proceso")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de espera por petición")
+    parser.add_argument("--conservar", action="store_true", help="No borrar el directorio de trabajo")
+    args = parser.parse_args()
+
+    corpus = cargar_corpus(args.copias)
+    print(f"Corpus: {len(corpus)} páginas, {sum(v for _, _, v in corpus)} volúmenes")
+    servidor = ServidorCorpus(corpus, args.latencia)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    raiz = tempfile.mkdtemp(prefix="paridad_shards_")
+    errores = 0
+    try:
+        entrada = os.path.join(raiz, 'entrada.json')
+        with open(entrada, 'w', encoding='utf-8') as f:
+            json.dump([{"url": f"{servidor.base}/coleccion.php?id={n + 1}", "tipo": "manga"}
+                       for n in range(len(corpus))], f)
+        comunes = [entrada, '--tasa', '0', '--concurrencia', str(args.concurrencia)]
+
+        referencia = os.path.join(raiz, 'un_proceso')
+        os.makedirs(referencia)
+        tiempo, _ = ejecutar(referencia, comunes)
+        print(f"{'un_proceso':12} {tiempo:7.2f} s")
+
+        casos = [(f"shards_{n}", n, False) for n in args.shards] + [("separados", args.shards[-1], True)]
+        for nombre, shards, separados in casos:
+            directorio = os.path.join(raiz, nombre)
+            os.makedirs(directorio)
+            if separados:
+                tiempo = ejecutar_separados(directorio, comunes, shards)
+            else:
+                tiempo, _ = ejecutar(directorio, [*comunes, '--shards', str(shards)])
+            distintas = diferencias(referencia, directorio)
+            estado = "idéntico" if not distintas else f"DIFERENTE: {', '.join(distintas)}"
+            print(f"{nombre:12} {tiempo:7.2f} s  {estado}")
+            errores += bool(distintas)
+    finally:
+        servidor.shutdown()
+        if args.conservar:
+            print(f"Directorio de trabajo: {raiz}")
+        else:
+            shutil.rmtree(raiz, ignore_errors=True)
+
+    if errores:
+        sys.exit(1)
+    print("Las ejecuciones en shards producen la misma salida que la de un solo proceso")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+from collections import defaultdict
+
+from catalog_export import clave_fecha
+from json_stream import leer_registros
+
+AGREGADOS_POR_DEFECTO = "agregados.json"
+# Mangas en cada lista de recientes (los endpoints del backend sirven 10)
+TOP_RECIENTES = 10
+MESES = ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+         "septiembre", "octubre", "noviembre", "diciembre")
+
+
+# Clave numérica de ordenación de una fecha "MM/YYYY" (YYYYMM), o None si no tiene fecha
+def clave_orden(fecha):
+    try:
+        mes, anio = (int(parte) for parte in (fecha or "").split('/'))
+    except ValueError:
+        return None
+    return anio * 100 + mes
+
+
+# "MM/YYYY" -> "abril 2025", como toLocaleString('es-ES', { month: 'long' }) en el backend
+def nombre_mes(fecha):
+    mes, anio = (int(parte) for parte in fecha.split('/'))
+    return f"{MESES[(mes - 1) % 12]} {anio + (mes - 1) // 12}"
+
+
+def _agrupar_por_mes(mangas):
+    agrupados = {}
+    for manga in mangas:
+        if manga.get("fecha"):
+            agrupados.setdefault(nombre_mes(manga["fecha"]), []).append(manga)
+    return {"months": list(agrupados), "groupedMangas": agrupados}
+
+
+# Generar los agregados que el backend sirve sin recorrer el catálogo en cada petición
+def generar_agregados(mangas_json="mangas_detailed.jsonl", ruta_salida=AGREGADOS_POR_DEFECTO, top=TOP_RECIENTES):
+    """
+    Escribe `ruta_salida` con:
+    - `claves_fecha`: {id: YYYYMM} para ordenar por fecha sin analizar "MM/YYYY"
+    - `recientes`: IDs de los `top` mangas más recientes, en total ("todos") y por tipo
+    - `recientes_por_mes`: esos mangas agrupados por mes, tal como los devuelve /recent
+    - `novedades`: los del carrusel de novedades (los más recientes con fecha, del más
+      antiguo al más reciente)
+    - `autores`: los autores distintos en orden alfabético
+    - `por_autor`: por autor en minúsculas, su nombre, el número de mangas y sus IDs
+    """
+    mangas = list(leer_registros(mangas_json))
+
+    # sorted es estable: a igual fecha se conserva el orden de la salida
+    por_fecha = sorted(mangas, key=clave_fecha)
+    recientes = {"todos": por_fecha[:top]}
+    por_tipo = defaultdict(list)
+    for manga in por_fecha:
+        lista = por_tipo[manga.get("tipo", "")]
+        if len(lista) < top:
+            lista.append(manga)
+    recientes.update(por_tipo)
+
+    por_autor = {}
+    for manga in mangas:
+        autor = manga.get("autor") or ""
+        grupo = por_autor.setdefault(autor.lower(), {"autor": autor, "cantidad": 0, "ids": []})
+        grupo["cantidad"] += 1
+        grupo["ids"].append(manga["id"])
+
+    agregados = {
+        "top": top,
+        "claves_fecha": {manga["id"]: clave_orden(manga.get("fecha")) for manga in mangas},
+        "recientes": {tipo: [m["id"] for m in lista] for tipo, lista in recientes.items()},
+        "recientes_por_mes": {tipo: _agrupar_por_mes(lista) for tipo, lista in recientes.items()},
+        "novedades": [m for m in por_fecha[:top] if m.get("fecha")][::-1],
+        "autores": sorted({manga.get("autor") or "" for manga in mangas}),
+        "por_autor": dict(sorted(por_autor.items())),
+    }
+
+    tmp = f"{ruta_salida}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(agregados, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, ruta_salida)
+    print(f"Agregados guardados en {ruta_salida}: {len(recientes) - 1} tipos, {len(por_autor)} autores")
+    return agregados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera los agregados de recientes y autores para el backend")
+    parser.add_argument("--mangas", default="mangas_detailed.jsonl", help="mangas_detailed.jsonl o .json")
+    parser.add_argument("--salida", default=AGREGADOS_POR_DEFECTO)
+    parser.add_argument("--top", type=int, default=TOP_RECIENTES, help="Mangas en cada lista de recientes")
+    args = parser.parse_args()
+
+    generar_agregados(args.mangas, args.salida, args.top)
@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import time
+
+from columnar_export import COLUMNAR_POR_DEFECTO, FORMATOS
+
+# pandas y numpy solo hacen falta para estos análisis, así que son dependencias opcionales
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Autores que se muestran en el ranking de volúmenes
+TOP_AUTORES = 20
+
+
+# Leer mangas y volúmenes exportados por columnar_export.py (Parquet o Arrow)
+def cargar(directorio=COLUMNAR_POR_DEFECTO):
+    if pd is None:
+        raise RuntimeError("Los análisis del catálogo necesitan pandas: pip install pandas pyarrow")
+    for formato in FORMATOS:
+        ruta_mangas = os.path.join(directorio, f"mangas.{formato}")
+        if os.path.exists(ruta_mangas):
+            leer = pd.read_parquet if formato == "parquet" else pd.read_feather
+            # Con tipos que admiten nulos, un año o un mes vacío no convierte la columna en float
+            return (leer(ruta_mangas, dtype_backend="numpy_nullable"),
+                    leer(os.path.join(directorio, f"volumes.{formato}"), dtype_backend="numpy_nullable"))
+    raise FileNotFoundError(f"No hay exportación columnar en {directorio}/ (ver columnar_export.py)")
+
+
+# Cuántas filas hay por cada valor de `serie` (sin contar las vacías), ordenado por el valor
+def _contar(serie):
+    return {_clave(valor): int(total) for valor, total in serie.dropna().value_counts().sort_index().items()}
+
+
+def _clave(valor):
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        return int(valor)
+    return str(valor)
+
+
+def volumenes_por_anio(volumenes):
+    return _contar(volumenes["anio"])
+
+
+def mangas_por_anio(mangas):
+    return _contar(mangas["anio"])
+
+
+# Volúmenes publicados por mes de cada año ("YYYY-MM"), solo los que tienen mes
+def volumenes_por_mes(volumenes):
+    con_mes = volumenes.dropna(subset=["anio", "mes"])
+    claves = con_mes["anio"].astype(np.int32) * 100 + con_mes["mes"].astype(np.int32)
+    return {f"{clave // 100}-{clave % 100:02d}": total for clave, total in _contar(claves).items()}
+
+
+# Volúmenes de cada manga, en el orden de `mangas`
+def _volumenes_de_cada_manga(mangas, volumenes):
+    # Cada volumen a la fila de su manga en un solo paso (los que no tienen manga dan -1)
+    filas = pd.Index(mangas["id"]).get_indexer(volumenes["id_manga"])
+    return np.bincount(filas[filas >= 0], minlength=len(mangas))
+
+
+def volumenes_por_tipo(mangas, volumenes):
+    totales = pd.Series(_volumenes_de_cada_manga(mangas, volumenes), index=mangas.index)
+    por_tipo = totales.groupby(mangas["tipo"], observed=True).sum()
+    return {str(tipo): int(total) for tipo, total in por_tipo.sort_values(ascending=False).items()}
+
+
+def volumenes_por_autor(mangas, volumenes, top=TOP_AUTORES):
+    totales = pd.Series(_volumenes_de_cada_manga(mangas, volumenes), index=mangas.index)
+    por_autor = totales.groupby(mangas["autor"], observed=True).sum()
+    por_autor = por_autor[por_autor > 0].sort_values(ascending=False, kind="stable").head(top)
+    return {str(autor): int(total) for autor, total in por_autor.items()}
+
+
+# Todos los agregados de una vez
+def resumen(mangas, volumenes, top=TOP_AUTORES):
+    return {
+        "mangas": len(mangas),
+        "volumenes": len(volumenes),
+        "mangas_por_anio": mangas_por_anio(mangas),
+        "volumenes_por_anio": volumenes_por_anio(volumenes),
+        "volumenes_por_mes": volumenes_por_mes(volumenes),
+        "volumenes_por_tipo": volumenes_por_tipo(mangas, volumenes),
+        "volumenes_por_autor": volumenes_por_autor(mangas, volumenes, top),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agregados del catálogo sobre la exportación columnar")
+    parser.add_argument("directorio", nargs="?", default=COLUMNAR_POR_DEFECTO)
+    parser.add_argument("--top", type=int, default=TOP_AUTORES, help="Autores en el ranking de volúmenes")
+    parser.add_argument("--json", default=None, help="Guardar el resumen en este fichero JSON")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    mangas, volumenes = cargar(args.directorio)
+    carga = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    datos = resumen(mangas, volumenes, args.top)
+    calculo = time.perf_counter() - inicio
+
+    if args.json:
+        tmp = f"{args.json}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, args.json)
+        print(f"Resumen guardado en {args.json}")
+    else:
+        print(f"{datos['mangas']} mangas, {datos['volumenes']} volúmenes")
+        print("Volúmenes por año:")
+        for anio, total in datos["volumenes_por_anio"].items():
+            print(f"  {anio}: {total}")
+        print("Volúmenes por tipo:")
+        for tipo, total in datos["volumenes_por_tipo"].items():
+            print(f"  {tipo}: {total}")
+        print(f"Autores con más volúmenes (top {args.top}):")
+        for autor, total in datos["volumenes_por_autor"].items():
+            print(f"  {autor}: {total}")
+    print(f"Carga {carga * 1000:.1f} ms, agregados {calculo * 1000:.1f} ms")
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import struct
+from collections import defaultdict
+
+from json_stream import leer_registros
+
+CATALOGO_POR_DEFECTO = "catalogo.bin"
+
+# Formato de catalogo.bin (little-endian, todos los enteros sin signo de 32 bits):
+#   cabecera   "MCAT", versión (u16), reservado (u16), número de mangas, capacidad de la
+#              tabla hash y desplazamientos de registros, tabla hash, orden por autor,
+#              orden por fecha y datos
+#   registros  por manga, en el orden de la salida: id, desplazamiento y longitud del JSON
+#              del manga, desplazamiento y longitud del JSON con la lista de sus volúmenes
+#   hash       `capacidad` huecos (id, posición del registro); hueco vacío: id = HUECO_VACIO.
+#              Hueco inicial: (id * 2654435761) mod 2^32 & (capacidad - 1), sondeo lineal
+#   por_autor  posiciones de los registros ordenadas por autor (y título)
+#   por_fecha  posiciones ordenadas por fecha, de la más reciente a la más antigua
+#   datos      los JSON en UTF-8, uno detrás de otro
+MAGIA = b"MCAT"
+VERSION = 1
+CABECERA = struct.Struct("<4sHH7I")
+REGISTRO = struct.Struct("<5I")
+HUECO = struct.Struct("<2I")
+HUECO_VACIO = 0xFFFFFFFF
+MULTIPLICADOR_HASH = 2654435761
+
+
+def hueco_inicial(manga_id, capacidad):
+    return (manga_id * MULTIPLICADOR_HASH) & 0xFFFFFFFF & (capacidad - 1)
+
+
+# Clave de orden por fecha ("MM/YYYY"): más recientes primero y los mangas sin fecha al final
+def clave_fecha(manga):
+    try:
+        mes, anio = (int(parte) for parte in (manga.get("fecha") or "").split('/'))
+    except ValueError:
+        return (1, 0)
+    return (0, -(anio * 12 + mes))
+
+
+# Clave de orden por autor: lower() para comparar igual que toLowerCase() en el backend
+def clave_autor(manga):
+    autor = (manga.get("autor") or "").lower()
+    return (autor == "", autor, (manga.get("titulo") or "").lower())
+
+
+def _json(registro):
+    return json.dumps(registro, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# Exportar el catálogo en un fichero binario indexado para el backend
+def exportar_catalogo(mangas_json="mangas_detailed.jsonl", volumes_json="volumes_fixed.jsonl",
+                      ruta_salida=CATALOGO_POR_DEFECTO):
+    """
+    Escribe `ruta_salida` con cada manga (y la lista de sus volúmenes) como JSON
+    independiente, una tabla hash id -> registro para consultar un manga en O(1) sin
+    analizar el resto, y los órdenes por autor y por fecha ya calculados. El backend
+    carga el fichero con una sola lectura y solo decodifica los registros que sirve
+    (ver manga-app-backend/lib/catalogo.js).
+    """
+    volumenes = defaultdict(list)
+    for volumen in leer_registros(volumes_json):
+        volumenes[volumen["id_manga"]].append(volumen)
+    mangas = list(leer_registros(mangas_json))
+
+    numero = len(mangas)
+    capacidad = 1
+    while capacidad < numero * 2:
+        capacidad *= 2
+
+    inicio_registros = CABECERA.size
+    inicio_hash = inicio_registros + REGISTRO.size * numero
+    inicio_por_autor = inicio_hash + HUECO.size * capacidad
+    inicio_por_fecha = inicio_por_autor + 4 * numero
+    inicio_datos = inicio_por_fecha + 4 * numero
+
+    registros = bytearray()
+    datos = bytearray()
+    huecos = [(HUECO_VACIO, 0)] * capacidad
+    for posicion, manga in enumerate(mangas):
+        manga_json = _json(manga)
+        volumenes_json = _json(volumenes.get(manga["id"], []))
+        desplazamiento = inicio_datos + len(datos)
+        datos += manga_json
+        datos += volumenes_json
+        registros += REGISTRO.pack(manga["id"], desplazamiento, len(manga_json),
+                                   desplazamiento + len(manga_json), len(volumenes_json))
+
+        hueco = hueco_inicial(manga["id"], capacidad)
+        while huecos[hueco][0] != HUECO_VACIO:
+            if huecos[hueco][0] == manga["id"]:
+                raise ValueError(f"ID de manga repetido en {mangas_json}: {manga['id']}")
+            hueco = (hueco + 1) & (capacidad - 1)
+        huecos[hueco] = (manga["id"], posicion)
+
+    por_autor = sorted(range(numero), key=lambda p: clave_autor(mangas[p]))
+    # sorted es estable: a igual fecha se conserva el orden de la salida
+    por_fecha = sorted(range(numero), key=lambda p: clave_fecha(mangas[p]))
+
+    tmp = f"{ruta_salida}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, 0, numero, capacidad, inicio_registros, inicio_hash,
+                              inicio_por_autor, inicio_por_fecha, inicio_datos))
+        f.write(registros)
+        f.write(b"".join(HUECO.pack(*hueco) for hueco in huecos))
+        f.write(struct.pack(f"<{numero}I", *por_autor))
+        f.write(struct.pack(f"<{numero}I", *por_fecha))
+        f.write(datos)
+    os.replace(tmp, ruta_salida)
+    print(f"Catálogo indexado guardado en {ruta_salida}: {numero} mangas, "
+          f"{sum(len(v) for v in volumenes.values())} volúmenes, {os.path.getsize(ruta_salida)} bytes")
+    return numero
+
+
+# Lector del catálogo (el equivalente en JavaScript está en el backend)
+class Catalogo:
+    def __init__(self, ruta=CATALOGO_POR_DEFECTO):
+        with open(ruta, 'rb') as f:
+            self.datos = f.read()
+        (magia, version, _, self.numero, self.capacidad, self._registros, self._hash,
+         self._por_autor, self._por_fecha, _) = CABECERA.unpack_from(self.datos)
+        if magia != MAGIA or version != VERSION:
+            raise ValueError(f"{ruta} no es un catálogo de la versión {VERSION}")
+
+    def _registro(self, posicion):
+        return REGISTRO.unpack_from(self.datos, self._registros + REGISTRO.size * posicion)
+
+    def posicion(self, manga_id):
+        hueco = hueco_inicial(manga_id, self.capacidad)
+        while True:
+            id_hueco, posicion = HUECO.unpack_from(self.datos, self._hash + HUECO.size * hueco)
+            if id_hueco == manga_id:
+                return posicion
+            if id_hueco == HUECO_VACIO:
+                return None
+            hueco = (hueco + 1) & (self.capacidad - 1)
+
+    def manga(self, posicion):
+        _, desplazamiento, longitud, _, _ = self._registro(posicion)
+        return json.loads(self.datos[desplazamiento:desplazamiento + longitud])
+
+    def volumenes(self, posicion):
+        _, _, _, desplazamiento, longitud = self._registro(posicion)
+        return json.loads(self.datos[desplazamiento:desplazamiento + longitud])
+
+    def por_id(self, manga_id):
+        posicion = self.posicion(manga_id)
+        return None if posicion is None else self.manga(posicion)
+
+    def orden(self, nombre):
+        """Posiciones de los registros en el orden `por_autor` o `por_fecha`."""
+        inicio = {"por_autor": self._por_autor, "por_fecha": self._por_fecha}[nombre]
+        return list(struct.unpack_from(f"<{self.numero}I", self.datos, inicio))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta el catálogo a un fichero binario indexado para el backend")
+    parser.add_argument("--mangas", default="mangas_detailed.jsonl", help="mangas_detailed.jsonl o .json")
+    parser.add_argument("--volumes", default="volumes_fixed.jsonl", help="volumes_fixed.jsonl o .json")
+    parser.add_argument("--salida", default=CATALOGO_POR_DEFECTO)
+    args = parser.parse_args()
+
+    exportar_catalogo(args.mangas, args.volumes, args.salida)
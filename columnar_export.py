@@ -0,0 +1,132 @@
+import argparse
+import os
+import re
+
+from catalog_aggregates import MESES
+from json_stream import leer_registros
+
+# pyarrow solo hace falta para esta exportación, así que es una dependencia opcional
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+COLUMNAR_POR_DEFECTO = "columnar"
+FORMATOS = ("parquet", "arrow")
+
+FECHA_NUMERICA_RE = re.compile(r'^\s*(\d{1,2})/(\d{4})\s*$')
+FECHA_TEXTO_RE = re.compile(r'(\w+)\s+(\d{4})')
+# Solo años plausibles, para no tomar por año un precio o un número de páginas
+ANIO_RE = re.compile(r'\b((?:19|20)\d{2})\b')
+NUMERO_MES = {nombre: numero for numero, nombre in enumerate(MESES, start=1)}
+
+
+# Año y mes de una fecha "MM/YYYY" (mangas) o "Marzo 2000" (volúmenes); None si no se sabe
+def anio_mes(fecha):
+    """
+    En las fechas de texto de los volúmenes que solo tienen el año, el mes queda en None
+    para que los agregados por mes no se inflen en enero. Las fechas "MM/YYYY" de los
+    mangas se toman tal cual: parse_manga_details escribe "01/YYYY" cuando solo conoce
+    el año, así que esos mangas cuentan en enero (no se distinguen de un enero real).
+    """
+    if not fecha:
+        return None, None
+    match = FECHA_NUMERICA_RE.match(fecha)
+    if match:
+        return int(match.group(2)), int(match.group(1))
+    match = FECHA_TEXTO_RE.search(fecha)
+    if match and match.group(1).lower() in NUMERO_MES:
+        return int(match.group(2)), NUMERO_MES[match.group(1).lower()]
+    match = ANIO_RE.search(fecha)
+    if match:
+        return int(match.group(1)), None
+    return None, None
+
+
+def _esquemas():
+    # Los textos que se repiten mucho (tipo, autor) van como diccionario: cada valor se
+    # guarda una vez y las filas solo llevan un índice
+    texto_repetido = pa.dictionary(pa.int32(), pa.string())
+    mangas = pa.schema([
+        ("id", pa.int32()),
+        ("titulo", pa.string()),
+        ("autor", texto_repetido),
+        ("tipo", texto_repetido),
+        ("fecha", pa.string()),
+        ("anio", pa.int16()),
+        ("mes", pa.int8()),
+        ("volumenes", pa.int32()),
+        ("sinopsis", pa.string()),
+        ("foto_portada", pa.string()),
+        ("foto_fondo", pa.string()),
+        ("foto_logo", pa.string()),
+        ("amazon_link", pa.string()),
+    ])
+    volumenes = pa.schema([
+        ("id_manga", pa.int32()),  # clave ajena a mangas.id
+        ("numero", pa.int32()),
+        ("titulo", pa.string()),
+        ("fecha", pa.string()),
+        ("anio", pa.int16()),
+        ("mes", pa.int8()),
+        ("imagen", pa.string()),
+        ("amazon_link", pa.string()),
+    ])
+    return mangas, volumenes
+
+
+def _tabla(registros, esquema):
+    columnas = {campo.name: [] for campo in esquema}
+    for registro in registros:
+        anio, mes = anio_mes(registro.get("fecha"))
+        registro = dict(registro, anio=anio, mes=mes)
+        for nombre, valores in columnas.items():
+            valores.append(registro.get(nombre))
+    return pa.table(columnas, schema=esquema)
+
+
+def _escribir(tabla, ruta, formato):
+    tmp = f"{ruta}.tmp"
+    if formato == "parquet":
+        pq.write_table(tabla, tmp, compression="zstd")
+    else:
+        feather.write_feather(tabla, tmp, compression="zstd")
+    os.replace(tmp, ruta)
+
+
+# Exportar mangas y volúmenes a ficheros columnares con tipos
+def exportar_columnar(mangas_json="mangas_detailed.jsonl", volumes_json="volumes_fixed.jsonl",
+                      directorio=COLUMNAR_POR_DEFECTO, formato="parquet"):
+    """
+    Escribe `directorio`/mangas.<formato> y `directorio`/volumes.<formato> (Parquet o
+    Arrow IPC/Feather, comprimidos con zstd). Los IDs son enteros (`volumes.id_manga`
+    apunta a `mangas.id`) y cada fecha se acompaña de su año y su mes como números,
+    para poder agregar sin volver a analizar texto (ver catalog_analytics.py).
+    """
+    if pa is None:
+        raise RuntimeError("La exportación columnar necesita pyarrow: pip install pyarrow")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato} (disponibles: {', '.join(FORMATOS)})")
+    os.makedirs(directorio, exist_ok=True)
+
+    esquema_mangas, esquema_volumenes = _esquemas()
+    mangas = _tabla(leer_registros(mangas_json), esquema_mangas)
+    volumenes = _tabla(leer_registros(volumes_json), esquema_volumenes)
+    for nombre, tabla in (("mangas", mangas), ("volumes", volumenes)):
+        _escribir(tabla, os.path.join(directorio, f"{nombre}.{formato}"), formato)
+    print(f"Exportación columnar ({formato}) guardada en {directorio}/: "
+          f"{mangas.num_rows} mangas, {volumenes.num_rows} volúmenes")
+    return mangas.num_rows, volumenes.num_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta mangas y volúmenes a Parquet o Arrow")
+    parser.add_argument("--mangas", default="mangas_detailed.jsonl", help="mangas_detailed.jsonl o .json")
+    parser.add_argument("--volumes", default="volumes_fixed.jsonl", help="volumes_fixed.jsonl o .json")
+    parser.add_argument("--salida", default=COLUMNAR_POR_DEFECTO, help="Directorio de salida")
+    parser.add_argument("--formato", choices=FORMATOS, default="parquet")
+    args = parser.parse_args()
+
+    exportar_columnar(args.mangas, args.volumes, args.salida, args.formato)
@@ -0,0 +1,335 @@
+import asyncio
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import Pagina, charset_declarado
+
+# Respuestas que indican un fallo transitorio y se reintentan
+ESTADOS_REINTENTABLES = frozenset({429, 500, 502, 503, 504})
+# Respuestas con las que el servidor pide que se vaya más despacio
+ESTADOS_SATURACION = frozenset({429, 503})
+
+
+# Cubo de fichas para limitar la tasa de peticiones a un host
+class TokenBucket:
+    """
+    Permite como máximo `tasa` peticiones por segundo, con ráfagas de hasta `capacidad`.
+    Si la tasa es None o 0 no se aplica ningún límite.
+    """
+
+    def __init__(self, tasa, capacidad=1):
+        self.tasa = tasa
+        self.capacidad = max(1, capacidad)
+        self.fichas = float(self.capacidad)
+        self.ultimo = time.monotonic()
+        # Instante (monotonic) hasta el que no se hacen peticiones, p. ej. por un Retry-After
+        self.pausa_hasta = 0.0
+        self._lock = None
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.fichas = min(self.capacidad, self.fichas + (ahora - self.ultimo) * (self.tasa or 0))
+        self.ultimo = ahora
+
+    def pausar(self, segundos):
+        self.pausa_hasta = max(self.pausa_hasta, time.monotonic() + segundos)
+
+    async def adquirir(self):
+        if not self.tasa and self.pausa_hasta <= time.monotonic():
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # El lock mantiene el orden de llegada entre las tareas que esperan
+        async with self._lock:
+            while self.pausa_hasta > time.monotonic():
+                await asyncio.sleep(self.pausa_hasta - time.monotonic())
+            if not self.tasa:
+                return
+            self._recargar()
+            while self.fichas < 1:
+                await asyncio.sleep((1 - self.fichas) / self.tasa)
+                self._recargar()
+            self.fichas -= 1
+
+
+# Control adaptativo de la tasa de un host (aumento aditivo, reducción multiplicativa)
+class ControlAdaptativo:
+    """
+    Ajusta la tasa del cubo de un host entre `tasa_min` (por defecto un octavo de la
+    inicial) y `tasa_max` según cómo responde: cada respuesta rápida sube la tasa un
+    10% de la inicial; si la latencia media supera `factor_lento` veces la mejor
+    observada, la baja un 10%; un error transitorio la baja un 25%, y un 429/503 la
+    reduce a la mitad y pausa el host lo que indique Retry-After. Sin tasa (None o 0)
+    no hay nada que ajustar, pero las pausas se siguen respetando.
+
+    Las latencias solo se toman de las respuestas completas: un 304 no trae cuerpo y
+    responde mucho antes, así que fijaría una latencia de referencia que las páginas
+    descargadas nunca alcanzan y la tasa se reduciría sin motivo. Un 304 (`latencia`
+    None) cuenta como respuesta correcta, pero no cambia las medias.
+    """
+
+    def __init__(self, cubo, tasa_max, tasa_min=None, factor_lento=2.0):
+        inicial = cubo.tasa or 0
+        self.cubo = cubo
+        self.tasa_min = inicial / 8 if tasa_min is None else tasa_min
+        self.tasa_max = max(tasa_max or inicial, inicial)
+        self.paso = inicial / 10
+        self.factor_lento = factor_lento
+        self.latencia_media = None
+        self.latencia_base = None
+
+    def _ajustar(self, tasa):
+        if self.cubo.tasa:
+            self.cubo._recargar()
+            self.cubo.tasa = min(self.tasa_max, max(self.tasa_min, tasa))
+
+    def exito(self, latencia=None):
+        if latencia is not None:
+            self.latencia_base = latencia if self.latencia_base is None else min(self.latencia_base, latencia)
+            self.latencia_media = (latencia if self.latencia_media is None
+                                   else 0.8 * self.latencia_media + 0.2 * latencia)
+        if self.latencia_media is not None and self.latencia_media > self.factor_lento * self.latencia_base:
+            self._ajustar((self.cubo.tasa or 0) * 0.9)
+        else:
+            self._ajustar((self.cubo.tasa or 0) + self.paso)
+
+    def saturacion(self, espera):
+        self._ajustar((self.cubo.tasa or 0) * 0.5)
+        self.cubo.pausar(espera)
+
+    def error(self):
+        self._ajustar((self.cubo.tasa or 0) * 0.75)
+
+
+# Presupuesto de cortesía: un cubo de fichas independiente por host
+class PresupuestoHosts:
+    """
+    La tasa de cada host empieza en `tasa` y se adapta (ver ControlAdaptativo). Con
+    `tasa_max` mayor que `tasa` puede subir hasta `tasa_max`; sin ella nunca pasa de
+    `tasa`, pero las reducciones por latencia, errores y saturación siguen aplicándose
+    y la tasa se recupera después hasta `tasa`.
+    """
+
+    def __init__(self, tasa, capacidad=1, tasa_max=None):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tasa_max = tasa_max or tasa
+        self.cubos = {}
+        self.controles = {}
+
+    def cubo(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.cubos:
+            self.cubos[host] = TokenBucket(self.tasa, self.capacidad)
+            self.controles[host] = ControlAdaptativo(self.cubos[host], self.tasa_max)
+        return self.cubos[host]
+
+    def control(self, url):
+        self.cubo(url)
+        return self.controles[urlsplit(url).netloc]
+
+    async def adquirir(self, url):
+        await self.cubo(url).adquirir()
+
+    def tasas(self):
+        """Tasa actual de cada host, para informar al terminar."""
+        return {host: cubo.tasa for host, cubo in self.cubos.items()}
+
+
+# Segundos que pide esperar la cabecera Retry-After (en segundos o como fecha HTTP), o None
+def espera_retry_after(response):
+    valor = response.headers.get("Retry-After") if response is not None else None
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+
+# Política de reintentos con espera exponencial y jitter completo
+class PoliticaReintentos:
+    """
+    Reintenta los errores de conexión, los timeouts y las respuestas 429/5xx hasta
+    `reintentos` veces. Antes del intento n se espera un tiempo aleatorio entre 0 y
+    base * 2^n (como mucho `espera_max`), o lo que pida Retry-After si es más.
+    """
+
+    def __init__(self, reintentos=3, base=0.5, espera_max=30.0):
+        self.reintentos = reintentos
+        self.base = base
+        self.espera_max = espera_max
+
+    def reintentable(self, error):
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in ESTADOS_REINTENTABLES
+
+    def espera(self, intento, error=None):
+        espera = random.uniform(0, min(self.espera_max, self.base * 2 ** intento))
+        retry_after = espera_retry_after(getattr(error, 'response', None))
+        if retry_after is not None:
+            espera = max(espera, min(retry_after, self.espera_max))
+        return espera
+
+
+# Descargar una URL de forma síncrona con la política de reintentos
+def obtener_con_reintentos(session, url, timeout=30, politica=None):
+    politica = politica or PoliticaReintentos()
+    intento = 0
+    while True:
+        try:
+            response = session.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            if intento >= politica.reintentos or not politica.reintentable(e):
+                raise
+            time.sleep(politica.espera(intento, e))
+            intento += 1
+
+
+# Crear una sesión HTTP con un pool de conexiones del tamaño de la concurrencia
+def crear_sesion(tamano_pool=10):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=tamano_pool, pool_maxsize=tamano_pool)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _obtener_pagina(session, url, timeout, cache):
+    if cache is not None:
+        return cache.obtener_pagina(session, url, timeout)
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return Pagina(response.content, charset_declarado(response), False)
+
+
+# Descargar una página respetando la concurrencia y el presupuesto del host, con reintentos
+async def _descargar_pagina(session, url, semaforo, presupuesto, timeout, cache, politica, metricas=None,
+                            errores=None):
+    control = presupuesto.control(url)
+    intento = 0
+    while True:
+        # El hueco de concurrencia se libera durante la espera entre reintentos
+        async with semaforo:
+            await presupuesto.adquirir(url)
+            # Solo se mide la petición, no la espera por la concurrencia o la tasa
+            inicio = time.perf_counter()
+            try:
+                pagina = await asyncio.to_thread(_obtener_pagina, session, url, timeout, cache)
+                error = None
+            except requests.exceptions.RequestException as e:
+                pagina, error = None, e
+            segundos = time.perf_counter() - inicio
+        if metricas is not None:
+            metricas.sumar_tiempo("descarga_paginas", segundos)
+
+        if error is None:
+            # Los 304 no cuentan para la latencia (ver ControlAdaptativo)
+            control.exito(None if pagina.no_modificado else segundos)
+            if metricas is not None:
+                if pagina.no_modificado:
+                    metricas.contar("paginas_sin_cambios")
+                else:
+                    metricas.contar("bytes_paginas", len(pagina.contenido))
+            return pagina
+
+        response = getattr(error, 'response', None)
+        espera = politica.espera(intento, error)
+        if response is not None and response.status_code in ESTADOS_SATURACION:
+            # El servidor pide ir más despacio: se frena todo el host, no solo esta URL
+            control.saturacion(espera)
+            if metricas is not None:
+                metricas.contar("respuestas_saturacion")
+        elif politica.reintentable(error):
+            control.error()
+        if intento >= politica.reintentos or not politica.reintentable(error):
+            print(f"Error al acceder a la URL {url}: {error}")
+            if metricas is not None:
+                metricas.contar("paginas_fallidas")
+            if errores is not None:
+                errores[url] = error
+            return None
+        print(f"Reintentando {url} en {espera:.1f} s ({error})")
+        if metricas is not None:
+            metricas.contar("reintentos_paginas")
+        await asyncio.sleep(espera)
+        intento += 1
+
+
+async def _rastrear(urls, manejador, concurrencia, presupuesto, session, timeout, cache, politica, metricas,
+                   errores):
+    # Cada petición y cada llamada al manejador ocupan un hilo: el ejecutor por defecto de
+    # asyncio tiene como mucho min(32, núcleos + 4), así que con uno propio se respeta
+    # `concurrencia` (las peticiones en curso, más el manejador, que es de uno en uno)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=concurrencia + 1, thread_name_prefix="rastreo"))
+    semaforo = asyncio.Semaphore(concurrencia)
+    # Ventana deslizante: limita cuántas páginas descargadas esperan a ser procesadas
+    ventana = max(1, concurrencia * 4)
+    pendientes = deque()
+    siguiente = 0
+
+    while siguiente < len(urls) or pendientes:
+        while siguiente < len(urls) and len(pendientes) < ventana:
+            tarea = asyncio.create_task(
+                _descargar_pagina(session, urls[siguiente], semaforo, presupuesto, timeout, cache, politica,
+                                  metricas, errores)
+            )
+            pendientes.append((siguiente, tarea))
+            siguiente += 1
+
+        # Entregar los resultados en el orden de entrada para que la salida sea determinista
+        indice, tarea = pendientes.popleft()
+        pagina = await tarea
+        # El manejador es síncrono; se ejecuta en un hilo para no bloquear las descargas en curso
+        await asyncio.to_thread(manejador, indice, urls[indice], pagina)
+
+
+# Función principal del motor de rastreo
+def crawl_pages(urls, manejador, concurrencia=1, tasa=1.0, capacidad=1, session=None, timeout=30,
+                cache=None, metricas=None, tasa_max=None, politica=None, errores=None):
+    """
+    Descarga las URLs con hasta `concurrencia` peticiones simultáneas y un límite de
+    `tasa` peticiones por segundo por host. Llama a `manejador(indice, url, pagina)` en el
+    mismo orden que `urls`; `pagina` es una `Pagina` con los bytes sin decodificar, o None
+    si la descarga falló. Con una `CacheHTTP` las peticiones son condicionales y
+    `pagina.no_modificado` indica que la página no ha cambiado. Con unas `metricas`
+    (ver run_metrics.py) se registran el tiempo de cada petición y los bytes recibidos.
+    Los fallos transitorios se reintentan según `politica` (PoliticaReintentos) y, con
+    `tasa_max`, la tasa de cada host se adapta a la latencia y a las respuestas 429/503
+    hasta ese máximo. Con un diccionario `errores`, se guarda en él el último error de
+    cada URL que falla (antes de llamar al manejador), p. ej. para distinguir los fallos
+    transitorios de los permanentes. Devuelve la tasa final de cada host.
+    """
+    urls = list(urls)
+    presupuesto = PresupuestoHosts(tasa, capacidad, tasa_max)
+    politica = politica or PoliticaReintentos()
+    propia = session is None
+    if propia:
+        session = crear_sesion(concurrencia)
+    try:
+        asyncio.run(_rastrear(urls, manejador, concurrencia, presupuesto, session, timeout, cache,
+                              politica, metricas, errores))
+    finally:
+        if propia:
+            session.close()
+    return presupuesto.tasas()
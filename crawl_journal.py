@@ -0,0 +1,108 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+
+# Hash del contenido de una página para detectar cambios entre ejecuciones
+def hash_contenido(html):
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    return hashlib.sha256(html).hexdigest()
+
+
+# Diario de rastreo en SQLite: registra cada colección procesada en cuanto termina
+class DiarioRastreo:
+    """
+    Guarda por URL el ID asignado, el hash de la página y el resultado del análisis.
+    Si una ejecución se interrumpe, la siguiente la reanuda saltándose las URLs ya
+    completadas; en una ejecución nueva el hash permite reutilizar el resultado de las
+    colecciones cuya página no ha cambiado.
+    """
+
+    def __init__(self, ruta="crawl_journal.sqlite"):
+        self.ruta = ruta
+        # El manejador de páginas se ejecuta en hilos distintos; el lock serializa los accesos
+        self._lock = threading.Lock()
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS ejecuciones (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                iniciada TEXT NOT NULL,
+                terminada TEXT
+            );
+            CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                manga_id INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                ejecucion INTEGER NOT NULL,
+                procesada TEXT NOT NULL,
+                resultado TEXT NOT NULL
+            );
+        """)
+        self.ejecucion = None
+
+    def iniciar_ejecucion(self, reiniciar=False):
+        """Devuelve (id de ejecución, True si se reanuda una ejecución interrumpida)."""
+        with self._lock:
+            fila = self.conexion.execute(
+                "SELECT id, terminada FROM ejecuciones ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if fila and fila[1] is None and not reiniciar:
+                self.ejecucion = fila[0]
+                return self.ejecucion, True
+            cursor = self.conexion.execute(
+                "INSERT INTO ejecuciones (iniciada) VALUES (?)", (datetime.now().isoformat(),)
+            )
+            self.conexion.commit()
+            self.ejecucion = cursor.lastrowid
+            return self.ejecucion, False
+
+    def completadas(self):
+        """URLs ya procesadas en la ejecución actual: {url: (manga_id, resultado)}."""
+        with self._lock:
+            filas = self.conexion.execute(
+                "SELECT url, manga_id, resultado FROM paginas WHERE ejecucion = ?", (self.ejecucion,)
+            ).fetchall()
+        return {url: (manga_id, json.loads(resultado)) for url, manga_id, resultado in filas}
+
+    def registro(self, url):
+        """Último registro de una URL: (manga_id, hash, resultado) o None."""
+        with self._lock:
+            fila = self.conexion.execute(
+                "SELECT manga_id, hash, resultado FROM paginas WHERE url = ?", (url,)
+            ).fetchone()
+        if fila is None:
+            return None
+        return fila[0], fila[1], json.loads(fila[2])
+
+    def registrar(self, url, manga_id, hash_pagina, resultado):
+        with self._lock:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO paginas (url, manga_id, hash, ejecucion, procesada, resultado) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, manga_id, hash_pagina, self.ejecucion, datetime.now().isoformat(),
+                 json.dumps(resultado, ensure_ascii=False)),
+            )
+            self.conexion.commit()
+
+    def reasignar_id(self, url, manga_id, resultado):
+        """Cambia el ID (y el resultado guardado) de una URL sin alterar su ejecución ni su hash."""
+        with self._lock:
+            self.conexion.execute(
+                "UPDATE paginas SET manga_id = ?, resultado = ? WHERE url = ?",
+                (manga_id, json.dumps(resultado, ensure_ascii=False), url),
+            )
+            self.conexion.commit()
+
+    def terminar_ejecucion(self):
+        with self._lock:
+            self.conexion.execute(
+                "UPDATE ejecuciones SET terminada = ? WHERE id = ?",
+                (datetime.now().isoformat(), self.ejecucion),
+            )
+            self.conexion.commit()
+
+    def cerrar(self):
+        self.conexion.close()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import shutil
+import zlib
+
+DIRECTORIO_SHARDS = "shards"
+SEGMENTO = "segmento.json"
+# Salidas de cada shard que se fusionan, en el orden de la lista de entrada
+SALIDAS = ("mangas_detailed.jsonl", "volumes.jsonl", "volumes_fixed.jsonl")
+DIRECTORIOS_IMAGENES = ("tomos", os.path.join("images", "portadas"))
+
+
+# Shard de un manga según su ID: siempre el mismo, en cualquier máquina y ejecución
+def shard_de(manga_id, shards):
+    return zlib.crc32(str(manga_id).encode('utf-8')) % shards
+
+
+# Para argparse: "2/4" -> (1, 4), el segundo de cuatro shards
+def parsear_shard(texto):
+    try:
+        numero, total = (int(parte) for parte in texto.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard no válido: {texto} (se espera N/TOTAL, p. ej. 2/4)")
+    if not 1 <= numero <= total:
+        raise argparse.ArgumentTypeError(f"Shard no válido: {texto} (N tiene que estar entre 1 y {total})")
+    return numero - 1, total
+
+
+def directorio_shard(directorio, numero, total):
+    return os.path.join(directorio, f"{numero + 1}-de-{total}")
+
+
+# Índice del segmento que escribe un shard
+class IndiceSegmento:
+    """
+    Por cada manga escrito en los JSONL del shard, su posición en la lista de entrada
+    y cuántos volúmenes tiene, en el mismo orden que los JSONL. Con esto la fusión
+    intercala las líneas tal cual, sin volver a analizar ni serializar nada. El índice
+    se guarda al terminar el shard: si no existe, el shard no terminó.
+    """
+
+    def __init__(self, numero, total, entradas):
+        self.numero = numero
+        self.total = total
+        self.entradas = entradas
+        self.posiciones = []
+        self.volumenes = []
+
+    def registrar(self, posicion, volumenes):
+        self.posiciones.append(posicion)
+        self.volumenes.append(volumenes)
+
+    def guardar(self, directorio="."):
+        ruta = os.path.join(directorio, SEGMENTO)
+        tmp = f"{ruta}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"shard": self.numero, "shards": self.total, "entradas": self.entradas,
+                       "posiciones": self.posiciones, "volumenes": self.volumenes}, f)
+        os.replace(tmp, ruta)
+
+
+def _leer_segmento(directorio):
+    ruta = os.path.join(directorio, SEGMENTO)
+    if not os.path.exists(ruta):
+        raise ValueError(f"{directorio} no tiene {SEGMENTO}: el shard no terminó")
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _comprobar_segmentos(segmentos, directorios):
+    totales = {segmento["shards"] for segmento in segmentos}
+    entradas = {segmento["entradas"] for segmento in segmentos}
+    if len(totales) != 1 or len(entradas) != 1:
+        raise ValueError("Los segmentos son de ejecuciones distintas (distinto número de shards o de entradas)")
+    total = totales.pop()
+    numeros = sorted(segmento["shard"] for segmento in segmentos)
+    if numeros != list(range(total)):
+        faltan = sorted(set(range(total)) - set(numeros))
+        raise ValueError(f"Faltan o se repiten shards: hay {[n + 1 for n in numeros]} de {total}"
+                         + (f", faltan {[n + 1 for n in faltan]}" if faltan else "")
+                         + f" ({', '.join(directorios)})")
+
+
+def _misma_imagen(ruta, otra):
+    if os.path.samefile(ruta, otra):
+        return True
+    estado, otro_estado = os.stat(ruta), os.stat(otra)
+    return estado.st_size == otro_estado.st_size and estado.st_mtime_ns == otro_estado.st_mtime_ns
+
+
+# Copiar las imágenes de un shard al destino (enlazándolas si están en el mismo disco)
+def _copiar_imagenes(origen, destino):
+    copiadas = 0
+    for subdirectorio in DIRECTORIOS_IMAGENES:
+        base = os.path.join(origen, subdirectorio)
+        for raiz, _, nombres in os.walk(base):
+            for nombre in nombres:
+                ruta = os.path.join(raiz, nombre)
+                ruta_destino = os.path.join(destino, subdirectorio, os.path.relpath(ruta, base))
+                if os.path.exists(ruta_destino) and _misma_imagen(ruta, ruta_destino):
+                    continue
+                os.makedirs(os.path.dirname(ruta_destino), exist_ok=True)
+                tmp = f"{ruta_destino}.tmp"
+                try:
+                    os.link(ruta, tmp)
+                except OSError:
+                    shutil.copy2(ruta, tmp)
+                os.replace(tmp, ruta_destino)
+                copiadas += 1
+    return copiadas
+
+
+# Fusionar los segmentos de todos los shards en los JSONL de una ejecución normal
+def fusionar_segmentos(directorios, destino=".", imagenes=True):
+    """
+    Escribe en `destino` mangas_detailed.jsonl, volumes.jsonl y volumes_fixed.jsonl
+    con los registros de todos los shards en el orden de la lista de entrada: el
+    resultado es idéntico, byte a byte, al de procesar la lista en un solo proceso.
+    Con `imagenes` se llevan también a `destino` las portadas y los tomos de cada
+    shard. Devuelve el número de mangas y de volúmenes.
+    """
+    segmentos = [_leer_segmento(directorio) for directorio in directorios]
+    _comprobar_segmentos(segmentos, directorios)
+
+    # Mangas de todos los shards ordenados por su posición en la lista de entrada
+    orden = sorted((posicion, shard, volumenes)
+                   for shard, segmento in enumerate(segmentos)
+                   for posicion, volumenes in zip(segmento["posiciones"], segmento["volumenes"]))
+
+    lectores = [[open(os.path.join(directorio, salida), 'rb') for salida in SALIDAS]
+                for directorio in directorios]
+    rutas = [os.path.join(destino, salida) for salida in SALIDAS]
+    escritores = [open(f"{ruta}.tmp", 'wb') for ruta in rutas]
+    num_volumenes = 0
+    try:
+        mangas, volumenes, volumenes_limpios = escritores
+        for _, shard, cuantos in orden:
+            lector_mangas, lector_volumenes, lector_limpios = lectores[shard]
+            mangas.write(lector_mangas.readline())
+            for _ in range(cuantos):
+                volumenes.write(lector_volumenes.readline())
+                volumenes_limpios.write(lector_limpios.readline())
+            num_volumenes += cuantos
+        for directorio, lectores_shard in zip(directorios, lectores):
+            if any(lector.read(1) for lector in lectores_shard):
+                raise ValueError(f"El segmento de {directorio} no coincide con su {SEGMENTO}")
+    finally:
+        for fichero in escritores + [lector for lectores_shard in lectores for lector in lectores_shard]:
+            fichero.close()
+    for ruta in rutas:
+        os.replace(f"{ruta}.tmp", ruta)
+    print(f"Fusionados {len(directorios)} shards: {len(orden)} mangas y {num_volumenes} volúmenes")
+
+    if imagenes:
+        copiadas = sum(_copiar_imagenes(directorio, destino) for directorio in directorios)
+        print(f"Imágenes de los shards copiadas: {copiadas}")
+    return len(orden), num_volumenes
@@ -1,54 +1,236 @@
-import os
+import argparse
 import json
-import requests
+import os
+import queue
+import threading
+from urllib.parse import quote_plus
+
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-# Cargar el JSON de mangas
-with open("mangas_filtered.json", "r", encoding="utf-8") as f:
-    mangas = json.load(f)
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Búsqueda de imágenes; {consulta} se sustituye por la consulta ya codificada. Se puede
+# apuntar a una página local que imite a la real para probar sin salir a internet
+URL_BUSQUEDA = "https://www.google.com/search?tbm=isch&q={consulta}"
+SELECTOR_MINIATURA = "img.Q4LuWd"
+SELECTOR_IMAGEN = "img.n3VNCb"
+CACHE_POR_DEFECTO = "urls_imagenes_cache.json"
+
 
 # Configurar Selenium (headless opcional)
-options = Options()
-options.add_argument("--headless")  # Puedes quitar esto si quieres ver el navegador
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-driver = webdriver.Chrome(options=options)
+def crear_driver(headless=True):
+    options = Options()
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    return webdriver.Chrome(options=options)
+
+
+# Para WebDriverWait: la URL de la imagen grande en cuanto está cargada, o False
+def _url_imagen_grande(driver):
+    for img in driver.find_elements(By.CSS_SELECTOR, SELECTOR_IMAGEN):
+        src = img.get_attribute("src")
+        if src and src.startswith("http") and "encrypted-tbn" not in src:
+            return src
+    return False
 
-# Archivo de salida
-output_file = "urls_imagenes.txt"
 
-def obtener_url_imagen_real(titulo_manga: str) -> str:
+def obtener_url_imagen_real(driver, titulo_manga, espera=10, url_busqueda=URL_BUSQUEDA):
+    """
+    Busca el título y devuelve la URL de la imagen grande del primer resultado.
+    Espera a que aparezcan la miniatura y la imagen (como mucho `espera` segundos cada
+    una) en lugar de hacer pausas fijas: si la página es rápida no se pierde tiempo.
+    Si alguna no aparece a tiempo lanza TimeoutException: una página lenta no indica
+    que el título no tenga imagen.
+    """
     query = f"manga {titulo_manga} castellano"
-    driver.get(f"https://www.google.com/search?tbm=isch&q={query}")
-    time.sleep(2)
-
-    try:
-        # Clic en la primera miniatura
-        thumbnails = driver.find_elements(By.CSS_SELECTOR, "img.Q4LuWd")
-        if thumbnails:
-            thumbnails[0].click()
-            time.sleep(2)
-
-            # Buscar imagen grande
-            images = driver.find_elements(By.CSS_SELECTOR, "img.n3VNCb")
-            for img in images:
-                src = img.get_attribute("src")
-                if src and src.startswith("http") and "encrypted-tbn" not in src:
-                    return src
-    except Exception as e:
-        print(f"⚠️ Error obteniendo imagen: {e}")
-    return None
-
-# Guardar resultados
-with open(output_file, "w", encoding="utf-8") as f_out:
-    for manga in mangas[:10]:
-        titulo = manga.get("titulo")
-        print(f" Buscando: {query}")
-
-        image_url = get_real_image_url(query)
-        if image_url:
-            f_out.write(image_url + "\n")
-            print(f" URL guardada: {image_url}")
-        else:
-            print(f" No se encontró imagen para: {titulo}")
\ No newline at end of file
+    driver.get(url_busqueda.format(consulta=quote_plus(query)))
+    # Clic en la primera miniatura
+    miniatura = WebDriverWait(driver, espera).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, SELECTOR_MINIATURA))
+    )
+    miniatura.click()
+    # Buscar imagen grande: la miniatura se sustituye por la URL real al cargarse
+    return WebDriverWait(driver, espera).until(_url_imagen_grande)
+
+
+# Caché persistente título -> URL de la imagen (None en las cachés antiguas, que guardaban así
+# los títulos cuya búsqueda agotaba el tiempo de espera)
+class CacheUrls:
+    """
+    Se guarda en JSON de forma atómica cada `guardar_cada` títulos nuevos y al cerrar,
+    así que una ejecución interrumpida no pierde lo ya resuelto.
+    """
+
+    def __init__(self, ruta=CACHE_POR_DEFECTO, guardar_cada=20):
+        self.ruta = ruta
+        self.guardar_cada = guardar_cada
+        self.urls = {}
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                self.urls = json.load(f)
+        self._sin_guardar = 0
+        self._lock = threading.Lock()
+
+    def resuelto(self, titulo, reintentar_sin_imagen=False):
+        with self._lock:
+            if titulo not in self.urls:
+                return False
+            return self.urls[titulo] is not None or not reintentar_sin_imagen
+
+    def registrar(self, titulo, url):
+        with self._lock:
+            self.urls[titulo] = url
+            self._sin_guardar += 1
+            if self._sin_guardar >= self.guardar_cada:
+                self._guardar()
+
+    def _guardar(self):
+        tmp = f"{self.ruta}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.urls, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.ruta)
+        self._sin_guardar = 0
+
+    def guardar(self):
+        with self._lock:
+            self._guardar()
+
+
+# Pool de navegadores reutilizables, uno por hilo
+class PoolNavegadores:
+    """
+    Cada trabajador abre su propio navegador una sola vez y lo reutiliza para todos los
+    títulos que le tocan. Si el navegador se cae, se abre otro y se reintenta el título.
+    """
+
+    def __init__(self, cache, trabajadores=4, headless=True, espera=10, url_busqueda=URL_BUSQUEDA):
+        self.cache = cache
+        self.trabajadores = trabajadores
+        self.headless = headless
+        self.espera = espera
+        self.url_busqueda = url_busqueda
+        self.encontradas = 0
+        self.pendientes = 0
+        self._lock = threading.Lock()
+
+    def _buscar(self, driver, titulo):
+        return obtener_url_imagen_real(driver, titulo, self.espera, self.url_busqueda)
+
+    def _trabajar(self, cola):
+        driver = None
+        try:
+            while True:
+                titulo = cola.get()
+                if titulo is None:
+                    return
+                buscado = False
+                for _ in range(2):
+                    try:
+                        if driver is None:
+                            driver = crear_driver(self.headless)
+                        url = self._buscar(driver, titulo)
+                        buscado = True
+                        break
+                    except TimeoutException:
+                        # El navegador sigue sirviendo; el título queda pendiente para otra ejecución
+                        print(f"⚠️ Tiempo de espera agotado buscando la imagen de {titulo}")
+                        break
+                    except WebDriverException as e:
+                        print(f"⚠️ Error obteniendo imagen de {titulo}: {e.msg}")
+                        if driver is not None:
+                            try:
+                                driver.quit()
+                            except WebDriverException:
+                                pass
+                        driver = None
+                if not buscado:
+                    # Sin respuesta a tiempo no se sabe si hay imagen: no se guarda en la caché
+                    with self._lock:
+                        self.pendientes += 1
+                    continue
+                self.cache.registrar(titulo, url)
+                with self._lock:
+                    self.encontradas += 1
+                print(f" URL guardada: {url}")
+        finally:
+            if driver is not None:
+                driver.quit()
+
+    def resolver(self, titulos):
+        """Busca los `titulos` en paralelo y deja el resultado de cada uno en la caché."""
+        cola = queue.Queue()
+        for titulo in titulos:
+            cola.put(titulo)
+        hilos = [threading.Thread(target=self._trabajar, args=(cola,), name=f"navegador-{n}")
+                 for n in range(min(self.trabajadores, len(titulos)))]
+        for _ in hilos:
+            cola.put(None)
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.cache.guardar()
+
+
+# Resolver las portadas de los títulos de `input_json` y guardar sus URLs
+def descubrir_portadas(input_json="mangas_filtered.json", output_file="urls_imagenes.txt", limite=None,
+                       trabajadores=4, cache_path=CACHE_POR_DEFECTO, reintentar_sin_imagen=False,
+                       headless=True, espera=10, url_busqueda=URL_BUSQUEDA):
+    """
+    Solo se buscan los títulos que no están en la caché (ni, salvo con
+    `reintentar_sin_imagen`, los que ya se buscaron sin éxito). `output_file` tiene una
+    URL por línea, en el orden de `input_json`, con todos los títulos resueltos.
+    """
+    # Cargar el JSON de mangas
+    with open(input_json, "r", encoding="utf-8") as f:
+        mangas = json.load(f)
+    if limite:
+        mangas = mangas[:limite]
+    titulos = list(dict.fromkeys(manga.get("titulo") for manga in mangas if manga.get("titulo")))
+
+    cache = CacheUrls(cache_path)
+    pendientes = [titulo for titulo in titulos if not cache.resuelto(titulo, reintentar_sin_imagen)]
+    print(f"{len(titulos)} títulos, {len(titulos) - len(pendientes)} ya resueltos en la caché, "
+          f"{len(pendientes)} por buscar con {trabajadores} navegadores")
+
+    pool = PoolNavegadores(cache, trabajadores, headless, espera, url_busqueda)
+    if pendientes:
+        pool.resolver(pendientes)
+
+    # Guardar resultados
+    guardadas = 0
+    tmp = f"{output_file}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f_out:
+        for titulo in titulos:
+            image_url = cache.urls.get(titulo)
+            if image_url:
+                f_out.write(image_url + "\n")
+                guardadas += 1
+    os.replace(tmp, output_file)
+    print(f"Encontradas {pool.encontradas}, {pool.pendientes} pendientes para la próxima ejecución; "
+          f"{guardadas} URLs guardadas en {output_file}")
+    return guardadas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca la URL de la portada de cada manga con un navegador headless")
+    parser.add_argument("input_json", nargs="?", default="mangas_filtered.json")
+    parser.add_argument("--salida", default="urls_imagenes.txt")
+    parser.add_argument("--limite", type=int, default=None, help="Número máximo de títulos")
+    parser.add_argument("--trabajadores", type=int, default=4, help="Navegadores en paralelo")
+    parser.add_argument("--cache", default=CACHE_POR_DEFECTO, help="Caché JSON título -> URL")
+    parser.add_argument("--reintentar-sin-imagen", action="store_true",
+                        help="Volver a buscar los títulos que antes no dieron resultado")
+    parser.add_argument("--espera", type=float, default=10, help="Segundos máximos de espera por elemento")
+    parser.add_argument("--url-busqueda", default=URL_BUSQUEDA,
+                        help="Plantilla de la página de búsqueda ({consulta}), p. ej. una página local de prueba")
+    parser.add_argument("--mostrar", action="store_true", help="Mostrar los navegadores (sin headless)")
+    args = parser.parse_args()
+
+    descubrir_portadas(args.input_json, args.salida, args.limite, args.trabajadores, args.cache,
+                       args.reintentar_sin_imagen, not args.mostrar, args.espera, args.url_busqueda)
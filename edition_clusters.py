@@ -0,0 +1,214 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+from collections import defaultdict
+
+from json_stream import leer_registros
+from search_index import palabras
+
+EDICIONES_POR_DEFECTO = "ediciones.json"
+
+# MinHash: PERMUTACIONES valores por firma, repartidos en BANDAS de FILAS para el LSH.
+# Dos textos con similitud de Jaccard s comparten alguna banda con probabilidad
+# 1 - (1 - s^FILAS)^BANDAS: 0.64 con s=0.5, 0.98 con s=0.7 y casi 1 por encima de 0.8
+PERMUTACIONES = 64
+BANDAS = 16
+FILAS = PERMUTACIONES // BANDAS
+
+# Similitud mínima (estimada con las firmas) para considerar dos mangas ediciones de la
+# misma obra: títulos casi iguales o la misma sinopsis, y autores compatibles
+UMBRAL_TITULO = 0.8
+UMBRAL_SINOPSIS = 0.6
+UMBRAL_AUTOR = 0.5
+
+# Lo que va entre paréntesis o corchetes suele ser la edición: "(Kanzenban)", "(2ª Parte)"...
+EDICION_RE = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+
+
+# Título sin la edición, normalizado: "¡Ah, Mi Diosa! (Tomos)" -> "ah mi diosa"
+def titulo_base(titulo):
+    return " ".join(palabras(EDICION_RE.sub(" ", titulo or ""))) or " ".join(palabras(titulo))
+
+
+# Trigramas de caracteres del título base (tolera erratas y variantes de puntuación)
+def ngramas_titulo(titulo):
+    base = titulo_base(titulo)
+    if not base:
+        return set()
+    base = f" {base} "
+    return {base[i:i + 3] for i in range(len(base) - 2)}
+
+
+# Grupos de `n` palabras seguidas de la sinopsis
+def ngramas_sinopsis(sinopsis, n=3):
+    lista = palabras(sinopsis)
+    return {" ".join(lista[i:i + n]) for i in range(len(lista) - n + 1)}
+
+
+def _hash(texto):
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+# Firmas MinHash de una sola permutación con densificación
+class MinHash:
+    """
+    En lugar de aplicar PERMUTACIONES funciones hash a cada n-grama (64 multiplicaciones
+    por n-grama; unos 170.000 n-gramas en las sinopsis de 2.000 mangas), cada n-grama se
+    calcula una vez y va al cubo `hash % k`, que guarda el mínimo de `hash // k`. Los
+    cubos que quedan vacíos (títulos cortos) copian el valor del primer cubo lleno de una
+    secuencia fija y distinta para cada cubo, así que dos firmas siguen estimando la
+    similitud de Jaccard con la fracción de posiciones iguales.
+    """
+
+    def __init__(self, permutaciones=PERMUTACIONES, semilla=1):
+        self.k = permutaciones
+        azar = random.Random(semilla)
+        self.sondeos = [[azar.randrange(permutaciones) for _ in range(4 * permutaciones)]
+                        for _ in range(permutaciones)]
+
+    def firma(self, ngramas):
+        """Un valor por cubo, o None si no hay n-gramas."""
+        if not ngramas:
+            return None
+        k = self.k
+        minimos = [None] * k
+        for ngrama in ngramas:
+            valor, cubo = divmod(_hash(ngrama), k)
+            if minimos[cubo] is None or valor < minimos[cubo]:
+                minimos[cubo] = valor
+        return tuple(valor if valor is not None else self._densificar(minimos, cubo)
+                     for cubo, valor in enumerate(minimos))
+
+    def _densificar(self, minimos, cubo):
+        for otro in self.sondeos[cubo]:
+            if minimos[otro] is not None:
+                return minimos[otro]
+        # Casi nunca: el siguiente cubo lleno en orden circular
+        for paso in range(1, self.k):
+            otro = (cubo + paso) % self.k
+            if minimos[otro] is not None:
+                return minimos[otro]
+
+
+# Fracción de posiciones iguales: estimación de la similitud de Jaccard de los conjuntos
+def similitud(firma_a, firma_b):
+    if firma_a is None or firma_b is None:
+        return 0.0
+    return sum(1 for a, b in zip(firma_a, firma_b) if a == b) / len(firma_a)
+
+
+# Índice LSH: las firmas que coinciden en alguna banda entera son candidatas a parecerse
+class IndiceLSH:
+    def __init__(self, bandas=BANDAS, filas=FILAS):
+        self.bandas = bandas
+        self.filas = filas
+        self.cubetas = defaultdict(list)
+
+    def insertar(self, clave, firma):
+        if firma is None:
+            return
+        for banda in range(self.bandas):
+            inicio = banda * self.filas
+            self.cubetas[(banda, firma[inicio:inicio + self.filas])].append(clave)
+
+    def candidatos(self):
+        """Pares (a, b) con a < b que comparten al menos una cubeta."""
+        pares = set()
+        for claves in self.cubetas.values():
+            for i, a in enumerate(claves):
+                for b in claves[i + 1:]:
+                    pares.add((a, b) if a < b else (b, a))
+        return pares
+
+
+def autores_compatibles(autor_a, autor_b, umbral=UMBRAL_AUTOR):
+    """Sin autor en alguno de los dos, o compartiendo al menos `umbral` de las palabras del más corto."""
+    palabras_a, palabras_b = set(palabras(autor_a)), set(palabras(autor_b))
+    if not palabras_a or not palabras_b:
+        return True
+    return len(palabras_a & palabras_b) / min(len(palabras_a), len(palabras_b)) >= umbral
+
+
+# Agrupar en obras los mangas que son ediciones de lo mismo
+def agrupar_ediciones(mangas, umbral_titulo=UMBRAL_TITULO, umbral_sinopsis=UMBRAL_SINOPSIS):
+    """
+    Devuelve {id del manga: work_id}, donde work_id es el menor ID de los mangas de su
+    obra. En lugar de comparar todos los pares (O(n²)), cada manga tiene una firma
+    MinHash del título y otra de la sinopsis, y solo se comparan los pares que el LSH
+    pone en la misma cubeta. Dos mangas son de la misma obra si sus autores son
+    compatibles y sus títulos (sin lo que va entre paréntesis) o sus sinopsis se
+    parecen lo suficiente; los grupos se cierran por transitividad.
+    """
+    minhash = MinHash()
+    ids, autores, firmas_titulo, firmas_sinopsis = [], [], [], []
+    lsh_titulo, lsh_sinopsis = IndiceLSH(), IndiceLSH()
+    for posicion, manga in enumerate(mangas):
+        ids.append(manga["id"])
+        autores.append(manga.get("autor"))
+        firmas_titulo.append(minhash.firma(ngramas_titulo(manga.get("titulo"))))
+        firmas_sinopsis.append(minhash.firma(ngramas_sinopsis(manga.get("sinopsis"))))
+        lsh_titulo.insertar(posicion, firmas_titulo[-1])
+        lsh_sinopsis.insertar(posicion, firmas_sinopsis[-1])
+
+    padres = list(range(len(ids)))
+
+    def raiz(posicion):
+        while padres[posicion] != posicion:
+            padres[posicion] = padres[padres[posicion]]
+            posicion = padres[posicion]
+        return posicion
+
+    for a, b in lsh_titulo.candidatos() | lsh_sinopsis.candidatos():
+        if not autores_compatibles(autores[a], autores[b]):
+            continue
+        if (similitud(firmas_titulo[a], firmas_titulo[b]) >= umbral_titulo
+                or similitud(firmas_sinopsis[a], firmas_sinopsis[b]) >= umbral_sinopsis):
+            padres[raiz(a)] = raiz(b)
+
+    work_ids = {}
+    for posicion, manga_id in enumerate(ids):
+        grupo = raiz(posicion)
+        work_ids[grupo] = min(work_ids.get(grupo, manga_id), manga_id)
+    return {manga_id: work_ids[raiz(posicion)] for posicion, manga_id in enumerate(ids)}
+
+
+# Generar el índice de ediciones que sirve el backend
+def generar_ediciones(mangas_json="mangas_detailed.jsonl", ruta_salida=EDICIONES_POR_DEFECTO):
+    """
+    Guarda un JSON con `work_id` (el work_id de cada manga) y `obras` (los IDs de cada
+    obra con más de una edición, ordenados), para mostrar "otras ediciones" con dos
+    consultas de diccionario (ver otras_ediciones).
+    """
+    work_id = agrupar_ediciones(leer_registros(mangas_json))
+    obras = defaultdict(list)
+    for manga_id, obra in work_id.items():
+        obras[obra].append(manga_id)
+    obras = {str(obra): sorted(miembros) for obra, miembros in sorted(obras.items()) if len(miembros) > 1}
+
+    tmp = f"{ruta_salida}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"work_id": {str(manga_id): obra for manga_id, obra in work_id.items()}, "obras": obras},
+                  f, ensure_ascii=False)
+    os.replace(tmp, ruta_salida)
+    print(f"Índice de ediciones guardado en {ruta_salida}: {len(obras)} obras con varias ediciones "
+          f"({sum(len(miembros) for miembros in obras.values())} de {len(work_id)} mangas)")
+    return obras
+
+
+# IDs de las demás ediciones de un manga según el índice de generar_ediciones
+def otras_ediciones(indice, manga_id):
+    obra = indice["work_id"].get(str(manga_id))
+    return [otro for otro in indice["obras"].get(str(obra), []) if otro != manga_id]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agrupa en obras las ediciones de un mismo manga (MinHash/LSH)")
+    parser.add_argument("mangas_json", nargs="?", default="mangas_detailed.jsonl",
+                        help="mangas_detailed.jsonl o .json")
+    parser.add_argument("--salida", default=EDICIONES_POR_DEFECTO)
+    args = parser.parse_args()
+
+    generar_ediciones(args.mangas_json, args.salida)
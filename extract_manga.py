@@ -5,7 +5,9 @@ import time
 import os
 import re
 from datetime import datetime
-import shutil
+
+from image_downloader import ImageDownloader
+from tomos_archive import actualizar_archivo
 
 # Función para extraer detalles de un manga individual
 def extract_manga_details(url, manga_id):
@@ -200,24 +202,6 @@ def extract_manga_details(url, manga_id):
         "portada_url": portada_url
     }
 
-# Función para descargar imagen
-def download_image(url, save_path):
-    try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        # Crear directorio si no existe
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        
-        with open(save_path, 'wb') as out_file:
-            shutil.copyfileobj(response.raw, out_file)
-        
-        print(f"Imagen descargada: {save_path}")
-        return True
-    except Exception as e:
-        print(f"Error al descargar imagen {url}: {e}")
-        return False
-
 # Función principal para procesar todos los mangas
 def process_mangas(input_json_path, limit):
     # Crear directorios necesarios
@@ -236,6 +220,9 @@ def process_mangas(input_json_path, limit):
     mangas_data = []
     volumes_data = []
     
+    # Etapa de descarga de imágenes en paralelo, alimentada mediante una cola acotada
+    downloader = ImageDownloader()
+    
     # Procesar cada manga
     for i, manga in enumerate(mangas_list, 1):
         print(f"Procesando manga {i}/{len(mangas_list)}: {manga['manga']}")
@@ -259,21 +246,21 @@ def process_mangas(input_json_path, limit):
             # Descargar imagen de portada
             if result['portada_url']:
                 portada_path = f"images/portadas/{i}.jpg"
-                download_image(result['portada_url'], portada_path)
+                downloader.encolar(result['portada_url'], portada_path)
             
             # Descargar imágenes de volúmenes
             for manga_id, volume_num, img_url in result['image_urls']:
                 if img_url:
-                    # Crear directorio para las imágenes de este manga
-                    os.makedirs(f"tomos/{manga_id}", exist_ok=True)
-                    
-                    # Descargar imagen
+                    # Descargar imagen (el directorio se crea al guardarla)
                     volume_img_path = f"tomos/{manga_id}/{volume_num}.jpg"
-                    download_image(img_url, volume_img_path)
+                    downloader.encolar(img_url, volume_img_path)
         
         # Pausa para no sobrecargar el servidor
         time.sleep(1)
     
+    # Esperar a que terminen las descargas de imágenes pendientes
+    downloader.cerrar()
+    
     # Guardar datos de mangas en JSON
     with open('mangas_detailed.json', 'w', encoding='utf-8') as f:
         json.dump(mangas_data, f, ensure_ascii=False, indent=2)
@@ -282,10 +269,9 @@ def process_mangas(input_json_path, limit):
     with open('volumes.json', 'w', encoding='utf-8') as f:
         json.dump(volumes_data, f, ensure_ascii=False, indent=2)
     
-    # Crear archivo ZIP con imágenes de volúmenes
+    # Actualizar el ZIP con imágenes de volúmenes
     if os.path.exists('tomos') and os.listdir('tomos'):
-        shutil.make_archive('tomos', 'zip', 'tomos')
-        print("Archivo ZIP de imágenes creado: tomos.zip")
+        actualizar_archivo('tomos', 'tomos.zip')
     else:
         print("No se creó archivo ZIP porque no hay imágenes de volúmenes")
     
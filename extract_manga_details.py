@@ -1,164 +1,219 @@
+import argparse
 import requests
-from bs4 import BeautifulSoup
 import json
-import time
 import os
 import re
-from datetime import datetime
 import shutil
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+from functools import partial
+from collections import deque
+import multiprocessing
+from multiprocessing import Process
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+from catalog_aggregates import AGREGADOS_POR_DEFECTO, generar_agregados
+from catalog_export import CATALOGO_POR_DEFECTO, exportar_catalogo
+from columnar_export import COLUMNAR_POR_DEFECTO, exportar_columnar
+from crawl_async import PoliticaReintentos, crawl_pages, obtener_con_reintentos
+from crawl_journal import DiarioRastreo, hash_contenido
+from crawl_shards import (DIRECTORIO_SHARDS, SEGMENTO, IndiceSegmento, directorio_shard, fusionar_segmentos,
+                          parsear_shard, shard_de)
+from edition_clusters import EDICIONES_POR_DEFECTO, generar_ediciones
+from html_archive import ArchivoHTML
+from html_landmarks import IndiceHitos, buscar_marcador
+from html_parser import BACKEND_POR_DEFECTO, BACKENDS, crear_soup
+from http_cache import CacheHTTP, charset_declarado
+from image_downloader import ImageDownloader
+from image_store import AlmacenImagenes
+from image_variants import procesar_imagenes, rutas_imagenes
+from json_stream import EscritorJSONL, jsonl_a_json
+from manga_ids import MAPA_POR_DEFECTO, asignar_ids, fusionar_mapas
+from run_metrics import INFORME_POR_DEFECTO, Metricas, Progreso, cronometro, perfilar
+from search_index import INDICE_POR_DEFECTO, construir_indice
+from tomos_archive import actualizar_archivo
+
+# Marcador que precede al título del tomo dentro de la celda del volumen
+MARCADOR_TITULO = '<div style="height: 8px"></div>'
+
+# Reglas de respaldo para los títulos sin <br>, en orden de prioridad: (patrón, grupo del número)
+# El título limpio es el texto anterior a la coincidencia + el prefijo ("nº", "Vol. "...) + el número
+REGLAS_TITULO = [
+    # Número y páginas juntos: el volumen son las cifras que preceden a las 3 de las páginas
+    # (ej: "nº1192 páginas", "nº10192 páginas", "nº100192 páginas")
+    (re.compile(r'(nº\s*)(\d{1,3})(\d{3})(\s*páginas)'), 2),
+    # Número y páginas separados (ej: "nº1 192 páginas")
+    (re.compile(r'(nº\s*)(\d+)(\s+\d+\s*páginas)'), 2),
+    # Otros patrones comunes ("nº" o "n°")
+    (re.compile(r'(n[°º]\s*)(\d+)'), 2),
+    # Otros formatos (#, Vol.)
+    (re.compile(r'(?:#|[Vv]ol\.)\s*(\d+)'), 1),
+]
+# Información adicional que se elimina si no se reconoce ningún patrón
+RESTO_TITULO_RE = re.compile(r'\d+\s*páginas|\d+\s*€|en\s+B\/N|\d+,\d+\s*€')
+ESPACIO_COMA_RE = re.compile(r'\s+,')
 
 # Función mejorada para limpiar títulos de volúmenes
 def limpiar_titulo_html_mejorado(original_title):
     """
     Función mejorada que utiliza la estructura HTML para separar el título del número de páginas.
     Busca el carácter "nº" y, si existe, divide por el siguiente <br> después de ese carácter.
+    Si no hay HTML que ayude, aplica las reglas de REGLAS_TITULO en orden.
     """
-    # Si hay un <br> en el título, podemos usar eso para separar
-    if '<div style="height: 8px"></div>' and 'páginas' in original_title:
-        marcador_inicio = '<div style="height: 8px"></div>'
-        indice_inicio = original_title.find(marcador_inicio)
-        subcadena = original_title[indice_inicio + len(marcador_inicio):]
-
-        indice_inicio = subcadena.find('página')
-        subcadena2 = subcadena[:indice_inicio]
-        partes = subcadena2.split('<br/>')
-
-        titulo = ' '.join(partes[:-1])
-        return titulo
+    # Celdas con el número de páginas: el título va tras el marcador, hasta la línea de páginas
+    if 'páginas' in original_title:
+        # Si no hay marcador, find devuelve -1 y se corta igualmente a partir de esa posición
+        indice_inicio = original_title.find(MARCADOR_TITULO)
+        subcadena = original_title[indice_inicio + len(MARCADOR_TITULO):]
+        subcadena = subcadena[:subcadena.find('página')]
+        return ' '.join(subcadena.split('<br/>')[:-1])
     
     if '<br>' in original_title:
-        # Buscar el carácter "nº"
-        if 'nº' in original_title:
-            # Encontrar la posición de "nº"
-            pos_num = original_title.find('nº')
-            # Buscar el siguiente <br> después de "nº"
+        # Si hay "nº" y un <br> después, el título llega hasta ese <br>
+        pos_num = original_title.find('nº')
+        if pos_num != -1:
             pos_br = original_title.find('<br>', pos_num)
-            
             if pos_br != -1:
-                # Extraer el título hasta el <br> después de "nº"
-                clean_title = original_title[:pos_br].strip()
-                return clean_title
-        
-        # Si no hay "nº" o no hay <br> después de "nº", dividir por el primer <br>
-        parts = original_title.split('<br>', 1)
-        clean_title = parts[0].strip()
-        return clean_title
-    
-    # Si no hay <br>, usar las expresiones regulares como respaldo
-    # Caso para volúmenes con número y páginas juntos (ej: "nº1192 páginas")
-    match = re.search(r'(nº\s*)(\d{1})(\d{3})(\s*páginas)', original_title)
-    if match:
-        # Volumen de 1 dígito seguido de 3 dígitos (páginas)
-        prefix = match.group(1)  # "nº"
-        volume_number = match.group(2)  # Número del volumen (1 dígito)
-        
-        # Construir el título limpio
-        parts = original_title.split(match.group(0), 1)
-        base_title = parts[0].strip()
-        clean_title = f"{base_title} {prefix}{volume_number}"
-        return clean_title
-    
-    # Caso para volúmenes de 2 dígitos (ej: "nº10192 páginas")
-    match = re.search(r'(nº\s*)(\d{2})(\d{3})(\s*páginas)', original_title)
-    if match:
-        # Volumen de 2 dígitos seguido de 3 dígitos (páginas)
-        prefix = match.group(1)  # "nº"
-        volume_number = match.group(2)  # Número del volumen (2 dígitos)
-        
-        # Construir el título limpio
-        parts = original_title.split(match.group(0), 1)
-        base_title = parts[0].strip()
-        clean_title = f"{base_title} {prefix}{volume_number}"
-        return clean_title
-    
-    # Caso para volúmenes de 3 dígitos (ej: "nº100192 páginas")
-    match = re.search(r'(nº\s*)(\d{3})(\d{3})(\s*páginas)', original_title)
-    if match:
-        # Volumen de 3 dígitos seguido de 3 dígitos (páginas)
-        prefix = match.group(1)  # "nº"
-        volume_number = match.group(2)  # Número del volumen (3 dígitos)
-        
-        # Construir el título limpio
-        parts = original_title.split(match.group(0), 1)
-        base_title = parts[0].strip()
-        clean_title = f"{base_title} {prefix}{volume_number}"
-        return clean_title
-    
-    # Caso para volúmenes con formato diferente (ej: "nº1 192 páginas")
-    match = re.search(r'(nº\s*)(\d+)(\s+\d+\s*páginas)', original_title)
-    if match:
-        prefix = match.group(1)  # "nº"
-        volume_number = match.group(2)  # Número del volumen
-        
-        # Construir el título limpio
-        parts = original_title.split(match.group(0), 1)
-        base_title = parts[0].strip()
-        clean_title = f"{base_title} {prefix}{volume_number}"
-        return clean_title
-    
-    # Intentar con otros patrones comunes si no encontramos los patrones específicos
-    match = re.search(r'(n[°º]\s*)(\d+)', original_title)
-    if match:
-        prefix = match.group(1)  # "nº" o "n°"
-        volume_number = match.group(2)  # Número del volumen
+                return original_title[:pos_br].strip()
         
-        # Construir el título limpio
-        parts = original_title.split(match.group(0), 1)
-        base_title = parts[0].strip()
-        clean_title = f"{base_title} {prefix}{volume_number}"
-        return clean_title
-    
-    # Otros formatos (Vol., #, etc.)
-    match = re.search(r'(#\s*(\d+)|[Vv]ol\.\s*(\d+))', original_title)
-    if match:
-        # Determinar qué grupo capturó el número
-        volume_number = None
-        for group_index in range(2, 4):
-            if match.group(group_index):
-                volume_number = match.group(group_index)
-                break
-        
-        prefix_text = match.group(1).split(volume_number)[0]
-        
-        # Dividir el título en la parte base
-        parts = original_title.split(match.group(1), 1)
-        base_title = parts[0].strip()
-        
-        # Construir el título limpio
-        clean_title = f"{base_title} {prefix_text}{volume_number}"
-        return clean_title
+        # Si no, dividir por el primer <br>
+        return original_title.split('<br>', 1)[0].strip()
+    
+    # Si no hay <br>, usar las reglas como respaldo (la primera que coincida)
+    for patron, grupo_numero in REGLAS_TITULO:
+        match = patron.search(original_title)
+        if match:
+            base_title = original_title[:match.start()].strip()
+            prefijo = original_title[match.start():match.start(grupo_numero)]
+            return f"{base_title} {prefijo}{match.group(grupo_numero)}"
     
     # Si no encontramos ningún patrón conocido, simplemente eliminar información adicional
-    clean_title = re.sub(r'\d+\s*páginas|\d+\s*€|en\s+B\/N|\d+,\d+\s*€', '', original_title)
-    clean_title = re.sub(r'\s+,', ',', clean_title)  # Eliminar espacios antes de comas
+    clean_title = RESTO_TITULO_RE.sub('', original_title)
+    clean_title = ESPACIO_COMA_RE.sub(',', clean_title)  # Eliminar espacios antes de comas
     return clean_title.strip()
 
 # Función para extraer detalles de un manga individual
 def extract_manga_details(url, manga_id):
-    print(f"Extrayendo detalles del manga ID {manga_id}: {url}")
-    
     # Realizar la solicitud HTTP
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        response = obtener_con_reintentos(requests, url)
     except requests.exceptions.RequestException as e:
         print(f"Error al acceder a la URL {url}: {e}")
         return None
     
-    # Parsear el contenido HTML
-    soup = BeautifulSoup(response.text, 'html.parser')
+    return parse_manga_details(response.content, manga_id, url, charset_declarado(response))
+
+# Patrones usados al extraer los volúmenes
+FECHA_RE = re.compile(r'\w+ \d{4}')
+AMAZON_RE = re.compile("amazon")
+
+# Páginas que el rastreo avanza como mucho antes de volver a pedir una página aplazada:
+# hasta entonces los resultados posteriores esperan en memoria para escribirse en orden
+APLAZAMIENTO_MAXIMO = 200
+
+# Función para extraer los volúmenes de una colección en un único recorrido del documento
+def extract_volumes(soup, manga_id, url="", indice=None):
+    """
+    Recorre las imágenes del documento una sola vez, en orden, y genera un volumen por
+    cada celda <td> que contiene la portada de un tomo. Las tablas anidadas ya no hacen
+    que la misma celda se visite (y se cuente) varias veces. Con un `indice`
+    (IndiceHitos) las imágenes salen de él en lugar de buscarlas en el árbol.
+    Devuelve una lista de tuplas (volumen, url_imagen).
+    """
+    volumes_data = []
+    celdas_vistas = set()
+    volume_number = 1
+    imagenes = indice.imagenes_vigentes() if indice is not None else soup.find_all('img')
+    
+    for img_tag in imagenes:
+        # Verificar si esta imagen pertenece a un volumen
+        parent_td = img_tag.find_parent('td')
+        if parent_td is None or id(parent_td) in celdas_vistas:
+            continue
+        celdas_vistas.add(id(parent_td))
+        
+        # Extraer texto completo de la celda (una sola vez por celda)
+        texto = parent_td.text
+        if not texto or not ('páginas' in texto or 'nº' in texto.lower()):
+            continue
+        
+        volume = {
+            "id_manga": manga_id,
+            "numero": volume_number,
+            "titulo": "",
+            "fecha": "",
+            "imagen": f"tomos/{manga_id}/{volume_number}.jpg",  # Formato de ruta local
+            "amazon_link": ""
+        }
+        
+        text_lines = [line.strip() for line in texto.strip().split('\n') if line.strip()]
+        
+        # Extraer título del volumen (primera línea del texto)
+        if text_lines:
+            # Preservar el HTML para la limpieza posterior
+            volume["titulo"] = str(parent_td)
+        
+        # Enlaces de la celda: del índice si lo hay (mismo criterio que find('a', string=...))
+        enlaces = indice.enlaces(parent_td) if indice is not None else None
+        
+        # Extraer fecha (buscar enlace con fecha o última línea)
+        if enlaces is not None:
+            fecha_element = next((a for a in enlaces if a.string is not None and FECHA_RE.search(a.string)), None)
+        else:
+            fecha_element = parent_td.find('a', string=FECHA_RE)
+        if fecha_element:
+            volume["fecha"] = fecha_element.text.strip()
+        elif len(text_lines) > 1:
+            # Buscar un patrón de fecha en las líneas de texto
+            for line in text_lines:
+                if FECHA_RE.search(line):
+                    volume["fecha"] = line
+                    break
+            # Si no se encontró, usar la última línea
+            if not volume["fecha"]:
+                volume["fecha"] = text_lines[-1]
+        
+        # Extraer imagen URL para descargar (pero no para el JSON)
+        img_url = ""
+        if img_tag.get('src'):
+            img_url = img_tag['src']
+            if not img_url.startswith('http'):
+                # Resolver rutas relativas respecto a la página de la colección
+                img_url = urljoin(url or "https://www.listadomanga.es/", img_url)
+        
+        # Extraer enlace de Amazon si existe
+        if enlaces is not None:
+            amazon_link = next((a for a in enlaces if AMAZON_RE.search(a.get('href') or "")), None)
+        else:
+            amazon_link = parent_td.find('a', href=AMAZON_RE)
+        if amazon_link:
+            volume["amazon_link"] = amazon_link['href']
+        
+        volumes_data.append((volume, img_url))
+        volume_number += 1
     
-    # Extraer título
+    return volumes_data
+
+# Extraer título
+def extract_titulo(soup, indice=None):
     titulo = ""
-    titulo_element = soup.select_one('h2')
+    titulo_element = indice.primer_h2() if indice is not None else soup.select_one('h2')
     if titulo_element:
         titulo = titulo_element.text.strip()
-    
-    # Extraer sinopsis - Método mejorado
+    return titulo
+
+# Extraer sinopsis - Método mejorado
+def extract_sinopsis(soup, tiempos=None, indice=None):
+    """
+    Ojo: elimina del árbol los <h2>/<hr> del bloque de la sinopsis. Con `tiempos` se
+    acumula aparte lo que cuesta el método alternativo ("sinopsis_alternativa").
+    """
     sinopsis = ""
     # Buscar específicamente "Sinopsis de [título del manga]"
     sinopsis_header = None
-    for header in soup.find_all('h2'):
+    for header in (indice.encabezados() if indice is not None else soup.find_all('h2')):
         if "Sinopsis de" in header.text:
             sinopsis_header = header
             break
@@ -174,23 +229,32 @@ def extract_manga_details(url, manga_id):
     
     # Si no se encontró con el método anterior, buscar después de "Números editados"
     if not sinopsis:
-        numeros_editados = soup.find(string=re.compile("Números editados", re.IGNORECASE))
-        if numeros_editados and numeros_editados.find_parent('table'):
-            numeros_table = numeros_editados.find_parent('table').find_parent('table').find_parent('table')
-            if numeros_table and numeros_table.find_next_sibling('table'):
-                sinopsis_table = numeros_table.find_next_sibling('table').find_next_sibling('table')
-                if sinopsis_table:
-                    sinopsis_text = sinopsis_table.find('td')
-                    if sinopsis_text:
-                        # Eliminar el título y la línea horizontal si existen
-                        for element in sinopsis_text.find_all(['h2', 'hr']):
-                            element.decompose()
-                        sinopsis = sinopsis_text.text.strip()
-    
-    # Extraer autor
+        with cronometro(tiempos, "sinopsis_alternativa"):
+            sinopsis = _sinopsis_tras_numeros_editados(soup, indice)
+    return sinopsis
+
+def _sinopsis_tras_numeros_editados(soup, indice=None):
+    """Método alternativo: la tabla que sigue a la de "Números editados"."""
+    sinopsis = ""
+    numeros_editados = buscar_marcador(soup, "numeros_editados", indice)
+    if numeros_editados and numeros_editados.find_parent('table'):
+        numeros_table = numeros_editados.find_parent('table').find_parent('table').find_parent('table')
+        if numeros_table and numeros_table.find_next_sibling('table'):
+            sinopsis_table = numeros_table.find_next_sibling('table').find_next_sibling('table')
+            if sinopsis_table:
+                sinopsis_text = sinopsis_table.find('td')
+                if sinopsis_text:
+                    # Eliminar el título y la línea horizontal si existen
+                    for element in sinopsis_text.find_all(['h2', 'hr']):
+                        element.decompose()
+                    sinopsis = sinopsis_text.text.strip()
+    return sinopsis
+
+# Extraer autor
+def extract_autor(soup, indice=None):
     autor = ""
     # Buscar primero en "Guion"
-    guion_label = soup.find(string=re.compile("Guion:", re.IGNORECASE))
+    guion_label = buscar_marcador(soup, "guion", indice)
     if guion_label and guion_label.find_next():
         autor_element = guion_label.find_next('a')
         if autor_element:
@@ -198,75 +262,42 @@ def extract_manga_details(url, manga_id):
     
     # Si no se encuentra en Guion, buscar en Dibujo
     if not autor:
-        dibujo_label = soup.find(string=re.compile("Dibujo:", re.IGNORECASE))
+        dibujo_label = buscar_marcador(soup, "dibujo", indice)
         if dibujo_label and dibujo_label.find_next():
             autor_element = dibujo_label.find_next('a')
             if autor_element:
                 autor = autor_element.text.strip()
+    return autor
+
+# Función para extraer los detalles de un manga a partir del HTML ya descargado
+def parse_manga_details(html, manga_id, url="", encoding=None, backend=None, tiempos=None):
+    """
+    `html` puede ser bytes (tal como llega del servidor) o str. `backend` elige el parser
+    (ver html_parser.BACKENDS); por defecto html.parser. Con un diccionario
+    `tiempos` se acumulan en él los segundos de cada etapa del análisis.
+    """
+    print(f"Extrayendo detalles del manga ID {manga_id}: {url}")
+    
+    # Parsear el contenido HTML
+    with cronometro(tiempos, "parseo_html"):
+        soup = crear_soup(html, backend, encoding)
+    
+    # Un solo recorrido del árbol para localizar encabezados, marcadores e imágenes
+    with cronometro(tiempos, "hitos"):
+        indice = IndiceHitos(soup)
+    
+    titulo = extract_titulo(soup, indice)
+    with cronometro(tiempos, "sinopsis"):
+        sinopsis = extract_sinopsis(soup, tiempos, indice)
+    autor = extract_autor(soup, indice)
     
     # Extraer volúmenes
     volumes_data = []
     
     # Buscar en "Números editados"
-    numeros_editados = soup.find(string=re.compile("Números editados", re.IGNORECASE))
-    if numeros_editados:
-        # Buscar todas las tablas que contienen imágenes (volúmenes)
-        all_tables = soup.find_all('table')
-        volume_number = 1
-        
-        for table in all_tables:
-            # Buscar imágenes dentro de la tabla
-            img_tags = table.find_all('img')
-            for img_tag in img_tags:
-                # Verificar si esta imagen pertenece a un volumen
-                parent_td = img_tag.find_parent('td')
-                if parent_td and parent_td.text and ('páginas' in parent_td.text or 'nº' in parent_td.text.lower()):
-                    volume = {
-                        "id_manga": manga_id,
-                        "numero": volume_number,
-                        "titulo": "",
-                        "fecha": "",
-                        "imagen": f"tomos/{manga_id}/{volume_number}.jpg",  # Formato de ruta local
-                        "amazon_link": ""
-                    }
-                    
-                    # Extraer texto completo de la celda
-                    cell_text = parent_td.text.strip()
-                    text_lines = [line.strip() for line in cell_text.split('\n') if line.strip()]
-                    
-                    # Extraer título del volumen (primera línea del texto)
-                    if text_lines:
-                        # Preservar el HTML para la limpieza posterior
-                        volume["titulo"] = str(parent_td)
-                    
-                    # Extraer fecha (buscar enlace con fecha o última línea)
-                    fecha_element = parent_td.find('a', string=re.compile(r'\w+ \d{4}'))
-                    if fecha_element:
-                        volume["fecha"] = fecha_element.text.strip()
-                    elif len(text_lines) > 1:
-                        # Buscar un patrón de fecha en las líneas de texto
-                        for line in text_lines:
-                            if re.search(r'\w+ \d{4}', line):
-                                volume["fecha"] = line
-                                break
-                        # Si no se encontró, usar la última línea
-                        if not volume["fecha"] and len(text_lines) > 1:
-                            volume["fecha"] = text_lines[-1]
-                    
-                    # Extraer imagen URL para descargar (pero no para el JSON)
-                    img_url = ""
-                    if img_tag.get('src'):
-                        img_url = img_tag['src']
-                        if not img_url.startswith('http'):
-                            img_url = f"https://www.listadomanga.es/{img_url}"
-                    
-                    # Extraer enlace de Amazon si existe
-                    amazon_link = parent_td.find('a', href=re.compile("amazon"))
-                    if amazon_link:
-                        volume["amazon_link"] = amazon_link['href']
-                    
-                    volumes_data.append((volume, img_url))
-                    volume_number += 1
+    with cronometro(tiempos, "volumenes"):
+        if indice.marcador("numeros_editados"):
+            volumes_data = extract_volumes(soup, manga_id, url, indice)
     
     # Extraer número de volúmenes
     volumenes = len(volumes_data)
@@ -327,29 +358,126 @@ def extract_manga_details(url, manga_id):
         "portada_url": portada_url
     }
 
-# Función para descargar imagen
-def download_image(url, save_path):
-    try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        # Crear directorio si no existe
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        
-        with open(save_path, 'wb') as out_file:
-            shutil.copyfileobj(response.raw, out_file)
-        
-        print(f"Imagen descargada: {save_path}")
-        return True
-    except Exception as e:
-        print(f"Error al descargar imagen {url}: {e}")
-        return False
+# Análisis en un proceso del pool: devuelve también los tiempos de sus etapas
+def analizar_con_tiempos(html, manga_id, url="", encoding=None, backend=None):
+    tiempos = {}
+    with cronometro(tiempos, "analisis"):
+        result = parse_manga_details(html, manga_id, url, encoding, backend, tiempos)
+    return result, tiempos
+
+# JSON y ficheros derivados de los JSONL (al final de una ejecución o de la fusión de shards)
+def generar_derivados(metricas, envolver_json=True, catalogo=CATALOGO_POR_DEFECTO,
+                      indice_busqueda=INDICE_POR_DEFECTO, agregados=AGREGADOS_POR_DEFECTO,
+                      ediciones=EDICIONES_POR_DEFECTO, columnar=None):
+    # Generar los JSON de siempre a partir de los JSONL, sin cargarlos en memoria
+    if envolver_json:
+        with metricas.medir("json"):
+            jsonl_a_json('mangas_detailed.jsonl', 'mangas_detailed.json')
+            jsonl_a_json('volumes.jsonl', 'volumes.json')
+            jsonl_a_json('volumes_fixed.jsonl', 'volumes_fixed.json')
+        print("Títulos de volúmenes limpiados con enfoque HTML mejorado y guardados en volumes_fixed.json")
+    
+    # Catálogo, índice de búsqueda y agregados para que el backend no tenga que recorrer los JSON
+    if catalogo:
+        with metricas.medir("catalogo"):
+            exportar_catalogo('mangas_detailed.jsonl', 'volumes_fixed.jsonl', catalogo)
+    if indice_busqueda:
+        with metricas.medir("indice_busqueda"):
+            construir_indice('mangas_detailed.jsonl', indice_busqueda)
+    if agregados:
+        with metricas.medir("agregados"):
+            generar_agregados('mangas_detailed.jsonl', agregados)
+    if ediciones:
+        with metricas.medir("ediciones"):
+            generar_ediciones('mangas_detailed.jsonl', ediciones)
+    if columnar:
+        with metricas.medir("columnar"):
+            exportar_columnar('mangas_detailed.jsonl', 'volumes_fixed.jsonl', columnar)
+
+# Variantes de las imágenes y ZIP de los tomos
+def generar_imagenes(metricas, offline=False, variantes=False, procesos=1, fragmentos_zip=1):
+    # Generar variantes reducidas de las imágenes descargadas para el frontend
+    if variantes and not offline:
+        with metricas.medir("variantes"):
+            procesar_imagenes(rutas_imagenes('mangas_detailed.jsonl', 'volumes.jsonl'),
+                              procesos=procesos if procesos > 1 else None)
+    
+    # Actualizar el ZIP con imágenes de volúmenes (sin conexión no hay imágenes nuevas)
+    if not offline:
+        if os.path.exists('tomos') and os.listdir('tomos'):
+            with metricas.medir("zip"):
+                actualizar_archivo('tomos', 'tomos.zip', fragmentos=fragmentos_zip)
+        else:
+            print("No se creó archivo ZIP porque no hay imágenes de volúmenes")
 
 # Función principal para procesar todos los mangas
-def process_mangas(input_json_path, limit=None):
+def process_mangas(input_json_path, limit=None, concurrencia=1, tasa=1.0, hilos_imagenes=8,
+                   cache_dir=".cache_http", diario_path="crawl_journal.sqlite", solo_cambios=False,
+                   reiniciar=False, parser=None, procesos=1, archivo_dir=None, offline=False,
+                   envolver_json=True, variantes=False, almacen_dir="imagenes_cas", fragmentos_zip=1,
+                   mapa_ids=MAPA_POR_DEFECTO, catalogo=CATALOGO_POR_DEFECTO,
+                   indice_busqueda=INDICE_POR_DEFECTO, agregados=AGREGADOS_POR_DEFECTO,
+                   informe=INFORME_POR_DEFECTO, progreso=False, tasa_max=None, reintentos=3,
+                   columnar=None, ediciones=EDICIONES_POR_DEFECTO, shard=None):
+    """
+    Procesa las colecciones de `input_json_path`. Las páginas se descargan con hasta
+    `concurrencia` peticiones simultáneas y como máximo `tasa` peticiones por segundo
+    a cada host; los resultados se procesan siempre en el orden del JSON de entrada.
+    Los fallos transitorios (errores de conexión, 429, 5xx) se reintentan hasta
+    `reintentos` veces con esperas exponenciales aleatorias y respetando Retry-After, y
+    las páginas que siguen fallando se vuelven a pedir una vez al final. Con `tasa_max`
+    la tasa de cada host se adapta entre `tasa` y ese máximo según la latencia; los
+    429/503 la reducen siempre (ver crawl_async.py).
+    Las imágenes se descargan en paralelo en una etapa aparte con `hilos_imagenes` hilos.
+    Con `cache_dir` las peticiones son condicionales y las páginas e imágenes que no han
+    cambiado desde la última ejecución no se vuelven a descargar ni a analizar.
+    Cada colección terminada se registra en el diario `diario_path`: una ejecución
+    interrumpida se reanuda donde se quedó (salvo con `reiniciar`) y, con `solo_cambios`,
+    solo se vuelven a procesar las colecciones cuya página ha cambiado.
+    `parser` elige el backend de análisis HTML (por defecto html.parser).
+    Con `procesos` > 1 el análisis de las páginas se reparte entre varios procesos.
+    Con `archivo_dir` se guardan los bytes de cada página en un archivo comprimido; con
+    `offline` los JSON se reconstruyen desde ese archivo sin acceder a la red (ni a las
+    imágenes, ni al diario), para poder iterar rápido sobre los extractores.
+    Los mangas y volúmenes se escriben en disco a medida que se procesan, como JSON Lines
+    (mangas_detailed.jsonl, volumes.jsonl y volumes_fixed.jsonl, con los títulos ya
+    limpios); con `envolver_json` se generan además los JSON de siempre a partir de ellos.
+    Con `variantes` se generan al final versiones reducidas WebP/AVIF de las imágenes
+    (ver image_variants.py).
+    Con `almacen_dir` las imágenes se guardan una sola vez por contenido y las rutas de
+    tomos/ e images/portadas/ son enlaces a ellas; cada URL se descarga una vez por
+    ejecución aunque la compartan varios volúmenes o ediciones (ver image_store.py).
+    tomos.zip se actualiza con solo las imágenes que han cambiado; con `fragmentos_zip` > 1
+    se reparte en varios ZIP generados en paralelo (ver tomos_archive.py).
+    El ID de cada manga es el de su colección (coleccion.php?id=), no su posición en la
+    lista, así que insertar un título no cambia los IDs ni las rutas de las imágenes de
+    los demás; `mapa_ids` guarda los IDs propios de las URLs sin ese parámetro (ver
+    manga_ids.py, que también migra los datos generados con los IDs antiguos).
+    Con `catalogo` se exporta además un fichero binario indexado para el backend
+    (ver catalog_export.py), con `indice_busqueda` el índice de búsqueda de mangas y
+    autores (ver search_index.py) y con `agregados` las listas de recientes y los
+    autores ya calculados (ver catalog_aggregates.py). Con `ediciones` se agrupan en
+    obras las ediciones de un mismo manga (ver edition_clusters.py). Con `columnar` se
+    exportan mangas y volúmenes a Parquet en ese directorio para los análisis del
+    catálogo (ver columnar_export.py y catalog_analytics.py; necesita pyarrow).
+    Con `informe` se guarda un JSON con el tiempo de cada etapa (descarga de páginas,
+    análisis, sinopsis, volúmenes, limpieza de títulos, descarga de imágenes...) y los
+    contadores de bytes, reintentos, aciertos de caché y fallos (ver run_metrics.py);
+    con `progreso` se muestra en stderr el avance y el tiempo restante estimado.
+    Con `shard` = (n, total) solo se procesan las colecciones de ese shard (según el
+    hash de su ID) y, en lugar de los JSON, los ficheros derivados, las variantes y el
+    ZIP, se guarda el índice del segmento para fusionarlo después con los demás (ver
+    crawl_shards.py, process_mangas_en_shards y fusionar_shards).
+    """
+    if offline and not archivo_dir:
+        raise ValueError("El modo sin conexión necesita el directorio del archivo de páginas (archivo_dir)")
+    archivo = ArchivoHTML(archivo_dir) if archivo_dir else None
+    metricas = Metricas()
+    
     # Crear directorios necesarios
-    os.makedirs("tomos", exist_ok=True)
-    os.makedirs("images/portadas", exist_ok=True)
+    if not offline:
+        os.makedirs("tomos", exist_ok=True)
+        os.makedirs("images/portadas", exist_ok=True)
     
     # Cargar datos de manga existentes
     with open(input_json_path, 'r', encoding='utf-8') as f:
@@ -359,16 +487,88 @@ def process_mangas(input_json_path, limit=None):
     if limit:
         mangas_list = mangas_list[:limit]
     
-    # Listas para almacenar los datos procesados
-    mangas_data = []
-    volumes_data = []
-    
-    # Procesar cada manga
-    for i, manga in enumerate(mangas_list, 1):
-        print(f"Procesando manga {i}/{len(mangas_list)}")
-        
-        # Extraer detalles del manga
-        result = extract_manga_details(manga['url'], i)
+    # IDs estables: los de las colecciones de listadomanga
+    ids = asignar_ids(mangas_list, mapa_ids)
+    
+    # Con `shard`, solo las colecciones que le tocan; los IDs se asignan antes sobre la
+    # lista completa para que sean los mismos que en una ejecución de un solo proceso
+    posiciones = list(range(len(mangas_list)))
+    segmento = None
+    if shard is not None:
+        numero, total = shard
+        posiciones = [posicion for posicion in posiciones if shard_de(ids[posicion], total) == numero]
+        print(f"Shard {numero + 1}/{total}: {len(posiciones)} de {len(mangas_list)} mangas")
+        segmento = IndiceSegmento(numero, total, len(mangas_list))
+        mangas_list = [mangas_list[posicion] for posicion in posiciones]
+        ids = [ids[posicion] for posicion in posiciones]
+    
+    # Resultados por posición en la lista de entrada: None mientras está pendiente,
+    # False si la colección falló o si su resultado ya se escribió en disco
+    resultados = [None] * len(mangas_list)
+    
+    # Reanudar la ejecución anterior si quedó a medias
+    diario = DiarioRastreo(diario_path) if diario_path and not offline else None
+    pendientes = list(range(len(mangas_list)))
+    if diario is not None:
+        ejecucion, reanudada = diario.iniciar_ejecucion(reiniciar)
+        if reanudada:
+            completadas = diario.completadas()
+            pendientes = []
+            for indice, manga in enumerate(mangas_list):
+                registro = completadas.get(manga['url'])
+                if registro and registro[0] == ids[indice]:
+                    resultados[indice] = registro[1]
+                else:
+                    pendientes.append(indice)
+            print(f"Reanudando la ejecución {ejecucion}: {len(mangas_list) - len(pendientes)} mangas ya completados")
+    barra = Progreso(len(pendientes)) if progreso else None
+    
+    # Salida en streaming: cada manga se escribe en cuanto están listos todos los anteriores
+    escritor_mangas = EscritorJSONL('mangas_detailed.jsonl')
+    escritor_volumenes = EscritorJSONL('volumes.jsonl')
+    escritor_volumenes_limpios = EscritorJSONL('volumes_fixed.jsonl')
+    siguiente = 0
+    
+    def volcar():
+        nonlocal siguiente
+        while siguiente < len(resultados) and resultados[siguiente] is not None:
+            result = resultados[siguiente]
+            if result:
+                escritor_mangas.escribir(result['manga'])
+                for volume in result['volumes']:
+                    escritor_volumenes.escribir(volume)
+                    # Limpiar el título en el momento, sin una segunda pasada sobre volumes.json
+                    with metricas.medir("limpieza_titulos"):
+                        titulo = limpiar_titulo_html_mejorado(volume["titulo"])
+                    escritor_volumenes_limpios.escribir(dict(volume, titulo=titulo))
+                if segmento is not None:
+                    segmento.registrar(posiciones[siguiente], len(result['volumes']))
+            # Liberar el resultado una vez escrito
+            resultados[siguiente] = False
+            siguiente += 1
+    
+    volcar()
+    
+    # Etapa de descarga de imágenes: se alimenta desde el análisis mediante una cola acotada
+    cache = CacheHTTP(cache_dir) if cache_dir and not offline else None
+    almacen = AlmacenImagenes(almacen_dir) if almacen_dir and not offline else None
+    downloader = ImageDownloader(trabajadores=hilos_imagenes, cache=cache, almacen=almacen,
+                                 metricas=metricas) if not offline else None
+    
+    # Etapa de análisis: con varios procesos, las páginas se analizan en paralelo.
+    # Los hilos de descarga ya están en marcha, así que los procesos del pool no se
+    # crean con fork (heredarían cerrojos tomados por esos hilos), sino con forkserver
+    # o, donde no existe, con spawn
+    arranque = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    pool = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context(arranque)) \
+        if procesos > 1 else None
+    # Análisis en curso en el pool: (indice, url, hash, futuro), en orden de llegada
+    en_curso = deque()
+    
+    # Registrar el resultado de un manga y encolar sus imágenes
+    def completar(indice, url, hash_pagina, result, nuevo):
+        i = ids[indice]
+        manga = mangas_list[indice]
         
         if result:
             # Añadir el campo tipo si existe en el manga original
@@ -377,50 +577,275 @@ def process_mangas(input_json_path, limit=None):
             else:
                 result['manga']['tipo'] = ""
             
-            # Añadir datos del manga
-            mangas_data.append(result['manga'])
-            
-            # Añadir datos de volúmenes
-            volumes_data.extend(result['volumes'])
-            
+            resultados[indice] = result
+            if diario is not None:
+                diario.registrar(url, i, hash_pagina, result)
+        else:
+            resultados[indice] = False
+            metricas.contar("mangas_fallidos")
+        
+        if result and nuevo and cache is not None and downloader is not None:
+            cache.guardar_resultado(url, result)
+        
+        # De las colecciones sin cambios solo se piden las imágenes que no llegaron a guardarse
+        if result and downloader is not None:
             # Descargar imagen de portada
             if result['portada_url']:
                 portada_path = f"images/portadas/{i}.jpg"
-                download_image(result['portada_url'], portada_path)
+                if nuevo or not os.path.exists(portada_path):
+                    downloader.encolar(result['portada_url'], portada_path)
             
             # Descargar imágenes de volúmenes
             for manga_id, volume_num, img_url in result['image_urls']:
                 if img_url:
-                    # Crear directorio para las imágenes de este manga
-                    os.makedirs(f"tomos/{manga_id}", exist_ok=True)
-                    
-                    # Descargar imagen
+                    # Descargar imagen (el directorio se crea al guardarla)
                     volume_img_path = f"tomos/{manga_id}/{volume_num}.jpg"
-                    download_image(img_url, volume_img_path)
+                    if nuevo or not os.path.exists(volume_img_path):
+                        downloader.encolar(img_url, volume_img_path)
         
-        # Pausa para no sobrecargar el servidor
-        time.sleep(1)
-    
-    # Guardar datos de mangas en JSON
-    with open('mangas_detailed.json', 'w', encoding='utf-8') as f:
-        json.dump(mangas_data, f, ensure_ascii=False, indent=2)
-    
-    # Guardar datos de volúmenes en JSON
-    with open('volumes.json', 'w', encoding='utf-8') as f:
-        json.dump(volumes_data, f, ensure_ascii=False, indent=2)
-    
-    # Limpiar títulos de volúmenes con la función mejorada
-    clean_volume_titles('volumes.json')
+        volcar()
+    
+    # Recoger los análisis terminados; si hay demasiados en curso, esperar al más antiguo
+    def recoger(todos=False):
+        limite = procesos * 4
+        while en_curso and (todos or len(en_curso) > limite or en_curso[0][3].done()):
+            indice, url, hash_pagina, futuro = en_curso.popleft()
+            result, tiempos = futuro.result()
+            metricas.combinar(tiempos)
+            completar(indice, url, hash_pagina, result, True)
+    
+    # Procesar cada manga a medida que llega su página
+    def procesar_pagina(indice, url, pagina):
+        i = ids[indice]
+        print(f"Procesando manga {indice + 1}/{len(mangas_list)}")
+        
+        if pagina is None:
+            resultados[indice] = False
+            paginas_fallidas.append(url)
+            metricas.contar("mangas_fallidos")
+            volcar()
+            return
+        
+        # Guardar la página en bruto para poder reanalizarla sin conexión
+        if archivo is not None and not offline:
+            archivo.guardar(url, pagina.contenido, pagina.encoding)
+        
+        # Si la página no ha cambiado, reutilizar el análisis anterior (solo si el ID coincide)
+        result = None
+        hash_pagina = hash_contenido(pagina.contenido)
+        if pagina.no_modificado:
+            anterior = cache.leer_resultado(url)
+            if anterior and anterior['manga']['id'] == i:
+                print(f"Sin cambios, se reutiliza el análisis del manga ID {i}: {url}")
+                result = anterior
+        elif solo_cambios and diario is not None:
+            registro = diario.registro(url)
+            if registro and registro[0] == i and registro[1] == hash_pagina:
+                print(f"Sin cambios, se reutiliza el análisis del manga ID {i}: {url}")
+                result = registro[2]
+        
+        if result is not None:
+            metricas.contar("analisis_reutilizados")
+            completar(indice, url, hash_pagina, result, False)
+        elif pool is not None:
+            # Los procesos reciben los bytes de la página y devuelven diccionarios simples;
+            # el ID ya está asignado antes del análisis, así que la salida no cambia
+            futuro = pool.submit(analizar_con_tiempos, pagina.contenido, i, url, pagina.encoding, parser)
+            en_curso.append((indice, url, hash_pagina, futuro))
+        else:
+            # Extraer detalles del manga
+            result, tiempos = analizar_con_tiempos(pagina.contenido, i, url, pagina.encoding, parser)
+            metricas.combinar(tiempos)
+            completar(indice, url, hash_pagina, result, True)
+        
+        recoger()
+    
+    # Cola de fallidas: las páginas que fallan por algo transitorio (timeouts, errores de
+    # conexión, 429, 5xx) tras agotar sus reintentos se vuelven a pedir más tarde, cuando
+    # el servidor ha tenido tiempo de recuperarse: en cuanto el rastreo va APLAZAMIENTO_MAXIMO
+    # páginas por delante, o al final. Mientras tanto su hueco en la salida queda pendiente
+    # y lo posterior espera en memoria, así que el aplazamiento está acotado. Un 404 o un
+    # 410 no se aplaza
+    aplazadas = deque()
+    paginas_fallidas = []
+    errores = {}
+    politica = PoliticaReintentos(reintentos)
+    tasas = {}
+    
+    # Volver a pedir una página aplazada (una sola petición a la vez, con sus reintentos)
+    def reintentar(indice):
+        crawl_pages([mangas_list[indice]['url']], lambda _, url, pagina: procesar_pagina(indice, url, pagina),
+                    concurrencia=1, tasa=tasa, cache=cache, metricas=metricas, politica=politica)
+    
+    def primera_pasada(posicion, url, pagina):
+        indice = pendientes[posicion]
+        metricas.contar("paginas")
+        if barra is not None:
+            barra.avanzar()
+        if pagina is None and not offline and politica.reintentable(errores.get(url)):
+            print(f"Se reintentará más tarde: {url}")
+            aplazadas.append((posicion, indice))
+        else:
+            procesar_pagina(indice, url, pagina)
+        while aplazadas and posicion - aplazadas[0][0] >= APLAZAMIENTO_MAXIMO:
+            reintentar(aplazadas.popleft()[1])
     
-    # Crear archivo ZIP con imágenes de volúmenes
-    if os.path.exists('tomos') and os.listdir('tomos'):
-        shutil.make_archive('tomos', 'zip', 'tomos')
-        print("Archivo ZIP de imágenes creado: tomos.zip")
+    # Descargar las páginas con el límite de cortesía por host (sustituye a la pausa fija)
+    try:
+        if offline:
+            # Sin conexión: las páginas salen del archivo en lugar de la red
+            for posicion, indice in enumerate(pendientes):
+                url = mangas_list[indice]['url']
+                with metricas.medir("lectura_archivo"):
+                    pagina = archivo.leer(url)
+                if pagina is None:
+                    print(f"La página no está en el archivo: {url}")
+                primera_pasada(posicion, url, pagina)
+        else:
+            tasas = crawl_pages([mangas_list[indice]['url'] for indice in pendientes], primera_pasada,
+                                concurrencia=concurrencia, tasa=tasa, cache=cache, metricas=metricas,
+                                tasa_max=tasa_max, politica=politica, errores=errores)
+            if aplazadas:
+                print(f"Reintentando {len(aplazadas)} páginas que fallaron")
+                indices = [indice for _, indice in aplazadas]
+                crawl_pages([mangas_list[indice]['url'] for indice in indices],
+                            lambda posicion, url, pagina: procesar_pagina(indices[posicion], url, pagina),
+                            concurrencia=1, tasa=tasa, cache=cache, metricas=metricas, politica=politica)
+        recoger(todos=True)
+    finally:
+        if barra is not None:
+            barra.cerrar()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if archivo is not None:
+            archivo.cerrar()
+        # Esperar a que terminen las descargas de imágenes pendientes
+        if downloader is not None:
+            descargadas, fallidas = downloader.cerrar()
+            print(f"Imágenes descargadas: {descargadas}, fallidas: {fallidas}")
+            metricas.contar("imagenes_descargadas", descargadas)
+            metricas.contar("imagenes_fallidas", fallidas)
+            metricas.contar("imagenes_enlazadas", downloader.enlazadas)
+        if almacen is not None:
+            almacen.guardar_manifest()
+            rutas, distintas = almacen.estadisticas()
+            print(f"Almacén de imágenes: {rutas} rutas, {distintas} imágenes distintas "
+                  f"({downloader.enlazadas} enlazadas sin descargar en esta ejecución, "
+                  f"{almacen.purgar()} sin uso borradas)")
+        if cache is not None:
+            print(f"Caché HTTP: {cache.aciertos} respuestas 304, {cache.fallos} descargas completas")
+            metricas.contar("cache_304", cache.aciertos)
+            metricas.contar("cache_descargas_completas", cache.fallos)
+    
+    if diario is not None:
+        diario.terminar_ejecucion()
+        diario.cerrar()
+    if paginas_fallidas:
+        print(f"No se pudieron procesar {len(paginas_fallidas)} páginas (se volverán a pedir en la próxima ejecución):")
+        for url in paginas_fallidas:
+            print(f"- {url}")
+    
+    volcar()
+    num_mangas, num_volumes = escritor_mangas.registros, escritor_volumenes.registros
+    for escritor in (escritor_mangas, escritor_volumenes, escritor_volumenes_limpios):
+        escritor.cerrar()
+    
+    if segmento is not None:
+        # Los JSON, los ficheros derivados, las variantes y el ZIP se generan al fusionar
+        segmento.guardar()
+        print(f"Índice del segmento guardado en {SEGMENTO}")
     else:
-        print("No se creó archivo ZIP porque no hay imágenes de volúmenes")
-    
-    print(f"Proceso completado. Se procesaron {len(mangas_data)} mangas y {len(volumes_data)} volúmenes.")
-    return len(mangas_data), len(volumes_data)
+        generar_derivados(metricas, envolver_json, catalogo, indice_busqueda, agregados, ediciones, columnar)
+        generar_imagenes(metricas, offline, variantes, procesos, fragmentos_zip)
+    
+    print(f"Proceso completado. Se procesaron {num_mangas} mangas y {num_volumes} volúmenes.")
+    print(f"Tiempo total: {metricas.duracion():.1f} s")
+    for linea in metricas.resumen():
+        print(linea)
+    if informe:
+        metricas.guardar(informe, mangas=num_mangas, volumenes=num_volumes, offline=offline,
+                         paginas_fallidas=paginas_fallidas, tasas_finales=tasas,
+                         parametros={"limit": limit, "concurrencia": concurrencia, "tasa": tasa,
+                                     "tasa_max": tasa_max, "reintentos": reintentos,
+                                     "procesos": procesos, "hilos_imagenes": hilos_imagenes,
+                                     "parser": parser or BACKEND_POR_DEFECTO,
+                                     "shard": f"{shard[0] + 1}/{shard[1]}" if shard else None})
+        print(f"Informe de la ejecución guardado en {informe}")
+    return num_mangas, num_volumes
+
+# Proceso de un shard: trabaja en su propio directorio y deja allí su salida
+def _ejecutar_shard(directorio, input_json_path, shard, opciones):
+    os.chdir(directorio)
+    with open('salida.log', 'w', encoding='utf-8') as log, redirect_stdout(log):
+        process_mangas(input_json_path, shard=shard, **opciones)
+
+# Procesar la lista en `shards` procesos independientes y fusionar sus resultados
+def process_mangas_en_shards(input_json_path, shards, directorio=DIRECTORIO_SHARDS, tasa=1.0, tasa_max=None,
+                             mapa_ids=MAPA_POR_DEFECTO, envolver_json=True, catalogo=CATALOGO_POR_DEFECTO,
+                             indice_busqueda=INDICE_POR_DEFECTO, agregados=AGREGADOS_POR_DEFECTO,
+                             ediciones=EDICIONES_POR_DEFECTO, columnar=None, variantes=False,
+                             fragmentos_zip=1, **opciones):
+    """
+    Reparte las colecciones de `input_json_path` en `shards` según el hash de su ID y
+    procesa cada shard en un proceso aparte, en su propio subdirectorio de `directorio`
+    (con su caché, su diario, su archivo y sus imágenes, y su salida en salida.log):
+    lo mismo que hace `--shard N/TOTAL` en otra máquina. Como todos piden al mismo
+    host, `tasa` y `tasa_max` son el total y se reparten entre los procesos. Al
+    terminar se fusionan los segmentos en el directorio actual (ver fusionar_shards).
+    El resto de `opciones` se pasa tal cual a process_mangas en cada shard.
+    """
+    entrada = os.path.abspath(input_json_path)
+    # Los IDs se asignan aquí, sobre el directorio en el que se fusionará todo: si tiene
+    # datos con IDs por posición se para antes de lanzar ningún shard (ver asignar_ids)
+    if mapa_ids:
+        with open(entrada, 'r', encoding='utf-8') as f:
+            asignar_ids(json.load(f)[:opciones.get('limit')], mapa_ids)
+    opciones.update(tasa=tasa / shards, tasa_max=tasa_max / shards if tasa_max else None,
+                    mapa_ids=os.path.basename(mapa_ids) if mapa_ids else None)
+    directorios = [directorio_shard(directorio, numero, shards) for numero in range(shards)]
+    procesos_shard = []
+    for numero, destino in enumerate(directorios):
+        os.makedirs(destino, exist_ok=True)
+        # Todos parten del mismo mapa de IDs, que ya tiene los IDs propios de toda la lista
+        if mapa_ids and os.path.exists(mapa_ids):
+            shutil.copy2(mapa_ids, os.path.join(destino, opciones['mapa_ids']))
+        proceso = Process(target=_ejecutar_shard, args=(destino, entrada, (numero, shards), opciones),
+                          name=f"shard-{numero + 1}")
+        proceso.start()
+        procesos_shard.append(proceso)
+    print(f"{shards} shards en marcha en {directorio}/ (la salida de cada uno va a su salida.log)")
+    
+    fallidos = []
+    for destino, proceso in zip(directorios, procesos_shard):
+        proceso.join()
+        if proceso.exitcode != 0:
+            fallidos.append(destino)
+    if fallidos:
+        # Los demás shards quedan terminados: al repetir, cada uno se reanuda desde su diario
+        raise RuntimeError(f"Los shards de {', '.join(fallidos)} terminaron con error (ver su salida.log)")
+    
+    return fusionar_shards(directorios, envolver_json, catalogo, indice_busqueda, agregados, ediciones,
+                           columnar, variantes, opciones.get('procesos', 1), fragmentos_zip,
+                           opciones.get('offline', False))
+
+# Fusionar los segmentos de los shards y generar lo que una ejecución normal genera al final
+def fusionar_shards(directorios, envolver_json=True, catalogo=CATALOGO_POR_DEFECTO,
+                    indice_busqueda=INDICE_POR_DEFECTO, agregados=AGREGADOS_POR_DEFECTO,
+                    ediciones=EDICIONES_POR_DEFECTO, columnar=None, variantes=False, procesos=1,
+                    fragmentos_zip=1, offline=False):
+    """
+    Los JSONL y los JSON quedan idénticos a los de una ejecución de un solo proceso;
+    después se generan los ficheros derivados, las variantes y el ZIP a partir de las
+    imágenes de todos los shards (ver crawl_shards.fusionar_segmentos).
+    """
+    metricas = Metricas()
+    with metricas.medir("fusion"):
+        num_mangas, num_volumes = fusionar_segmentos(directorios)
+    generar_derivados(metricas, envolver_json, catalogo, indice_busqueda, agregados, ediciones, columnar)
+    generar_imagenes(metricas, offline, variantes, procesos, fragmentos_zip)
+    for linea in metricas.resumen():
+        print(linea)
+    return num_mangas, num_volumes
 
 # Función para limpiar los títulos de volúmenes (versión integrada con HTML)
 def clean_volume_titles(volumes_json_path):
@@ -445,17 +870,111 @@ def clean_volume_titles(volumes_json_path):
 
 # Punto de entrada del script
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae los detalles de las colecciones de listadomanga.es")
     # Usar el archivo JSON combinado como entrada
-    input_json = 'mangas_combined.json'
-    
+    parser.add_argument("input_json", nargs="?", default="mangas_combined.json")
     # Para pruebas, limitar a un número pequeño de mangas
-    # Comentar esta línea para procesar todos los mangas
-    limit_mangas = None
-    
-    # Procesar mangas
-    num_mangas, num_volumes = process_mangas(input_json, limit_mangas)
+    parser.add_argument("--limit", type=int, default=None, help="Número máximo de mangas a procesar")
+    parser.add_argument("--concurrencia", type=int, default=1, help="Peticiones simultáneas de páginas")
+    parser.add_argument("--tasa", type=float, default=1.0, help="Peticiones por segundo por host (0 = sin límite)")
+    parser.add_argument("--tasa-max", type=float, default=None,
+                        help="Tasa máxima por host: la tasa se adapta entre --tasa y este valor según la latencia")
+    parser.add_argument("--reintentos", type=int, default=3,
+                        help="Reintentos de cada página ante errores transitorios (429, 5xx, conexión)")
+    parser.add_argument("--hilos-imagenes", type=int, default=8, help="Descargas de imágenes simultáneas")
+    parser.add_argument("--cache", default=".cache_http", help="Directorio de la caché HTTP condicional")
+    parser.add_argument("--sin-cache", action="store_true", help="Descargar todo sin peticiones condicionales")
+    parser.add_argument("--diario", default="crawl_journal.sqlite", help="Diario SQLite para reanudar ejecuciones")
+    parser.add_argument("--solo-cambios", action="store_true",
+                        help="Reprocesar solo las colecciones cuya página ha cambiado desde la última ejecución")
+    parser.add_argument("--reiniciar", action="store_true", help="No reanudar una ejecución interrumpida")
+    parser.add_argument("--parser", choices=BACKENDS, default=None,
+                        help=f"Backend de análisis HTML (por defecto: {BACKEND_POR_DEFECTO})")
+    parser.add_argument("--procesos", type=int, default=1,
+                        help="Procesos para analizar páginas en paralelo (p. ej. el número de núcleos)")
+    parser.add_argument("--archivo", default=None,
+                        help="Directorio donde guardar las páginas en bruto (comprimidas) para reanalizarlas")
+    parser.add_argument("--offline", action="store_true",
+                        help="Reconstruir los JSON desde --archivo sin acceder a la red")
+    parser.add_argument("--solo-jsonl", action="store_true",
+                        help="Escribir solo los JSON Lines, sin generar los JSON en forma de array")
+    parser.add_argument("--almacen", default="imagenes_cas",
+                        help="Directorio del almacén de imágenes por contenido (deduplicadas)")
+    parser.add_argument("--sin-almacen", action="store_true",
+                        help="Guardar una copia de cada imagen en su ruta, sin deduplicar")
+    parser.add_argument("--fragmentos-zip", type=int, default=1,
+                        help="Repartir tomos.zip en varios ZIP generados en paralelo")
+    parser.add_argument("--mapa-ids", default=MAPA_POR_DEFECTO,
+                        help="Fichero con los IDs propios de las URLs sin coleccion.php?id=")
+    parser.add_argument("--catalogo", default=CATALOGO_POR_DEFECTO,
+                        help="Fichero del catálogo binario indexado para el backend")
+    parser.add_argument("--sin-catalogo", action="store_true", help="No exportar el catálogo binario")
+    parser.add_argument("--indice-busqueda", default=INDICE_POR_DEFECTO,
+                        help="Fichero del índice de búsqueda de mangas y autores")
+    parser.add_argument("--sin-indice-busqueda", action="store_true", help="No generar el índice de búsqueda")
+    parser.add_argument("--agregados", default=AGREGADOS_POR_DEFECTO,
+                        help="Fichero con los recientes y autores ya calculados para el backend")
+    parser.add_argument("--sin-agregados", action="store_true", help="No generar los agregados")
+    parser.add_argument("--ediciones", default=EDICIONES_POR_DEFECTO,
+                        help="Fichero con el work_id de cada manga y las ediciones de cada obra")
+    parser.add_argument("--sin-ediciones", action="store_true", help="No agrupar las ediciones")
+    parser.add_argument("--columnar", nargs="?", const=COLUMNAR_POR_DEFECTO, default=None,
+                        help="Exportar también a Parquet en este directorio (por defecto columnar/)")
+    parser.add_argument("--variantes", action="store_true",
+                        help="Generar variantes reducidas WebP/AVIF de portadas y tomos al terminar")
+    parser.add_argument("--informe", default=INFORME_POR_DEFECTO,
+                        help="Fichero JSON con los tiempos por etapa y los contadores de la ejecución")
+    parser.add_argument("--sin-informe", action="store_true", help="No guardar el informe de la ejecución")
+    parser.add_argument("--progreso", action="store_true",
+                        help="Mostrar el avance y el tiempo restante estimado en stderr")
+    parser.add_argument("--perfil", default=None,
+                        help="Ejecutar bajo cProfile y guardar las estadísticas en este fichero")
+    parser.add_argument("--shard", type=parsear_shard, default=None,
+                        help="Procesar solo el shard N de TOTAL (N/TOTAL) y guardar su segmento para fusionarlo")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Repartir la lista en este número de procesos y fusionar sus resultados")
+    parser.add_argument("--dir-shards", default=DIRECTORIO_SHARDS,
+                        help="Directorio con un subdirectorio de trabajo por shard")
+    parser.add_argument("--fusionar", nargs="+", default=None, metavar="DIRECTORIO",
+                        help="Fusionar los segmentos de estos directorios de shards en lugar de procesar")
+    args = parser.parse_args()
+    
+    derivados = dict(envolver_json=not args.solo_jsonl,
+                     catalogo=None if args.sin_catalogo else args.catalogo,
+                     indice_busqueda=None if args.sin_indice_busqueda else args.indice_busqueda,
+                     agregados=None if args.sin_agregados else args.agregados,
+                     ediciones=None if args.sin_ediciones else args.ediciones,
+                     columnar=args.columnar, variantes=args.variantes, fragmentos_zip=args.fragmentos_zip)
+    if args.fusionar:
+        # Los shards de otras máquinas traen su mapa de IDs; el de aquí recoge sus IDs propios
+        if args.mapa_ids:
+            fusionar_mapas(args.mapa_ids, [os.path.join(directorio, os.path.basename(args.mapa_ids))
+                                           for directorio in args.fusionar])
+        num_mangas, num_volumes = fusionar_shards(args.fusionar, procesos=args.procesos, offline=args.offline,
+                                                   **derivados)
+        print(f"Fusión completada: {num_mangas} mangas y {num_volumes} volúmenes")
+        sys.exit(0)
+    
+    # Procesar mangas (opcionalmente bajo cProfile)
+    opciones = dict(limit=args.limit, concurrencia=args.concurrencia, tasa=args.tasa,
+                    hilos_imagenes=args.hilos_imagenes, cache_dir=None if args.sin_cache else args.cache,
+                    diario_path=args.diario, solo_cambios=args.solo_cambios, reiniciar=args.reiniciar,
+                    parser=args.parser, procesos=args.procesos, archivo_dir=args.archivo,
+                    offline=args.offline, almacen_dir=None if args.sin_almacen else args.almacen,
+                    mapa_ids=args.mapa_ids, informe=None if args.sin_informe else args.informe,
+                    progreso=args.progreso, tasa_max=args.tasa_max, reintentos=args.reintentos,
+                    **derivados)
+    if args.shards:
+        num_mangas, num_volumes = process_mangas_en_shards(args.input_json, args.shards, args.dir_shards,
+                                                           **opciones)
+    else:
+        ejecutar = partial(perfilar, args.perfil, process_mangas) if args.perfil else process_mangas
+        num_mangas, num_volumes = ejecutar(args.input_json, shard=args.shard, **opciones)
     
     print(f"Resumen final:")
     print(f"- Mangas procesados: {num_mangas}")
     print(f"- Volúmenes procesados: {num_volumes}")
-    print(f"- Archivos generados: mangas_detailed.json, volumes_fixed.json, tomos.zip")
+    if args.shard:
+        print(f"- Segmento guardado para fusionar: {SEGMENTO} y los JSON Lines")
+    else:
+        print(f"- Archivos generados: mangas_detailed.json, volumes_fixed.json, tomos.zip")
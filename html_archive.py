@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+
+from crawl_journal import hash_contenido
+from http_cache import Pagina
+
+# zstd comprime más y más rápido que zlib, pero es opcional
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _comprimir(contenido):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(contenido)
+    return "zlib", zlib.compress(contenido, 6)
+
+
+def _descomprimir(codec, datos):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("El archivo contiene páginas comprimidas con zstd: instala el paquete zstandard")
+        return zstandard.ZstdDecompressor().decompress(datos)
+    return zlib.decompress(datos)
+
+
+# Archivo de páginas HTML en bruto para poder volver a extraer los datos sin conexión
+class ArchivoHTML:
+    """
+    Guarda los bytes de cada página tal como llegaron del servidor, comprimidos uno a uno
+    en un único fichero `paginas.pack` al que solo se añade al final. Un índice SQLite
+    apunta, para cada URL, a la última versión guardada; si la página no ha cambiado
+    (mismo hash) no se vuelve a escribir.
+    """
+
+    def __init__(self, directorio="archivo_html"):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self._lock = threading.Lock()
+        self._pack = open(os.path.join(directorio, "paginas.pack"), 'a+b')
+        self.indice = sqlite3.connect(os.path.join(directorio, "indice.sqlite"), check_same_thread=False)
+        self.indice.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                desplazamiento INTEGER NOT NULL,
+                longitud INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                encoding TEXT,
+                hash TEXT NOT NULL,
+                guardada TEXT NOT NULL
+            )
+        """)
+
+    def guardar(self, url, contenido, encoding=None):
+        hash_pagina = hash_contenido(contenido)
+        with self._lock:
+            fila = self.indice.execute("SELECT hash FROM paginas WHERE url = ?", (url,)).fetchone()
+            if fila and fila[0] == hash_pagina:
+                return False
+            codec, datos = _comprimir(contenido)
+            self._pack.seek(0, os.SEEK_END)
+            desplazamiento = self._pack.tell()
+            self._pack.write(datos)
+            self._pack.flush()
+            self.indice.execute(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, desplazamiento, len(datos), codec, encoding, hash_pagina, datetime.now().isoformat()),
+            )
+            self.indice.commit()
+            return True
+
+    def leer(self, url):
+        """Devuelve la última versión guardada de la página como `Pagina`, o None."""
+        with self._lock:
+            fila = self.indice.execute(
+                "SELECT desplazamiento, longitud, codec, encoding FROM paginas WHERE url = ?", (url,)
+            ).fetchone()
+            if fila is None:
+                return None
+            desplazamiento, longitud, codec, encoding = fila
+            self._pack.seek(desplazamiento)
+            datos = self._pack.read(longitud)
+        return Pagina(_descomprimir(codec, datos), encoding, False)
+
+    def __len__(self):
+        with self._lock:
+            return self.indice.execute("SELECT COUNT(*) FROM paginas").fetchone()[0]
+
+    def cerrar(self):
+        self._pack.close()
+        self.indice.close()
@@ -0,0 +1,85 @@
+import re
+from collections import defaultdict
+
+from bs4 import NavigableString
+
+# Textos que marcan las secciones de la página de una colección
+MARCADORES = {
+    "numeros_editados": "Números editados",
+    "guion": "Guion:",
+    "dibujo": "Dibujo:",
+}
+MARCADORES_RE = re.compile("|".join(f"(?P<{nombre}>{re.escape(texto)})" for nombre, texto in MARCADORES.items()),
+                           re.IGNORECASE)
+
+
+# Índice de los puntos de referencia de un documento, creado en un único recorrido
+class IndiceHitos:
+    """
+    Guarda, en orden de documento, los <h2>, las imágenes (candidatas a portada de un
+    tomo), los enlaces y los textos que contienen cada marcador de MARCADORES. Los
+    extractores los consultan aquí en lugar de recorrer el árbol entero cada uno con su
+    propio find(), y los enlaces de cada celda de volumen salen de `enlaces(celda)` en
+    lugar de dos búsquedas más dentro de la celda.
+
+    Como extract_sinopsis elimina nodos del árbol, las consultas saltan los nodos ya
+    eliminados: el resultado es el mismo que buscar de nuevo en el árbol modificado.
+    """
+
+    def __init__(self, soup):
+        self.h2 = []
+        self.imagenes = []
+        self.enlaces_documento = []
+        self.marcadores = {nombre: [] for nombre in MARCADORES}
+        # id(<td>) -> sus enlaces; se calcula la primera vez que se pide
+        self._enlaces_por_celda = None
+        for nodo in soup.descendants:
+            if isinstance(nodo, NavigableString):
+                for coincidencia in MARCADORES_RE.finditer(nodo):
+                    textos = self.marcadores[coincidencia.lastgroup]
+                    if not textos or textos[-1] is not nodo:
+                        textos.append(nodo)
+            elif nodo.name == 'h2':
+                self.h2.append(nodo)
+            elif nodo.name == 'img':
+                self.imagenes.append(nodo)
+            elif nodo.name == 'a':
+                self.enlaces_documento.append(nodo)
+
+    @staticmethod
+    def _vigentes(nodos):
+        return [nodo for nodo in nodos if not nodo.decomposed]
+
+    def primer_h2(self):
+        vigentes = self.encabezados()
+        return vigentes[0] if vigentes else None
+
+    def encabezados(self):
+        return self._vigentes(self.h2)
+
+    def imagenes_vigentes(self):
+        return self._vigentes(self.imagenes)
+
+    def enlaces(self, celda):
+        """Enlaces dentro de `celda` (a cualquier profundidad), en orden de documento."""
+        if self._enlaces_por_celda is None:
+            self._enlaces_por_celda = defaultdict(list)
+            for enlace in self.enlaces_documento:
+                for ancestro in enlace.parents:
+                    if ancestro.name == 'td':
+                        self._enlaces_por_celda[id(ancestro)].append(enlace)
+        return self._vigentes(self._enlaces_por_celda.get(id(celda), ()))
+
+    def marcador(self, nombre):
+        """Primer texto del documento que contiene el marcador `nombre`, o None."""
+        for nodo in self.marcadores[nombre]:
+            if not nodo.decomposed:
+                return nodo
+        return None
+
+
+# Primer texto con el marcador: desde el índice si lo hay, si no recorriendo el árbol
+def buscar_marcador(soup, nombre, indice=None):
+    if indice is not None:
+        return indice.marcador(nombre)
+    return soup.find(string=re.compile(re.escape(MARCADORES[nombre]), re.IGNORECASE))
@@ -0,0 +1,26 @@
+from bs4 import BeautifulSoup
+
+
+# Backends de análisis disponibles, del más rápido al más lento
+BACKENDS = ("lxml", "html.parser")
+
+
+# html.parser (incluido en Python) sigue siendo el backend por defecto: la paridad de
+# lxml solo se ha comprobado con las páginas escritas a mano de benchmarks/fixtures/,
+# que son HTML bien formado, y no con páginas reales del sitio. lxml se elige con --parser
+BACKEND_POR_DEFECTO = "html.parser"
+
+
+# Crear el árbol del documento con el backend elegido
+def crear_soup(contenido, backend=None, encoding=None):
+    """
+    `contenido` puede ser el HTML en bytes (preferible: el parser decodifica directamente
+    a partir del charset declarado o del <meta> del documento) o ya decodificado como str.
+    `encoding` es el charset que indicó el servidor, si lo indicó.
+    """
+    backend = backend or BACKEND_POR_DEFECTO
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de análisis desconocido: {backend} (disponibles: {', '.join(BACKENDS)})")
+    if isinstance(contenido, bytes) and encoding:
+        return BeautifulSoup(contenido, backend, from_encoding=encoding)
+    return BeautifulSoup(contenido, backend)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import namedtuple
+
+
+# Página descargada: bytes sin decodificar, charset declarado por el servidor (o None)
+# y si el servidor respondió 304 (la página no ha cambiado desde la última vez)
+Pagina = namedtuple("Pagina", ["contenido", "encoding", "no_modificado"])
+
+
+# Charset indicado explícitamente en Content-Type; sin él se deja que el parser lo detecte
+def charset_declarado(response):
+    match = re.search(r'charset=["\']?([\w.:-]+)', response.headers.get("Content-Type", ""), re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+# Escribir un fichero de forma atómica para no dejar entradas corruptas si el proceso muere;
+# cada escritura usa su propio temporal, así que dos hilos pueden escribir la misma entrada
+def _escribir_atomico(ruta, datos):
+    directorio = os.path.dirname(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    if isinstance(datos, str):
+        datos = datos.encode('utf-8')
+    f = tempfile.NamedTemporaryFile(dir=directorio, prefix=os.path.basename(ruta), suffix=".tmp", delete=False)
+    try:
+        with f:
+            f.write(datos)
+        os.replace(f.name, ruta)
+    except BaseException:
+        # Los temporales tienen nombres aleatorios: si no se borran, se acumulan
+        if os.path.exists(f.name):
+            os.remove(f.name)
+        raise
+
+
+# Caché HTTP en disco con peticiones condicionales (ETag / Last-Modified)
+class CacheHTTP:
+    """
+    Guarda por URL los validadores (ETag, Last-Modified) y, para las páginas, el cuerpo
+    de la última respuesta. Las siguientes peticiones envían If-None-Match /
+    If-Modified-Since y, si el servidor responde 304, se reutiliza lo guardado sin
+    volver a transferirlo. También permite asociar a cada URL un resultado derivado
+    (p. ej. el análisis de la página) para no recalcularlo cuando no hay cambios.
+    """
+
+    def __init__(self, directorio=".cache_http"):
+        self.directorio = directorio
+        self.aciertos = 0
+        self.fallos = 0
+        # Las páginas y las imágenes se descargan desde varios hilos a la vez
+        self._lock = threading.Lock()
+
+    def contar_acierto(self):
+        with self._lock:
+            self.aciertos += 1
+
+    def contar_fallo(self):
+        with self._lock:
+            self.fallos += 1
+
+    def _ruta(self, url, extension, destino=None):
+        # Las imágenes se indexan por URL y ruta de destino: una misma URL puede guardarse en varias rutas
+        identificador = url if destino is None else f"{url}\n{destino}"
+        clave = hashlib.sha256(identificador.encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, clave[:2], f"{clave}.{extension}")
+
+    def leer_meta(self, url, destino=None):
+        try:
+            with open(self._ruta(url, "meta.json", destino), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def guardar_meta(self, url, response, destino=None):
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": charset_declarado(response),
+        }
+        if meta["etag"] or meta["last_modified"]:
+            self.escribir_meta(url, meta, destino)
+
+    def escribir_meta(self, url, meta, destino=None):
+        _escribir_atomico(self._ruta(url, "meta.json", destino), json.dumps(meta, ensure_ascii=False))
+
+    def borrar_meta(self, url, destino=None):
+        ruta = self._ruta(url, "meta.json", destino)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    @staticmethod
+    def cabeceras_condicionales(meta):
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    # Descargar una página usando la copia en caché si el servidor indica que no ha cambiado
+    def obtener_pagina(self, session, url, timeout=30):
+        meta = self.leer_meta(url)
+        ruta_cuerpo = self._ruta(url, "body")
+        headers = self.cabeceras_condicionales(meta) if os.path.exists(ruta_cuerpo) else {}
+
+        response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and headers:
+            self.contar_acierto()
+            with open(ruta_cuerpo, 'rb') as f:
+                return Pagina(f.read(), meta.get("encoding"), True)
+
+        response.raise_for_status()
+        self.contar_fallo()
+        _escribir_atomico(ruta_cuerpo, response.content)
+        self.guardar_meta(url, response)
+        # Un resultado derivado de una versión anterior de la página ya no es válido
+        if os.path.exists(self._ruta(url, "resultado.json")):
+            os.remove(self._ruta(url, "resultado.json"))
+        return Pagina(response.content, charset_declarado(response), False)
+
+    def leer_resultado(self, url):
+        try:
+            with open(self._ruta(url, "resultado.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def guardar_resultado(self, url, resultado):
+        _escribir_atomico(self._ruta(url, "resultado.json"), json.dumps(resultado, ensure_ascii=False))
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Crear una sesión con pool de conexiones keep-alive y reintentos con espera exponencial
+def crear_sesion_imagenes(tamano_pool=8, reintentos=3, backoff=0.5):
+    opciones = dict(
+        total=reintentos,
+        backoff_factor=backoff,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    try:
+        # Jitter para que los hilos no reintenten todos a la vez (urllib3 >= 2)
+        retry = Retry(backoff_jitter=backoff, **opciones)
+    except TypeError:
+        retry = Retry(**opciones)
+    adapter = HTTPAdapter(pool_connections=tamano_pool, pool_maxsize=tamano_pool, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Reintentos que hizo urllib3 antes de esta respuesta (según la política de la sesión)
+def _reintentos(response):
+    retries = getattr(response.raw, 'retries', None)
+    return len(retries.history) if retries is not None else 0
+
+
+# Función para descargar imagen
+def download_image(url, save_path, session=None, cache=None, almacen=None, metricas=None):
+    inicio = time.perf_counter()
+    try:
+        return _descargar(url, save_path, session, cache, almacen, metricas)
+    finally:
+        if metricas is not None:
+            metricas.sumar_tiempo("descarga_imagenes", time.perf_counter() - inicio)
+
+
+def _descargar(url, save_path, session, cache, almacen, metricas):
+    try:
+        # Petición condicional si la imagen ya se guardó antes en esta misma ruta
+        headers = {}
+        if cache is not None and os.path.exists(save_path):
+            headers = cache.cabeceras_condicionales(cache.leer_meta(url, save_path))
+
+        response = (session or requests).get(url, stream=True, timeout=30, headers=headers)
+        if metricas is not None:
+            metricas.contar("reintentos_imagenes", _reintentos(response))
+        if response.status_code == 304 and headers:
+            response.close()
+            cache.contar_acierto()
+            if metricas is not None:
+                metricas.contar("imagenes_sin_cambios")
+            if almacen is not None and almacen.hash_de(save_path) is None:
+                almacen.registrar(save_path)
+            print(f"Imagen sin cambios: {save_path}")
+            return True
+        response.raise_for_status()
+
+        # Crear directorio si no existe
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+
+        # Escribir en un fichero temporal para no dejar imágenes a medias
+        tmp_path = f"{save_path}.part"
+        digest = hashlib.sha256()
+        recibidos = 0
+        with open(tmp_path, 'wb') as out_file:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                out_file.write(chunk)
+                digest.update(chunk)
+                recibidos += len(chunk)
+        if metricas is not None:
+            metricas.contar("bytes_imagenes", recibidos)
+        if almacen is not None:
+            almacen.guardar(tmp_path, digest.hexdigest(), save_path)
+        else:
+            os.replace(tmp_path, save_path)
+        if cache is not None:
+            cache.contar_fallo()
+            cache.guardar_meta(url, response, save_path)
+
+        print(f"Imagen descargada: {save_path}")
+        return True
+    except Exception as e:
+        print(f"Error al descargar imagen {url}: {e}")
+        return False
+
+
+# Etapa de descarga de imágenes independiente del análisis de páginas
+class ImageDownloader:
+    """
+    Descarga imágenes con un pool de hilos que comparten una sesión keep-alive.
+    Las descargas se encolan con `encolar` en una cola acotada: si los trabajadores
+    van por detrás, el productor espera en lugar de acumular memoria.
+
+    Con un `almacen` (ver image_store.py) cada URL se descarga una sola vez por ejecución:
+    las demás rutas que pidan la misma URL se enlazan a la imagen ya descargada.
+    Con unas `metricas` (ver run_metrics.py) se registran los tiempos, bytes y reintentos.
+
+    Las descargas que fallan tras los reintentos de la sesión no cuentan como fallidas
+    todavía: se guardan y `cerrar` las vuelve a intentar una vez al final.
+    """
+
+    def __init__(self, trabajadores=8, tamano_cola=256, session=None, cache=None, almacen=None,
+                 metricas=None):
+        self.session = session or crear_sesion_imagenes(trabajadores)
+        self.cache = cache
+        self.almacen = almacen
+        self.metricas = metricas
+        self.cola = queue.Queue(maxsize=tamano_cola)
+        self.descargadas = 0
+        self.fallidas = 0
+        self.enlazadas = 0
+        # URL -> hash de la imagen ya descargada, o lista de rutas que esperan a su descarga
+        self._por_url = {}
+        # Descargas fallidas pendientes del reintento final
+        self._aplazadas = []
+        self._ultima_pasada = False
+        self._lock = threading.Lock()
+        self._hilos = [
+            threading.Thread(target=self._trabajar, name=f"imagenes-{n}", daemon=True)
+            for n in range(trabajadores)
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def _trabajar(self):
+        while True:
+            tarea = self.cola.get()
+            try:
+                if tarea is None:
+                    return
+                url, save_path = tarea
+                ok = download_image(url, save_path, self.session, self.cache, self.almacen, self.metricas)
+                with self._lock:
+                    if not ok and not self._ultima_pasada:
+                        # Las rutas que esperan a esta URL siguen esperando al reintento
+                        self._aplazadas.append(tarea)
+                        continue
+                    if ok:
+                        self.descargadas += 1
+                    else:
+                        self.fallidas += 1
+                if self.almacen is not None:
+                    self._resolver_esperas(url, save_path, ok)
+            finally:
+                self.cola.task_done()
+
+    def _resolver_esperas(self, url, save_path, ok):
+        digest = self.almacen.hash_de(save_path) if ok else None
+        with self._lock:
+            esperando = self._por_url.pop(url, [])
+            if digest is not None:
+                self._por_url[url] = digest
+            else:
+                # Si la descarga falla, una petición posterior de la misma URL lo vuelve a intentar
+                self.fallidas += len(esperando)
+                return
+        for destino in esperando:
+            self._enlazar(url, digest, destino)
+
+    def _enlazar(self, url, digest, destino):
+        try:
+            self.almacen.enlazar(digest, destino)
+            print(f"Imagen enlazada: {destino}")
+            with self._lock:
+                self.enlazadas += 1
+        except OSError as e:
+            print(f"Error al enlazar imagen {url} en {destino}: {e}")
+            with self._lock:
+                self.fallidas += 1
+
+    def encolar(self, url, save_path):
+        if self.almacen is not None:
+            with self._lock:
+                estado = self._por_url.get(url)
+                if estado is None:
+                    self._por_url[url] = []
+                elif isinstance(estado, list):
+                    estado.append(save_path)
+                    return
+            if estado is not None:
+                self._enlazar(url, estado, save_path)
+                return
+        self.cola.put((url, save_path))
+
+    def cerrar(self):
+        """Espera a que terminen todas las descargas pendientes y libera la sesión."""
+        self.cola.join()
+        with self._lock:
+            aplazadas, self._aplazadas = self._aplazadas, []
+            self._ultima_pasada = True
+        if aplazadas:
+            print(f"Reintentando {len(aplazadas)} imágenes que fallaron")
+            for tarea in aplazadas:
+                self.cola.put(tarea)
+        for _ in self._hilos:
+            self.cola.put(None)
+        for hilo in self._hilos:
+            hilo.join()
+        self.session.close()
+        return self.descargadas, self.fallidas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
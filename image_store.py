@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+
+def _hash_fichero(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+# Almacén de imágenes direccionado por contenido
+class AlmacenImagenes:
+    """
+    Cada imagen se guarda una sola vez en `directorio/ab/abcdef....jpg`, con el sha256 de
+    su contenido como nombre. Las rutas que usa la aplicación (`tomos/{id}/{n}.jpg`,
+    `images/portadas/{id}.jpg`) son enlaces duros a ese fichero, o copias si el sistema de
+    ficheros no admite enlaces. `manifest.json` guarda qué hash corresponde a cada ruta.
+
+    Las rutas nunca se modifican en el sitio: siempre se sustituyen con `os.replace`, para
+    no alterar el contenido compartido con otras rutas.
+    """
+
+    def __init__(self, directorio="imagenes_cas"):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.manifest_path = os.path.join(directorio, "manifest.json")
+        self._lock = threading.Lock()
+        self.rutas = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.rutas = json.load(f)
+
+    def ruta_blob(self, digest, extension=".jpg"):
+        return os.path.join(self.directorio, digest[:2], f"{digest}{extension}")
+
+    def hash_de(self, destino):
+        with self._lock:
+            return self.rutas.get(destino)
+
+    def guardar(self, tmp_path, digest, destino):
+        """Mueve al almacén un fichero recién descargado (si no estaba ya) y lo enlaza en `destino`."""
+        blob = self.ruta_blob(digest, os.path.splitext(destino)[1])
+        if os.path.exists(blob):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(tmp_path, blob)
+        self.enlazar(digest, destino)
+
+    def registrar(self, destino):
+        """Incorpora al almacén una imagen que ya estaba en `destino` (descargas anteriores)."""
+        digest = _hash_fichero(destino)
+        blob = self.ruta_blob(digest, os.path.splitext(destino)[1])
+        if os.path.exists(blob):
+            self.enlazar(digest, destino)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            self._enlazar_fichero(destino, blob)
+            with self._lock:
+                self.rutas[destino] = digest
+        return digest
+
+    def enlazar(self, digest, destino):
+        blob = self.ruta_blob(digest, os.path.splitext(destino)[1])
+        if not (os.path.exists(destino) and os.path.samefile(blob, destino)):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            self._enlazar_fichero(blob, destino)
+        with self._lock:
+            self.rutas[destino] = digest
+
+    @staticmethod
+    def _enlazar_fichero(origen, destino):
+        tmp = f"{destino}.enlace"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        try:
+            os.link(origen, tmp)
+        except OSError:
+            shutil.copyfile(origen, tmp)
+        os.replace(tmp, destino)
+
+    def purgar(self):
+        """Borra los ficheros del almacén a los que ya no apunta ninguna ruta."""
+        with self._lock:
+            usados = set(self.rutas.values())
+        borrados = 0
+        for subdirectorio in os.listdir(self.directorio):
+            ruta_sub = os.path.join(self.directorio, subdirectorio)
+            if not os.path.isdir(ruta_sub):
+                continue
+            for nombre in os.listdir(ruta_sub):
+                if os.path.splitext(nombre)[0] not in usados:
+                    os.remove(os.path.join(ruta_sub, nombre))
+                    borrados += 1
+        return borrados
+
+    def guardar_manifest(self):
+        with self._lock:
+            rutas = dict(sorted(self.rutas.items()))
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(rutas, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def estadisticas(self):
+        """Devuelve (rutas, imágenes distintas)."""
+        with self._lock:
+            return len(self.rutas), len(set(self.rutas.values()))
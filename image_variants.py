@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from json_stream import leer_registros
+
+# Pillow solo hace falta para esta etapa, así que es una dependencia opcional
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+    features = None
+
+
+# Anchos (en píxeles) de las variantes; el más pequeño sirve de miniatura para los carruseles
+ANCHOS_POR_DEFECTO = (160, 320, 640)
+FORMATOS_POR_DEFECTO = ("webp", "avif")
+CALIDAD = {"webp": 80, "avif": 50}
+MANIFEST_POR_DEFECTO = "imagenes_manifest.json"
+# Las variantes van en un árbol aparte para no mezclarlas con tomos/ (y con tomos.zip)
+DIRECTORIO_VARIANTES = "variantes"
+
+
+def formatos_soportados(formatos):
+    if Image is None:
+        raise RuntimeError("La generación de variantes necesita Pillow: pip install Pillow")
+    disponibles = [f for f in formatos if features.check(f)]
+    for formato in set(formatos) - set(disponibles):
+        print(f"Pillow no soporta {formato} en este sistema; se omiten esas variantes")
+    return disponibles
+
+
+def hash_fichero(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+# Ruta de una variante: la de la original bajo variantes/, con el ancho y el formato en el nombre
+# (ej: "/images/portadas/1.jpg" -> "/variantes/images/portadas/1-320.webp")
+def ruta_variante(ruta, ancho, formato):
+    base, _ = os.path.splitext(ruta)
+    barra = '/' if ruta.startswith('/') else ''
+    return f"{barra}{DIRECTORIO_VARIANTES}/{base.lstrip('/')}-{ancho}.{formato}"
+
+
+# Generar las variantes de una imagen (se ejecuta en los procesos del pool)
+def generar_variantes(ruta_json, ruta_local, anchos, formatos, entrada_anterior=None):
+    """
+    Devuelve (ruta_json, entrada del manifest, True si se ha generado algo). Si el hash de
+    la imagen original coincide con el de `entrada_anterior` y sus variantes siguen en
+    disco, no se vuelve a procesar.
+    """
+    hash_origen = hash_fichero(ruta_local)
+    if entrada_anterior and entrada_anterior["hash"] == hash_origen and all(
+        os.path.exists(v["ruta"].lstrip('/')) for v in entrada_anterior["variantes"]
+    ):
+        return ruta_json, entrada_anterior, False
+
+    variantes = []
+    with Image.open(ruta_local) as imagen:
+        imagen = imagen.convert("RGBA" if imagen.mode in ("RGBA", "LA", "P") else "RGB")
+        ancho_original, alto_original = imagen.size
+        # No ampliar: solo anchos menores que el original (o el propio original si es pequeña)
+        anchos_validos = [a for a in anchos if a < ancho_original] or [ancho_original]
+        for ancho in anchos_validos:
+            alto = max(1, round(alto_original * ancho / ancho_original))
+            redimensionada = imagen if ancho == ancho_original else imagen.resize((ancho, alto), Image.LANCZOS)
+            for formato in formatos:
+                destino = ruta_variante(ruta_json, ancho, formato)
+                os.makedirs(os.path.dirname(destino.lstrip('/')), exist_ok=True)
+                redimensionada.save(destino.lstrip('/'), formato.upper(), quality=CALIDAD.get(formato, 80))
+                variantes.append({"ancho": ancho, "alto": alto, "formato": formato, "ruta": destino})
+
+    entrada = {"hash": hash_origen, "ancho": ancho_original, "alto": alto_original, "variantes": variantes}
+    return ruta_json, entrada, True
+
+
+# Rutas de imagen (tal como aparecen en los JSON) de mangas y volúmenes
+def rutas_imagenes(mangas_json="mangas_detailed.jsonl", volumes_json="volumes.jsonl"):
+    rutas = []
+    for ruta_json, campo in ((mangas_json, "foto_portada"), (volumes_json, "imagen")):
+        if not os.path.exists(ruta_json):
+            continue
+        rutas.extend(registro[campo] for registro in leer_registros(ruta_json) if registro.get(campo))
+    return rutas
+
+
+# Etapa de post-procesado: variantes de todas las imágenes descargadas y manifest
+def procesar_imagenes(rutas, manifest_path=MANIFEST_POR_DEFECTO, anchos=ANCHOS_POR_DEFECTO,
+                      formatos=FORMATOS_POR_DEFECTO, procesos=None):
+    """
+    Genera para cada imagen varias anchuras en WebP/AVIF usando un pool de procesos y
+    escribe un manifest {ruta original: {hash, ancho, alto, variantes}} para que el
+    frontend pueda servir la variante adecuada. Las imágenes cuyo hash no ha cambiado
+    desde el último manifest se saltan.
+    """
+    formatos = formatos_soportados(formatos)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    # Solo las imágenes que se han descargado realmente
+    tareas = []
+    for ruta_json in dict.fromkeys(rutas):
+        ruta_local = ruta_json.lstrip('/')
+        if os.path.exists(ruta_local):
+            tareas.append((ruta_json, ruta_local, anchos, formatos, manifest.get(ruta_json)))
+
+    generadas = 0
+    errores = 0
+    nuevo_manifest = {}
+    # Sin fork: el proceso que llama puede tener hilos en marcha (descargas, progreso)
+    arranque = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context(arranque)) as pool:
+        futuros = [pool.submit(generar_variantes, *tarea) for tarea in tareas]
+        for futuro, tarea in zip(futuros, tareas):
+            try:
+                ruta_json, entrada, generado = futuro.result()
+            except Exception as e:
+                print(f"Error al generar variantes de {tarea[1]}: {e}")
+                errores += 1
+                continue
+            nuevo_manifest[ruta_json] = entrada
+            generadas += generado
+
+    tmp = f"{manifest_path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(nuevo_manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, manifest_path)
+
+    print(f"Variantes generadas para {generadas} imágenes; {len(tareas) - generadas - errores} sin cambios, "
+          f"{errores} con errores. Manifest guardado en {manifest_path}")
+    return generadas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera variantes reducidas WebP/AVIF de portadas y tomos")
+    parser.add_argument("--mangas", default="mangas_detailed.jsonl", help="mangas_detailed.jsonl o .json")
+    parser.add_argument("--volumes", default="volumes.jsonl", help="volumes.jsonl o .json")
+    parser.add_argument("--manifest", default=MANIFEST_POR_DEFECTO)
+    parser.add_argument("--anchos", default=",".join(map(str, ANCHOS_POR_DEFECTO)),
+                        help="Anchos separados por comas")
+    parser.add_argument("--formatos", default=",".join(FORMATOS_POR_DEFECTO), help="Formatos separados por comas")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    args = parser.parse_args()
+
+    procesar_imagenes(rutas_imagenes(args.mangas, args.volumes), args.manifest,
+                      anchos=tuple(int(a) for a in args.anchos.split(",")),
+                      formatos=tuple(args.formatos.split(",")), procesos=args.procesos)
@@ -0,0 +1,59 @@
+import json
+import os
+import textwrap
+
+
+# Escritor de JSON Lines: un registro por línea, escrito en cuanto se produce
+class EscritorJSONL:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.registros = 0
+        self._f = open(ruta, 'w', encoding='utf-8')
+
+    def escribir(self, registro):
+        self._f.write(json.dumps(registro, ensure_ascii=False))
+        self._f.write('\n')
+        self.registros += 1
+
+    def cerrar(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# Leer un fichero JSON Lines registro a registro
+def leer_jsonl(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+# Leer los registros de un fichero de salida, sea JSON Lines o un array JSON
+def leer_registros(ruta):
+    if ruta.endswith('.jsonl'):
+        return leer_jsonl(ruta)
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return iter(json.load(f))
+
+
+# Envolver un JSONL en un array JSON sin cargarlo entero en memoria
+def jsonl_a_json(ruta_jsonl, ruta_json, indent=2):
+    """
+    El resultado es idéntico, byte a byte, al de `json.dump(lista, f, ensure_ascii=False,
+    indent=indent)`, de modo que los consumidores de los JSON no notan la diferencia.
+    """
+    prefijo = ' ' * indent
+    tmp = f"{ruta_json}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as out:
+        vacio = True
+        for registro in leer_jsonl(ruta_jsonl):
+            out.write('[\n' if vacio else ',\n')
+            out.write(textwrap.indent(json.dumps(registro, ensure_ascii=False, indent=indent), prefijo))
+            vacio = False
+        out.write('[]' if vacio else '\n]')
+    os.replace(tmp, ruta_json)
@@ -1,5 +1,13 @@
 const fs = require('fs');
 const path = require('path');
+const { cargarAgregados } = require('../lib/agregados');
+const { abrirCatalogo } = require('../lib/catalogo');
+const { abrirIndiceBusqueda } = require('../lib/indiceBusqueda');
+
+// Índice de búsqueda, agregados por autor y catálogo generados por el extractor, si existen
+const indiceBusqueda = abrirIndiceBusqueda();
+const agregados = cargarAgregados();
+const catalogo = abrirCatalogo();
 
 // Function to read data from mangas.json
 const readMangasFromJSON = () => {
@@ -10,10 +18,10 @@ const readMangasFromJSON = () => {
 // Obtener todos los autores
 const getAllAuthors = async (req, res) => {
   try {
-    const mangas = readMangasFromJSON();
-
-    // Extraer autores únicos y ordenarlos alfabéticamente
-    const uniqueAuthors = [...new Set(mangas.map(manga => manga.autor))].sort();
+    // Extraer autores únicos y ordenarlos alfabéticamente (con los agregados, ya lo están)
+    const uniqueAuthors = agregados
+      ? agregados.autores
+      : [...new Set(readMangasFromJSON().map(manga => manga.autor))].sort();
     
     res.status(200).json({
       status: 'success',
@@ -34,13 +42,18 @@ const getAllAuthors = async (req, res) => {
 // Obtener información de un autor específico
 const getAuthorInfo = async (req, res) => {
   try {
-    const mangas = readMangasFromJSON();
     const authorName = req.params.name;
     
-    // Filtrar mangas por autor
-    const authorMangas = mangas.filter(manga => 
-      manga.autor.toLowerCase() === authorName.toLowerCase()
-    );
+    // Filtrar mangas por autor (con los agregados y el catálogo, sin recorrer todos los mangas)
+    let authorMangas;
+    if (agregados && catalogo) {
+      const grupo = agregados.por_autor[authorName.toLowerCase()];
+      authorMangas = grupo ? grupo.ids.map(id => catalogo.getById(id)).filter(manga => manga !== undefined) : [];
+    } else {
+      authorMangas = readMangasFromJSON().filter(manga => 
+        manga.autor.toLowerCase() === authorName.toLowerCase()
+      );
+    }
     
     if (authorMangas.length === 0) {
       return res.status(404).json({
@@ -78,15 +91,21 @@ const searchAuthors = async (req, res) => {
       });
     }
     
-    const mangas = readMangasFromJSON();
-    
-    // Extraer autores únicos
-    const allAuthors = [...new Set(mangas.map(manga => manga.autor))];
-    
-    // Filtrar autores por término de búsqueda
-    const searchResults = allAuthors.filter(author => 
-      author.toLowerCase().includes(query.toLowerCase())
-    ).sort();
+    let searchResults;
+    if (indiceBusqueda) {
+      // Autores con alguna palabra que empieza por cada palabra de la búsqueda
+      searchResults = indiceBusqueda.searchAuthors(query);
+    } else {
+      const mangas = readMangasFromJSON();
+      
+      // Extraer autores únicos
+      const allAuthors = [...new Set(mangas.map(manga => manga.autor))];
+      
+      // Filtrar autores por término de búsqueda
+      searchResults = allAuthors.filter(author => 
+        author.toLowerCase().includes(query.toLowerCase())
+      ).sort();
+    }
     
     res.status(200).json({
       status: 'success',
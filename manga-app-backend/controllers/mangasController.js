@@ -1,9 +1,31 @@
-const mangasData = require('../data/mangas.json');
-const volumesData = require('../data/volumes.json');
+const { cargarAgregados } = require('../lib/agregados');
+const { abrirCatalogo } = require('../lib/catalogo');
+const { cargarEdiciones } = require('../lib/ediciones');
+const { abrirIndiceBusqueda } = require('../lib/indiceBusqueda');
+
+// Catálogo indexado que genera el extractor (data/catalogo.bin): búsquedas por ID en O(1)
+// y órdenes por autor y fecha ya calculados. Si no existe, se usan los JSON
+const catalogo = abrirCatalogo();
+// Índice de búsqueda por prefijos de palabra (data/indice_busqueda.bin), sin tildes ni mayúsculas
+const indiceBusqueda = abrirIndiceBusqueda();
+// Recientes, novedades y autores ya calculados (data/agregados.json)
+const agregados = cargarAgregados();
+// Ediciones de una misma obra agrupadas por el extractor (data/ediciones.json)
+const ediciones = cargarEdiciones();
+
+// El JSON completo solo se carga cuando algún endpoint lo necesita
+let mangasData = null;
+const getMangasData = () => {
+  if (!mangasData) mangasData = require('../data/mangas.json');
+  return mangasData;
+};
 
 // Función para obtener detalles completos de mangas por IDs
 const getMangasDetailsByIds = (mangaIds) => {
-  return mangaIds.map(id => mangasData.find(manga => manga.id === id)).filter(manga => manga !== undefined);
+  if (catalogo) {
+    return mangaIds.map(id => catalogo.getById(id)).filter(manga => manga !== undefined);
+  }
+  return mangaIds.map(id => getMangasData().find(manga => manga.id === id)).filter(manga => manga !== undefined);
 };
 
 // Function to parse the date string (MM/YYYY) and return a Date object
@@ -31,12 +53,13 @@ function getRandomElements(arr, num) {
 // Obtener todos los mangas
 const getAllMangas = async (req, res) => {
   try {
+    const mangas = getMangasData();
     
     res.status(200).json({
       status: 'success',
-      results: mangasData.length,
+      results: mangas.length,
       data: {
-        mangas: mangasData
+        mangas
       }
     });
   } catch (error) {
@@ -51,8 +74,8 @@ const getAllMangas = async (req, res) => {
 // Obtener un manga por ID
 const getMangaById = async (req, res) => {
   try {
-    
-    const manga = mangasData.find(m => m.id === parseInt(req.params.id));
+    const id = parseInt(req.params.id);
+    const manga = catalogo ? catalogo.getById(id) : getMangasData().find(m => m.id === id);
     
     if (!manga) {
       return res.status(404).json({
@@ -76,10 +99,41 @@ const getMangaById = async (req, res) => {
   }
 };
 
+// Obtener las otras ediciones de un manga (la misma obra en otra editorial, formato...)
+const getMangaEditions = async (req, res) => {
+  try {
+    const id = parseInt(req.params.id);
+    const otras = ediciones ? getMangasDetailsByIds(ediciones.otrasEdiciones(id)) : [];
+
+    res.status(200).json({
+      status: 'success',
+      results: otras.length,
+      data: {
+        work_id: ediciones ? ediciones.workId(id) ?? null : null,
+        mangas: otras
+      }
+    });
+  } catch (error) {
+    console.error('Error al obtener las ediciones del manga:', error);
+    res.status(500).json({
+      status: 'error',
+      message: 'Error al obtener las ediciones del manga'
+    });
+  }
+};
+
 // Obtener mangas por autor
 const getMangasByAuthor = async (req, res) => {
   try {
-    const authorMangas = mangasData.filter(m => m.autor.toLowerCase() === req.params.author.toLowerCase());
+    let authorMangas;
+    if (agregados) {
+      const grupo = agregados.por_autor[req.params.author.toLowerCase()];
+      authorMangas = grupo ? getMangasDetailsByIds(grupo.ids) : [];
+    } else if (catalogo) {
+      authorMangas = catalogo.getByAuthor(req.params.author);
+    } else {
+      authorMangas = getMangasData().filter(m => m.autor.toLowerCase() === req.params.author.toLowerCase());
+    }
     
     res.status(200).json({
       status: 'success',
@@ -108,15 +162,18 @@ const searchMangas = async (req, res) => {
         message: 'Se requiere un término de búsqueda'
       });
     }
-    const searchResults = mangasData.filter(manga => {
-      const searchTerm = query.toLowerCase();
-      return (
-        manga.titulo.toLowerCase().includes(searchTerm) ||
-        manga.sinopsis.toLowerCase().includes(searchTerm) ||
-        manga.autor.toLowerCase().includes(searchTerm) 
+    // Con el índice: mangas con alguna palabra que empieza por cada palabra de la búsqueda
+    const searchResults = indiceBusqueda
+      ? getMangasDetailsByIds(indiceBusqueda.searchMangaIds(query))
+      : getMangasData().filter(manga => {
+        const searchTerm = query.toLowerCase();
+        return (
+          manga.titulo.toLowerCase().includes(searchTerm) ||
+          manga.sinopsis.toLowerCase().includes(searchTerm) ||
+          manga.autor.toLowerCase().includes(searchTerm) 
 
-      );
-    });
+        );
+      });
     
     res.status(200).json({
       status: 'success',
@@ -137,9 +194,17 @@ const searchMangas = async (req, res) => {
 // Obtener mangas recientes
 const getRecentMangas = async (req, res) => {
   try {
+    // Con los agregados, la respuesta ya está calculada (en total o para un tipo: ?tipo=bl)
+    if (agregados) {
+      const recientes = agregados.recientes_por_mes[req.query.tipo ?? 'todos'] || { months: [], groupedMangas: {} };
+      return res.status(200).json({
+        status: 'success',
+        data: recientes
+      });
+    }
     
     // Ordenar por fecha de publicación (más recientes primero)
-    const sortedMangas = [...mangasData].sort((a, b) => {
+    const sortedMangas = catalogo ? catalogo.getMostRecent(10) : [...getMangasData()].sort((a, b) => {
       if(!a.fecha || !b.fecha) return 0
       return compareDates(b.fecha,a.fecha)
     }).slice(0,10);
@@ -178,12 +243,12 @@ const getRecentMangas = async (req, res) => {
 const getCarouselData = async (req, res) => {
   try {
     /*const popularMangaIds = [
-      "2125", "2236", "340", "713", "201",
-      "1202", "2101", "1103", "2947",
-      "599", "1353", "1027", "2244", "294",
-      "1447", "2902", "3105",
-      "1242", "319", "1460", "446", "2766",
-      "2961", "1098", "3178"
+      "1647", "5", "2", "34", "1606",
+      "3101", "2255", "50", "1988",
+      "687", "1594", "45", "2277", "1505",
+      "2695", "2857", "1872",
+      "3967", "2527", "3404", "3485", "3451",
+      "3996", "465", "2078"
     ];
 
     const recommendedMangaIds = [
@@ -196,10 +261,14 @@ const getCarouselData = async (req, res) => {
       "Violet Evergarden"
     ];
     */
-    const popularMangaIds = [2125, 2236, 340, 713, 201, 1202, 2101, 1103, 2947, 599, 1353, 1027];
-    const recommendedMangaIds = [2244, 294, 1447, 2902, 3105, 1242, 319, 1460, 446, 2766, 2961, 1098, 3178];
+    const popularMangaIds = [1647, 5, 2, 34, 1606, 3101, 2255, 50, 1988, 687, 1594, 45];
+    const recommendedMangaIds = [2277, 1505, 2695, 2857, 1872, 3967, 2527, 3404, 3485, 3451, 3996, 465, 2078];
 
-    const newReleasesMangas = [...mangasData].filter(manga => manga.fecha) // eliminamos los que no tienen fecha
+    const newReleasesMangas = agregados
+    ? agregados.novedades // ya calculadas por el extractor
+    : catalogo
+    ? catalogo.getMostRecent(10).filter(manga => manga.fecha).reverse() // orden por fecha ya calculado
+    : [...getMangasData()].filter(manga => manga.fecha) // eliminamos los que no tienen fecha
     .sort((a, b) => compareDates(a.fecha, b.fecha)) // usa la lógica ya definida
     .slice(0, 10)
     .reverse(); 
@@ -230,7 +299,7 @@ const getCarouselData = async (req, res) => {
 
 const getPopularMangas = async (req, res) => {
   try {
-    const popularMangaIds = [2125, 2236, 340, 713, 201, 1202, 2101, 1103, 2947, 599, 1353, 1027];
+    const popularMangaIds = [1647, 5, 2, 34, 1606, 3101, 2255, 50, 1988, 687, 1594, 45];
 
     const existingMangas = getMangasDetailsByIds(popularMangaIds).filter(Boolean);
     const randomPopularMangas = getRandomElements(existingMangas, 10); // ya con datos válidos
@@ -254,6 +323,7 @@ const getPopularMangas = async (req, res) => {
 module.exports = {
   getAllMangas,
   getMangaById,
+  getMangaEditions,
   getMangasByAuthor,
   searchMangas,
   getRecentMangas,
@@ -0,0 +1,18 @@
+const fs = require('fs');
+const path = require('path');
+
+// Agregados que genera catalog_aggregates.py: recientes (en total y por tipo), novedades
+// del carrusel y autores con sus mangas, ya calculados
+const RUTA_AGREGADOS = path.join(__dirname, '../data/agregados.json');
+
+// Los controladores de mangas y de autores comparten los mismos agregados
+const cargados = new Map();
+
+const cargarAgregados = (ruta = RUTA_AGREGADOS) => {
+  if (!cargados.has(ruta)) {
+    cargados.set(ruta, fs.existsSync(ruta) ? JSON.parse(fs.readFileSync(ruta, 'utf8')) : null);
+  }
+  return cargados.get(ruta);
+};
+
+module.exports = { cargarAgregados };
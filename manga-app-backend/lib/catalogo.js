@@ -0,0 +1,109 @@
+const fs = require('fs');
+const path = require('path');
+
+// Lector de catalogo.bin, el catálogo indexado que genera catalog_export.py
+// (el formato está descrito al principio de ese fichero)
+const RUTA_CATALOGO = path.join(__dirname, '../data/catalogo.bin');
+const VERSION = 1;
+const TAM_CABECERA = 36;
+const TAM_REGISTRO = 20;
+const TAM_HUECO = 8;
+const HUECO_VACIO = 0xFFFFFFFF;
+const MULTIPLICADOR_HASH = 2654435761;
+
+// Los controladores de mangas y de autores comparten el mismo catálogo abierto
+const abiertos = new Map();
+
+const abrirCatalogo = (ruta = RUTA_CATALOGO) => {
+  if (!abiertos.has(ruta)) abiertos.set(ruta, leerCatalogo(ruta));
+  return abiertos.get(ruta);
+};
+
+const leerCatalogo = (ruta) => {
+  if (!fs.existsSync(ruta)) return null;
+
+  // Una sola lectura: los registros se decodifican solo cuando se piden
+  const buffer = fs.readFileSync(ruta);
+  if (buffer.length < TAM_CABECERA || buffer.toString('latin1', 0, 4) !== 'MCAT' || buffer.readUInt16LE(4) !== VERSION) {
+    throw new Error(`${ruta} no es un catálogo de la versión ${VERSION}`);
+  }
+  const [numero, capacidad, inicioRegistros, inicioHash, inicioPorAutor, inicioPorFecha] =
+    [8, 12, 16, 20, 24, 28].map(offset => buffer.readUInt32LE(offset));
+
+  const leerJSON = (desplazamiento, longitud) =>
+    JSON.parse(buffer.toString('utf8', desplazamiento, desplazamiento + longitud));
+
+  const mangaEn = (posicion) => {
+    const registro = inicioRegistros + posicion * TAM_REGISTRO;
+    return leerJSON(buffer.readUInt32LE(registro + 4), buffer.readUInt32LE(registro + 8));
+  };
+
+  const volumenesEn = (posicion) => {
+    const registro = inicioRegistros + posicion * TAM_REGISTRO;
+    return leerJSON(buffer.readUInt32LE(registro + 12), buffer.readUInt32LE(registro + 16));
+  };
+
+  // Tabla hash con sondeo lineal: O(1) de media
+  const posicionDe = (id) => {
+    if (!Number.isInteger(id) || id < 0 || id >= HUECO_VACIO) return -1;
+    let hueco = (Math.imul(id, MULTIPLICADOR_HASH) >>> 0) & (capacidad - 1);
+    for (;;) {
+      const idHueco = buffer.readUInt32LE(inicioHash + hueco * TAM_HUECO);
+      if (idHueco === id) return buffer.readUInt32LE(inicioHash + hueco * TAM_HUECO + 4);
+      if (idHueco === HUECO_VACIO) return -1;
+      hueco = (hueco + 1) & (capacidad - 1);
+    }
+  };
+
+  const orden = (inicio) => (desde = 0, hasta = numero) => {
+    const posiciones = [];
+    for (let i = Math.max(desde, 0); i < Math.min(hasta, numero); i++) {
+      posiciones.push(buffer.readUInt32LE(inicio + i * 4));
+    }
+    return posiciones;
+  };
+  const porAutor = orden(inicioPorAutor);
+  const porFecha = orden(inicioPorFecha);
+
+  // Búsqueda binaria en el orden por autor (los autores vacíos van al final)
+  const autorEn = (i) => (mangaEn(buffer.readUInt32LE(inicioPorAutor + i * 4)).autor || '').toLowerCase();
+  const primeroNoMenor = (autor) => {
+    let bajo = 0;
+    let alto = numero;
+    while (bajo < alto) {
+      const medio = (bajo + alto) >>> 1;
+      const actual = autorEn(medio);
+      if (actual !== '' && actual < autor) bajo = medio + 1;
+      else alto = medio;
+    }
+    return bajo;
+  };
+
+  return {
+    numero,
+    getById: (id) => {
+      const posicion = posicionDe(id);
+      return posicion === -1 ? undefined : mangaEn(posicion);
+    },
+    getVolumesById: (id) => {
+      const posicion = posicionDe(id);
+      return posicion === -1 ? [] : volumenesEn(posicion);
+    },
+    // Mangas del autor (sin distinguir mayúsculas), ordenados por título
+    getByAuthor: (autor) => {
+      const buscado = autor.toLowerCase();
+      if (buscado === '') return [];
+      const mangas = [];
+      for (let i = primeroNoMenor(buscado); i < numero && autorEn(i) === buscado; i++) {
+        mangas.push(mangaEn(buffer.readUInt32LE(inicioPorAutor + i * 4)));
+      }
+      return mangas;
+    },
+    // Los `cantidad` mangas más recientes (los que no tienen fecha van al final)
+    getMostRecent: (cantidad) => porFecha(0, cantidad).map(mangaEn),
+    porAutor,
+    porFecha
+  };
+};
+
+module.exports = { abrirCatalogo };
@@ -0,0 +1,18 @@
+const fs = require('fs');
+const path = require('path');
+
+// Índice de ediciones que genera edition_clusters.py: el work_id de cada manga y, para
+// cada obra con más de una edición, los IDs de todas ellas
+const RUTA_EDICIONES = path.join(__dirname, '../data/ediciones.json');
+
+const cargarEdiciones = (ruta = RUTA_EDICIONES) => {
+  if (!fs.existsSync(ruta)) return null;
+  const { work_id: workIds, obras } = JSON.parse(fs.readFileSync(ruta, 'utf8'));
+  return {
+    workId: (id) => workIds[id],
+    // IDs de las demás ediciones de la misma obra (vacío si no tiene)
+    otrasEdiciones: (id) => (obras[workIds[id]] || []).filter(otro => otro !== id),
+  };
+};
+
+module.exports = { cargarEdiciones };
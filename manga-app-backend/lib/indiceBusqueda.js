@@ -0,0 +1,113 @@
+const fs = require('fs');
+const path = require('path');
+
+// Lector de indice_busqueda.bin, el índice por prefijos de palabra que genera search_index.py
+// (el formato está descrito al principio de ese fichero)
+const RUTA_INDICE = path.join(__dirname, '../data/indice_busqueda.bin');
+const VERSION = 1;
+const TAM_CABECERA_BLOQUE = 20;
+const TAM_TERMINO = 16;
+
+// Igual que plegar() en search_index.py: sin tildes ni diéresis y en minúsculas
+const plegar = (texto) => (texto || '').normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase();
+const palabras = (texto) => plegar(texto).match(/[\p{L}\p{N}]+/gu) || [];
+
+const leerBloque = (buffer, inicio) => {
+  const [numeroDocumentos, numeroTerminos, longitudDocumentos, longitudTextos] =
+    [0, 4, 8, 12].map(offset => buffer.readUInt32LE(inicio + offset));
+  const inicioDocumentos = inicio + TAM_CABECERA_BLOQUE;
+  const inicioTabla = inicioDocumentos + longitudDocumentos;
+  const inicioTextos = inicioTabla + numeroTerminos * TAM_TERMINO;
+  const inicioPostings = inicioTextos + longitudTextos;
+
+  const termino = (i) => {
+    const entrada = inicioTabla + i * TAM_TERMINO;
+    const desplazamiento = inicioTextos + buffer.readUInt32LE(entrada);
+    return buffer.subarray(desplazamiento, desplazamiento + buffer.readUInt32LE(entrada + 4));
+  };
+
+  const anadirPostings = (i, resultado) => {
+    const entrada = inicioTabla + i * TAM_TERMINO;
+    let cursor = inicioPostings + buffer.readUInt32LE(entrada + 8);
+    const cantidad = buffer.readUInt32LE(entrada + 12);
+    let actual = 0;
+    for (let n = 0; n < cantidad; n++) {
+      let delta = 0;
+      let multiplicador = 1;
+      let byte;
+      do {
+        byte = buffer[cursor++];
+        delta += (byte & 0x7F) * multiplicador;
+        multiplicador *= 128;
+      } while (byte >= 0x80);
+      actual += delta;
+      resultado.add(actual);
+    }
+  };
+
+  // Los términos están ordenados por sus bytes UTF-8: los que empiezan por un prefijo
+  // forman un rango contiguo que empieza en el primero que no es menor que él
+  const conPrefijo = (prefijo) => {
+    const bytes = Buffer.from(prefijo, 'utf8');
+    let bajo = 0;
+    let alto = numeroTerminos;
+    while (bajo < alto) {
+      const medio = (bajo + alto) >>> 1;
+      if (Buffer.compare(termino(medio), bytes) < 0) bajo = medio + 1;
+      else alto = medio;
+    }
+    const resultado = new Set();
+    for (let i = bajo; i < numeroTerminos; i++) {
+      const actual = termino(i);
+      if (actual.length < bytes.length || Buffer.compare(actual.subarray(0, bytes.length), bytes) !== 0) break;
+      anadirPostings(i, resultado);
+    }
+    return resultado;
+  };
+
+  // Posiciones, en orden, de los documentos que contienen todas las palabras de la consulta
+  const buscar = (consulta) => {
+    let resultado = null;
+    for (const palabra of palabras(consulta)) {
+      const coincidencias = conPrefijo(palabra);
+      resultado = resultado === null
+        ? coincidencias
+        : new Set([...resultado].filter(posicion => coincidencias.has(posicion)));
+      if (resultado.size === 0) return [];
+    }
+    return resultado === null ? [] : [...resultado].sort((a, b) => a - b);
+  };
+
+  return { numeroDocumentos, inicioDocumentos, longitudDocumentos, buscar };
+};
+
+// Los controladores de mangas y de autores comparten el mismo índice abierto
+const abiertos = new Map();
+
+const abrirIndiceBusqueda = (ruta = RUTA_INDICE) => {
+  if (!abiertos.has(ruta)) abiertos.set(ruta, leerIndice(ruta));
+  return abiertos.get(ruta);
+};
+
+const leerIndice = (ruta) => {
+  if (!fs.existsSync(ruta)) return null;
+
+  const buffer = fs.readFileSync(ruta);
+  if (buffer.toString('latin1', 0, 4) !== 'MBUS' || buffer.readUInt16LE(4) !== VERSION) {
+    throw new Error(`${ruta} no es un índice de búsqueda de la versión ${VERSION}`);
+  }
+  const mangas = leerBloque(buffer, buffer.readUInt32LE(8));
+  const autores = leerBloque(buffer, buffer.readUInt32LE(12));
+  const nombresAutores = JSON.parse(buffer.toString('utf8', autores.inicioDocumentos,
+    autores.inicioDocumentos + autores.longitudDocumentos));
+
+  return {
+    // IDs de los mangas que coinciden, en el orden de la salida del extractor
+    searchMangaIds: (consulta) =>
+      mangas.buscar(consulta).map(posicion => buffer.readUInt32LE(mangas.inicioDocumentos + posicion * 4)),
+    // Nombres de los autores que coinciden, en orden alfabético
+    searchAuthors: (consulta) => autores.buscar(consulta).map(posicion => nombresAutores[posicion])
+  };
+};
+
+module.exports = { abrirIndiceBusqueda, plegar, palabras };
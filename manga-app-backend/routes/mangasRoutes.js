@@ -10,6 +10,7 @@ router.get('/recent', mangasController.getRecentMangas);
 router.get('/author/:author', mangasController.getMangasByAuthor);
 router.get('/carousels', mangasController.getCarouselData);
 router.get('/popular', mangasController.getPopularMangas);
+router.get('/:id/editions', mangasController.getMangaEditions);
 router.get('/:id', mangasController.getMangaById);
 
 module.exports = router;
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import re
+from urllib.parse import parse_qs, urlsplit
+
+from crawl_journal import DiarioRastreo
+from http_cache import CacheHTTP
+from image_store import AlmacenImagenes
+from json_stream import leer_registros
+
+MAPA_POR_DEFECTO = "manga_ids.json"
+# Los IDs que no salen de la URL se asignan a partir de aquí para no chocar con los de listadomanga
+INICIO_IDS_PROPIOS = 1_000_000
+
+# Rutas locales que llevan el ID del manga
+RUTA_TOMO_RE = re.compile(r'^(/?tomos/)(\d+)(/.*)$')
+RUTA_PORTADA_RE = re.compile(r'^(/?images/portadas/)(\d+)(\.\w+)$')
+
+
+# ID de la colección en listadomanga (coleccion.php?id=123 -> 123), o None
+def id_coleccion(url):
+    valores = parse_qs(urlsplit(url).query).get("id")
+    if valores and valores[0].isdigit():
+        return int(valores[0])
+    return None
+
+
+# IDs estables de los mangas, que no dependen de su posición en la lista de entrada
+class MapaIds:
+    """
+    El ID de cada manga es el de su colección en listadomanga. Las URLs sin ese parámetro
+    (o que repiten el ID de otra de la lista) reciben un ID propio, a partir de
+    `INICIO_IDS_PROPIOS`, que se guarda en `ruta` para que no cambie entre ejecuciones.
+    `estables` indica que los datos del directorio ya usan estos IDs (y no los antiguos
+    por posición), de modo que no hay nada que migrar.
+    """
+
+    def __init__(self, ruta=MAPA_POR_DEFECTO):
+        self.ruta = ruta
+        self.ids = {}
+        self.estables = False
+        self._modificado = False
+        if ruta and os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            self.ids = datos.get("ids", {})
+            self.estables = datos.get("estables", False)
+
+    def asignar(self, mangas):
+        """Devuelve la lista de IDs de `mangas`, en el mismo orden."""
+        ids = []
+        usados = set()
+        for manga in mangas:
+            manga_id = id_coleccion(manga['url'])
+            if manga_id is None or manga_id in usados:
+                manga_id = self.ids.get(manga['url'])
+                if manga_id is None:
+                    manga_id = max([INICIO_IDS_PROPIOS - 1, *self.ids.values()]) + 1
+                    self.ids[manga['url']] = manga_id
+                    self._modificado = True
+            usados.add(manga_id)
+            ids.append(manga_id)
+        return ids
+
+    def guardar(self, forzar=False):
+        if not self.ruta or not (self._modificado or forzar):
+            return
+        tmp = f"{self.ruta}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"ids": self.ids, "estables": self.estables}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.ruta)
+        self._modificado = False
+
+
+# Salidas de una ejecución anterior que pueden llevar los IDs por posición
+SALIDAS_CON_IDS = ('mangas_detailed.json', 'mangas_detailed.jsonl', 'volumes.json', 'volumes.jsonl',
+                   'volumes_fixed.json', 'volumes_fixed.jsonl')
+DIRECTORIOS_CON_IDS = ('tomos', os.path.join('images', 'portadas'))
+
+
+def datos_por_posicion(directorio="."):
+    """Salidas y directorios de imágenes de `directorio` generados antes de los IDs estables."""
+    encontrados = [ruta for ruta in SALIDAS_CON_IDS if os.path.exists(os.path.join(directorio, ruta))]
+    encontrados += [ruta for ruta in DIRECTORIOS_CON_IDS
+                    if os.path.isdir(os.path.join(directorio, ruta)) and os.listdir(os.path.join(directorio, ruta))]
+    return encontrados
+
+
+def _comprobar_sin_datos_por_posicion(ruta_mapa, directorio="."):
+    # Sin el mapa marcado como estable, lo que haya en el directorio usa los IDs por
+    # posición: si se siguiera, tomos/ y las portadas quedarían con los dos esquemas
+    anteriores = datos_por_posicion(directorio)
+    if anteriores:
+        raise RuntimeError(
+            f"Hay datos de una ejecución anterior con IDs por posición ({', '.join(anteriores)}). "
+            f"Migrarlos primero con: python manga_ids.py <lista de mangas con la que se generaron> "
+            f"--mapa-ids {ruta_mapa}")
+
+
+def asignar_ids(mangas, ruta_mapa=MAPA_POR_DEFECTO):
+    mapa = MapaIds(ruta_mapa)
+    ids = mapa.asignar(mangas)
+    if ruta_mapa and not mapa.estables:
+        _comprobar_sin_datos_por_posicion(ruta_mapa)
+        # A partir de aquí los datos generados usan IDs estables
+        mapa.estables = True
+        mapa.guardar(forzar=True)
+    else:
+        mapa.guardar()
+    return ids
+
+
+def fusionar_mapas(ruta_mapa, rutas_shards):
+    """
+    Añade al mapa de `ruta_mapa` los IDs propios de los mapas de los shards que no tenga
+    y lo marca como estable, después de comprobar que el directorio actual no tiene datos
+    con IDs por posición. Todos los shards parten de la misma lista, así que una misma
+    URL con IDs distintos indica que los shards no son de la misma ejecución.
+    """
+    mapa = MapaIds(ruta_mapa)
+    if not mapa.estables:
+        _comprobar_sin_datos_por_posicion(ruta_mapa)
+    for ruta in rutas_shards:
+        for url, manga_id in MapaIds(ruta).ids.items():
+            if mapa.ids.setdefault(url, manga_id) != manga_id:
+                raise ValueError(f"{url} tiene el ID {manga_id} en {ruta} y {mapa.ids[url]} en {ruta_mapa}")
+    mapa.estables = True
+    mapa.guardar(forzar=True)
+
+
+# --- Migración de los datos generados con los IDs por posición ---
+
+def ruta_renumerada(ruta, cambios):
+    """Ruta de tomo o portada con el ID cambiado según `cambios` ({id anterior: id nuevo})."""
+    for patron in (RUTA_TOMO_RE, RUTA_PORTADA_RE):
+        match = patron.match(ruta)
+        if match and int(match.group(2)) in cambios:
+            return f"{match.group(1)}{cambios[int(match.group(2))]}{match.group(3)}"
+    return ruta
+
+
+def renumerar_volumen(volumen, nuevo_id):
+    return dict(volumen, id_manga=nuevo_id, imagen=f"tomos/{nuevo_id}/{volumen['numero']}.jpg")
+
+
+def renumerar_resultado(resultado, nuevo_id):
+    """Resultado de `parse_manga_details` con el ID del manga cambiado en todos sus campos."""
+    return dict(
+        resultado,
+        manga=dict(resultado['manga'], id=nuevo_id, foto_portada=f"/images/portadas/{nuevo_id}.jpg"),
+        volumes=[renumerar_volumen(v, nuevo_id) for v in resultado['volumes']],
+        image_urls=[(nuevo_id, numero, url) for _, numero, url in resultado['image_urls']],
+    )
+
+
+def _renombrar_en_dos_pasos(renombrados):
+    # Los IDs nuevos pueden coincidir con IDs antiguos de otros mangas: primero se apartan
+    # todos con un nombre temporal y después se llevan a su sitio
+    temporales = []
+    for origen, destino in renombrados:
+        if os.path.exists(origen):
+            temporal = f"{origen}.migrando"
+            os.replace(origen, temporal)
+            temporales.append((temporal, destino))
+    for temporal, destino in temporales:
+        os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+        os.replace(temporal, destino)
+    return len(temporales)
+
+
+def _migrar_salida(ruta, campo, cambios):
+    if not os.path.exists(ruta):
+        return
+    registros = list(leer_registros(ruta))
+    for registro in registros:
+        if registro[campo] in cambios:
+            nuevo_id = cambios[registro[campo]]
+            registro[campo] = nuevo_id
+            if campo == "id":
+                registro["foto_portada"] = f"/images/portadas/{nuevo_id}.jpg"
+            else:
+                registro["imagen"] = f"tomos/{nuevo_id}/{registro['numero']}.jpg"
+    tmp = f"{ruta}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        if ruta.endswith('.jsonl'):
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False))
+                f.write('\n')
+        else:
+            json.dump(registros, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, ruta)
+    print(f"Actualizado {ruta}")
+
+
+def migrar(input_json_path, ruta_mapa=MAPA_POR_DEFECTO, cache_dir=".cache_http",
+           diario_path="crawl_journal.sqlite", almacen_dir="imagenes_cas", simular=False):
+    """
+    Convierte los datos generados con IDs por posición (1, 2, 3... según el orden de
+    `input_json_path`, que debe ser la misma lista que los generó) a IDs estables:
+    directorios de tomos/, portadas, JSON y JSON Lines de salida, diario de rastreo,
+    resultados y validadores de la caché HTTP y manifest del almacén de imágenes.
+    """
+    mapa = MapaIds(ruta_mapa)
+    if mapa.estables:
+        print(f"Los datos ya usan IDs estables (según {ruta_mapa}); no hay nada que migrar")
+        return {}
+
+    with open(input_json_path, 'r', encoding='utf-8') as f:
+        mangas_list = json.load(f)
+    nuevos_ids = mapa.asignar(mangas_list)
+    cambios = {posicion: nuevo for posicion, nuevo in enumerate(nuevos_ids, 1) if posicion != nuevo}
+    print(f"{len(cambios)} de {len(mangas_list)} mangas cambian de ID")
+    if simular:
+        for anterior, nuevo in list(cambios.items())[:20]:
+            print(f"  {anterior} -> {nuevo}")
+        return cambios
+
+    # Imágenes en disco (con el almacén de imágenes, renombrar los enlaces basta)
+    renombrados = []
+    for anterior, nuevo in cambios.items():
+        renombrados.append((f"tomos/{anterior}", f"tomos/{nuevo}"))
+        renombrados.append((f"images/portadas/{anterior}.jpg", f"images/portadas/{nuevo}.jpg"))
+    print(f"Renombrados {_renombrar_en_dos_pasos(renombrados)} directorios de tomos y portadas")
+
+    # Salidas del extractor
+    for ruta in ('mangas_detailed.json', 'mangas_detailed.jsonl'):
+        _migrar_salida(ruta, "id", cambios)
+    for ruta in ('volumes.json', 'volumes.jsonl', 'volumes_fixed.json', 'volumes_fixed.jsonl'):
+        _migrar_salida(ruta, "id_manga", cambios)
+
+    # Diario y caché: para que la siguiente ejecución reutilice análisis e imágenes
+    diario = DiarioRastreo(diario_path) if diario_path and os.path.exists(diario_path) else None
+    cache = CacheHTTP(cache_dir) if cache_dir and os.path.isdir(cache_dir) else None
+    metas = []
+    for posicion, (manga, nuevo) in enumerate(zip(mangas_list, nuevos_ids), 1):
+        if posicion == nuevo:
+            continue
+        url = manga['url']
+        if diario is not None:
+            registro = diario.registro(url)
+            if registro and registro[0] == posicion:
+                diario.reasignar_id(url, nuevo, renumerar_resultado(registro[2], nuevo))
+        if cache is not None:
+            resultado = cache.leer_resultado(url)
+            if resultado and resultado['manga']['id'] == posicion:
+                cache.guardar_resultado(url, renumerar_resultado(resultado, nuevo))
+                imagenes = [(resultado['portada_url'], f"images/portadas/{posicion}.jpg")]
+                imagenes += [(img_url, f"tomos/{posicion}/{numero}.jpg")
+                             for _, numero, img_url in resultado['image_urls']]
+                for img_url, destino in imagenes:
+                    meta = cache.leer_meta(img_url, destino) if img_url else None
+                    if meta:
+                        metas.append((img_url, destino, ruta_renumerada(destino, cambios), meta))
+    if diario is not None:
+        diario.cerrar()
+    if cache is not None:
+        # Igual que con los directorios: borrar todas las entradas antes de escribir las nuevas
+        for img_url, destino, _, _ in metas:
+            cache.borrar_meta(img_url, destino)
+        for img_url, _, nuevo_destino, meta in metas:
+            cache.escribir_meta(img_url, meta, nuevo_destino)
+        print(f"Migrados {len(metas)} validadores de imágenes de la caché HTTP")
+
+    if almacen_dir and os.path.isdir(almacen_dir):
+        almacen = AlmacenImagenes(almacen_dir)
+        almacen.rutas = {ruta_renumerada(ruta, cambios): digest for ruta, digest in almacen.rutas.items()}
+        almacen.guardar_manifest()
+        print("Actualizado el manifest del almacén de imágenes")
+
+    mapa.estables = True
+    mapa.guardar(forzar=True)
+    print("Migración completada. Las variantes de image_variants.py se regenerarán en la próxima ejecución con --variantes")
+    return cambios
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Migra los datos generados con IDs por posición a IDs estables (coleccion.php?id=)")
+    parser.add_argument("input_json", nargs="?", default="mangas_combined.json",
+                        help="Lista de mangas con la que se generaron los datos actuales")
+    parser.add_argument("--mapa-ids", default=MAPA_POR_DEFECTO)
+    parser.add_argument("--cache", default=".cache_http")
+    parser.add_argument("--diario", default="crawl_journal.sqlite")
+    parser.add_argument("--almacen", default="imagenes_cas")
+    parser.add_argument("--simular", action="store_true", help="Mostrar los cambios sin aplicarlos")
+    args = parser.parse_args()
+
+    migrar(args.input_json, args.mapa_ids, args.cache, args.diario, args.almacen, args.simular)
@@ -0,0 +1,172 @@
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+INFORME_POR_DEFECTO = "informe_ejecucion.json"
+
+
+# Cronometrar un bloque y acumular su duración en un diccionario {etapa: segundos}
+@contextmanager
+def cronometro(tiempos, etapa):
+    """Sin diccionario (None) no mide nada, para no penalizar a quien no pide tiempos."""
+    if tiempos is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos[etapa] = tiempos.get(etapa, 0.0) + time.perf_counter() - inicio
+
+
+# Métricas de una ejecución: tiempos por etapa y contadores
+class Metricas:
+    """
+    Se comparte entre el hilo principal, los hilos del rastreo y los de imágenes, así que
+    todas las actualizaciones van bajo un lock. Por cada etapa se guarda cuántas veces se
+    ha medido, el tiempo total y el máximo; los tiempos de los procesos de análisis
+    llegan como diccionarios y se suman con `combinar`.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fecha_inicio = datetime.now().isoformat(timespec='seconds')
+        self.contadores = defaultdict(int)
+        # etapa -> [veces, total, máximo] en segundos
+        self.etapas = {}
+        self._lock = threading.Lock()
+
+    def contar(self, nombre, cantidad=1):
+        with self._lock:
+            self.contadores[nombre] += cantidad
+
+    def sumar_tiempo(self, etapa, segundos):
+        with self._lock:
+            actual = self.etapas.setdefault(etapa, [0, 0.0, 0.0])
+            actual[0] += 1
+            actual[1] += segundos
+            actual[2] = max(actual[2], segundos)
+
+    def combinar(self, tiempos):
+        for etapa, segundos in tiempos.items():
+            self.sumar_tiempo(etapa, segundos)
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar_tiempo(etapa, time.perf_counter() - inicio)
+
+    def duracion(self):
+        return time.perf_counter() - self.inicio
+
+    def informe(self, **datos):
+        """Diccionario serializable con las métricas y los `datos` de la ejecución."""
+        duracion = self.duracion()
+        with self._lock:
+            etapas = {
+                etapa: {
+                    "veces": veces,
+                    "total_s": round(total, 4),
+                    "media_ms": round(total / veces * 1000, 3) if veces else 0.0,
+                    "max_ms": round(maximo * 1000, 3),
+                }
+                for etapa, (veces, total, maximo) in sorted(self.etapas.items())
+            }
+            contadores = dict(sorted(self.contadores.items()))
+        paginas = contadores.get("paginas", 0)
+        return dict(datos, inicio=self.fecha_inicio, duracion_s=round(duracion, 3),
+                    paginas_por_segundo=round(paginas / duracion, 3) if duracion else 0.0,
+                    etapas=etapas, contadores=contadores)
+
+    def guardar(self, ruta=INFORME_POR_DEFECTO, **datos):
+        informe = self.informe(**datos)
+        tmp = f"{ruta}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, ruta)
+        return informe
+
+    def resumen(self):
+        """Líneas legibles con el tiempo de cada etapa, de la más costosa a la que menos."""
+        with self._lock:
+            etapas = sorted(self.etapas.items(), key=lambda item: -item[1][1])
+        return [f"  {etapa}: {total:.2f} s en {veces} veces (media {total / veces * 1000:.1f} ms, "
+                f"máximo {maximo * 1000:.1f} ms)" for etapa, (veces, total, maximo) in etapas]
+
+
+# Línea de progreso con estimación del tiempo restante
+class Progreso:
+    """
+    Reescribe una sola línea en `salida` (stderr por defecto, para no mezclarse con los
+    mensajes de stdout) como mucho cada `intervalo` segundos.
+    """
+
+    def __init__(self, total, salida=None, intervalo=0.5):
+        self.total = total
+        self.hechos = 0
+        self.salida = salida or sys.stderr
+        self.intervalo = intervalo
+        self.inicio = time.monotonic()
+        self._ultimo = 0.0
+
+    def avanzar(self, cantidad=1):
+        self.hechos += cantidad
+        ahora = time.monotonic()
+        if ahora - self._ultimo >= self.intervalo or self.hechos >= self.total:
+            self._ultimo = ahora
+            self.salida.write(f"\r{self.linea(ahora - self.inicio)}")
+            self.salida.flush()
+
+    def linea(self, transcurrido):
+        ritmo = self.hechos / transcurrido if transcurrido > 0 else 0.0
+        restante = (self.total - self.hechos) / ritmo if ritmo else 0.0
+        porcentaje = self.hechos / self.total * 100 if self.total else 100.0
+        return (f"{self.hechos}/{self.total} ({porcentaje:.1f}%) {ritmo:.2f} páginas/s "
+                f"quedan {time.strftime('%H:%M:%S', time.gmtime(restante))}")
+
+    def cerrar(self):
+        self.salida.write("\n")
+        self.salida.flush()
+
+
+# Ejecutar una función bajo cProfile y guardar las estadísticas
+def perfilar(ruta, funcion, *args, **kwargs):
+    """
+    Guarda el perfil en `ruta` (para snakeviz o `python -m pstats`) y muestra las
+    funciones con más tiempo acumulado. cProfile solo mide el hilo principal: las
+    descargas de los hilos y los procesos de análisis aparecen como esperas.
+    """
+    perfil = cProfile.Profile()
+    try:
+        return perfil.runcall(funcion, *args, **kwargs)
+    finally:
+        perfil.dump_stats(ruta)
+        print(f"Perfil guardado en {ruta}")
+        pstats.Stats(perfil).sort_stats('cumulative').print_stats(25)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Muestra un informe de ejecución del extractor")
+    parser.add_argument("informe", nargs="?", default=INFORME_POR_DEFECTO)
+    args = parser.parse_args()
+
+    with open(args.informe, 'r', encoding='utf-8') as f:
+        informe = json.load(f)
+    print(f"Ejecución del {informe['inicio']}: {informe['duracion_s']} s, "
+          f"{informe['paginas_por_segundo']} páginas/s")
+    for etapa, datos in sorted(informe['etapas'].items(), key=lambda item: -item[1]['total_s']):
+        print(f"  {etapa}: {datos['total_s']} s en {datos['veces']} veces "
+              f"(media {datos['media_ms']} ms, máximo {datos['max_ms']} ms)")
+    for nombre, valor in informe['contadores'].items():
+        print(f"  {nombre}: {valor}")
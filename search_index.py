@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import re
+import struct
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from json_stream import leer_registros
+
+INDICE_POR_DEFECTO = "indice_busqueda.bin"
+CAMPOS = ("titulo", "autor", "sinopsis")
+
+# Formato de indice_busqueda.bin (little-endian, enteros sin signo de 32 bits):
+#   cabecera  "MBUS", versión (u16), reservado (u16), desplazamiento del bloque de mangas y
+#             del bloque de autores
+#   bloque    número de documentos, número de términos y longitudes de las secciones de
+#             documentos, términos y postings; después las secciones:
+#               documentos  mangas: sus IDs (u32); autores: array JSON con los nombres
+#               términos    por término, ordenados por sus bytes UTF-8: desplazamiento y
+#                           longitud del texto, desplazamiento y número de postings
+#               textos      los términos en UTF-8, uno detrás de otro
+#               postings    posiciones de los documentos, en diferencias y como varint
+MAGIA = b"MBUS"
+VERSION = 1
+CABECERA = struct.Struct("<4sHH2I")
+CABECERA_BLOQUE = struct.Struct("<5I")
+TERMINO = struct.Struct("<4I")
+
+PALABRA_RE = re.compile(r'[^\W_]+')
+
+
+# Tabla para str.translate que quita las marcas combinantes (tildes, diéresis...); cada
+# carácter se clasifica la primera vez que aparece en lugar de en cada texto
+class _SinMarcas(dict):
+    def __missing__(self, codigo):
+        valor = None if unicodedata.category(chr(codigo)).startswith('M') else codigo
+        self[codigo] = valor
+        return valor
+
+
+SIN_MARCAS = _SinMarcas()
+
+
+# Texto normalizado para buscar: sin tildes ni diéresis, en minúsculas (igual que en el backend)
+def plegar(texto):
+    return unicodedata.normalize('NFKD', texto or "").translate(SIN_MARCAS).lower()
+
+
+def palabras(texto):
+    return PALABRA_RE.findall(plegar(texto))
+
+
+def _varint(numero, salida):
+    while numero >= 0x80:
+        salida.append((numero & 0x7F) | 0x80)
+        numero >>= 7
+    salida.append(numero)
+
+
+def _bloque(documentos_bytes, terminos_por_documento):
+    """Serializa un índice invertido: {término: posiciones de documento} en orden."""
+    postings_por_termino = defaultdict(list)
+    for posicion, terminos in enumerate(terminos_por_documento):
+        for termino in terminos:
+            postings_por_termino[termino].append(posicion)
+
+    terminos = sorted(postings_por_termino, key=lambda t: t.encode('utf-8'))
+    tabla = bytearray()
+    textos = bytearray()
+    postings = bytearray()
+    for termino in terminos:
+        codificado = termino.encode('utf-8')
+        inicio_postings = len(postings)
+        anterior = 0
+        for posicion in postings_por_termino[termino]:
+            _varint(posicion - anterior, postings)
+            anterior = posicion
+        tabla += TERMINO.pack(len(textos), len(codificado), inicio_postings, len(postings_por_termino[termino]))
+        textos += codificado
+
+    cabecera = CABECERA_BLOQUE.pack(len(terminos_por_documento), len(terminos), len(documentos_bytes),
+                                    len(textos), len(postings))
+    return cabecera + documentos_bytes + tabla + textos + postings
+
+
+# Construir el índice de búsqueda a partir de la salida del extractor
+def construir_indice(mangas_json="mangas_detailed.jsonl", ruta_salida=INDICE_POR_DEFECTO):
+    """
+    Índice invertido por prefijos de palabra sobre título, autor y sinopsis, sin tildes
+    ni mayúsculas: un manga coincide con una consulta si cada palabra de la consulta es
+    el principio de alguna palabra de esos campos. Los términos están ordenados, así que
+    todos los que empiezan por un prefijo forman un rango contiguo que se localiza con
+    una búsqueda binaria. Incluye un segundo índice, igual, con los autores distintos.
+    """
+    ids = []
+    terminos_mangas = []
+    autores = set()
+    for manga in leer_registros(mangas_json):
+        ids.append(manga["id"])
+        terminos_mangas.append(set(palabras(" ".join(manga.get(campo) or "" for campo in CAMPOS))))
+        if manga.get("autor"):
+            autores.add(manga["autor"])
+    autores = sorted(autores)
+
+    bloque_mangas = _bloque(struct.pack(f"<{len(ids)}I", *ids), terminos_mangas)
+    bloque_autores = _bloque(json.dumps(autores, ensure_ascii=False).encode('utf-8'),
+                             [set(palabras(autor)) for autor in autores])
+
+    tmp = f"{ruta_salida}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, 0, CABECERA.size, CABECERA.size + len(bloque_mangas)))
+        f.write(bloque_mangas)
+        f.write(bloque_autores)
+    os.replace(tmp, ruta_salida)
+    print(f"Índice de búsqueda guardado en {ruta_salida}: {len(ids)} mangas, {len(autores)} autores, "
+          f"{os.path.getsize(ruta_salida)} bytes")
+    return len(ids)
+
+
+class _Bloque:
+    def __init__(self, datos, inicio):
+        self.datos = datos
+        (self.numero_documentos, self.numero_terminos, longitud_documentos, longitud_textos,
+         _) = CABECERA_BLOQUE.unpack_from(datos, inicio)
+        self.inicio_documentos = inicio + CABECERA_BLOQUE.size
+        self.longitud_documentos = longitud_documentos
+        self.inicio_tabla = self.inicio_documentos + longitud_documentos
+        self.inicio_textos = self.inicio_tabla + TERMINO.size * self.numero_terminos
+        self.inicio_postings = self.inicio_textos + longitud_textos
+        # Vista de los términos (en bytes) para la búsqueda binaria
+        self._terminos = _Terminos(self)
+
+    def termino(self, i):
+        desplazamiento, longitud, _, _ = TERMINO.unpack_from(self.datos, self.inicio_tabla + TERMINO.size * i)
+        inicio = self.inicio_textos + desplazamiento
+        return self.datos[inicio:inicio + longitud]
+
+    def postings(self, i):
+        _, _, desplazamiento, cantidad = TERMINO.unpack_from(self.datos, self.inicio_tabla + TERMINO.size * i)
+        posiciones = []
+        cursor = self.inicio_postings + desplazamiento
+        actual = 0
+        for _ in range(cantidad):
+            delta = 0
+            desplazamiento_bits = 0
+            while True:
+                byte = self.datos[cursor]
+                cursor += 1
+                delta |= (byte & 0x7F) << desplazamiento_bits
+                if byte < 0x80:
+                    break
+                desplazamiento_bits += 7
+            actual += delta
+            posiciones.append(actual)
+        return posiciones
+
+    def con_prefijo(self, prefijo):
+        """Posiciones de los documentos con alguna palabra que empieza por `prefijo`."""
+        prefijo = prefijo.encode('utf-8')
+        resultado = set()
+        i = bisect_left(self._terminos, prefijo)
+        while i < self.numero_terminos and self.termino(i).startswith(prefijo):
+            resultado.update(self.postings(i))
+            i += 1
+        return resultado
+
+    def buscar(self, consulta):
+        """Posiciones, en orden, de los documentos que contienen todas las palabras de la consulta."""
+        resultado = None
+        for palabra in palabras(consulta):
+            coincidencias = self.con_prefijo(palabra)
+            resultado = coincidencias if resultado is None else resultado & coincidencias
+            if not resultado:
+                return []
+        return sorted(resultado or [])
+
+
+class _Terminos:
+    def __init__(self, bloque):
+        self.bloque = bloque
+
+    def __len__(self):
+        return self.bloque.numero_terminos
+
+    def __getitem__(self, i):
+        return self.bloque.termino(i)
+
+
+# Lector del índice (el equivalente en JavaScript está en el backend)
+class IndiceBusqueda:
+    def __init__(self, ruta=INDICE_POR_DEFECTO):
+        with open(ruta, 'rb') as f:
+            self.datos = f.read()
+        magia, version, _, inicio_mangas, inicio_autores = CABECERA.unpack_from(self.datos)
+        if magia != MAGIA or version != VERSION:
+            raise ValueError(f"{ruta} no es un índice de búsqueda de la versión {VERSION}")
+        self.mangas = _Bloque(self.datos, inicio_mangas)
+        self.autores = _Bloque(self.datos, inicio_autores)
+        self.ids = struct.unpack_from(f"<{self.mangas.numero_documentos}I", self.datos,
+                                      self.mangas.inicio_documentos)
+        inicio = self.autores.inicio_documentos
+        self.nombres_autores = json.loads(self.datos[inicio:inicio + self.autores.longitud_documentos])
+
+    def buscar_mangas(self, consulta):
+        """IDs de los mangas que coinciden, en el orden de la salida del extractor."""
+        return [self.ids[posicion] for posicion in self.mangas.buscar(consulta)]
+
+    def buscar_autores(self, consulta):
+        """Nombres de los autores que coinciden, en orden alfabético."""
+        return [self.nombres_autores[posicion] for posicion in self.autores.buscar(consulta)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye el índice de búsqueda de mangas y autores")
+    parser.add_argument("--mangas", default="mangas_detailed.jsonl", help="mangas_detailed.jsonl o .json")
+    parser.add_argument("--salida", default=INDICE_POR_DEFECTO)
+    parser.add_argument("--buscar", default=None, help="Probar una consulta sobre el índice generado")
+    args = parser.parse_args()
+
+    construir_indice(args.mangas, args.salida)
+    if args.buscar:
+        indice = IndiceBusqueda(args.salida)
+        print(f"Mangas: {indice.buscar_mangas(args.buscar)}")
+        print(f"Autores: {indice.buscar_autores(args.buscar)}")
@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import struct
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Formatos ya comprimidos: se guardan tal cual (ZIP_STORED), deflate apenas los reduce
+EXTENSIONES_SIN_COMPRIMIR = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif"}
+# Ficheros temporales de las descargas y del almacén de imágenes
+EXTENSIONES_TEMPORALES = {".part", ".enlace", ".tmp"}
+
+# Registros del formato ZIP (APPNOTE.TXT) para copiar miembros sin descomprimirlos
+CABECERA_LOCAL = struct.Struct("<4s2B4HL2L2H")
+CABECERA_CENTRAL = struct.Struct("<4s4B4HL2L5H2L")
+FIN_DIRECTORIO = struct.Struct("<4s4H2LH")
+FIN_DIRECTORIO_ZIP64 = struct.Struct("<4sQ2H2L4Q")
+LOCALIZADOR_ZIP64 = struct.Struct("<4sLQL")
+# Por encima de esto, tamaños y desplazamientos van en el campo extra ZIP64 (como en zipfile)
+LIMITE_ZIP64 = (1 << 31) - 1
+
+
+def _ficheros(directorio):
+    """Devuelve {nombre dentro del ZIP: ruta en disco} de todos los ficheros del directorio."""
+    ficheros = {}
+    for raiz, _, nombres in os.walk(directorio):
+        for nombre in nombres:
+            if os.path.splitext(nombre)[1] in EXTENSIONES_TEMPORALES:
+                continue
+            ruta = os.path.join(raiz, nombre)
+            ficheros[os.path.relpath(ruta, directorio).replace(os.sep, '/')] = ruta
+    return ficheros
+
+
+def _firma(ruta):
+    estado = os.stat(ruta)
+    return [estado.st_size, estado.st_mtime_ns]
+
+
+def _escribir_miembro(zf, nombre, ruta):
+    info = zipfile.ZipInfo.from_file(ruta, nombre)
+    if os.path.splitext(nombre)[1].lower() in EXTENSIONES_SIN_COMPRIMIR:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    with open(ruta, 'rb') as origen, zf.open(info, 'w') as destino:
+        while bloque := origen.read(1024 * 1024):
+            destino.write(bloque)
+
+
+def _copiar_bytes(origen, destino, cuantos):
+    while cuantos > 0:
+        bloque = origen.read(min(cuantos, 1024 * 1024))
+        if not bloque:
+            raise zipfile.BadZipFile("El ZIP termina antes de lo que indica su directorio central")
+        destino.write(bloque)
+        cuantos -= len(bloque)
+
+
+def _sin_zip64(extra):
+    # El campo ZIP64 depende del desplazamiento del miembro: se quita y se calcula de nuevo
+    resto = b""
+    while len(extra) >= 4:
+        tipo, longitud = struct.unpack("<2H", extra[:4])
+        if tipo != 1:
+            resto += extra[:4 + longitud]
+        extra = extra[4 + longitud:]
+    return resto
+
+
+def _registro_central(info, nombre, desplazamiento):
+    tamano, comprimido, posicion = info.file_size, info.compress_size, desplazamiento
+    valores_zip64 = []
+    if tamano > LIMITE_ZIP64:
+        valores_zip64.append(tamano)
+        tamano = 0xFFFFFFFF
+    if comprimido > LIMITE_ZIP64:
+        valores_zip64.append(comprimido)
+        comprimido = 0xFFFFFFFF
+    if posicion > LIMITE_ZIP64:
+        valores_zip64.append(posicion)
+        posicion = 0xFFFFFFFF
+    extra = _sin_zip64(info.extra)
+    version = info.extract_version
+    if valores_zip64:
+        extra = struct.pack(f"<2H{len(valores_zip64)}Q", 1, 8 * len(valores_zip64), *valores_zip64) + extra
+        version = max(version, 45)
+    anio, mes, dia, hora, minuto, segundo = info.date_time
+    return CABECERA_CENTRAL.pack(
+        b"PK\x01\x02", max(info.create_version, version), info.create_system, version, info.reserved,
+        info.flag_bits, info.compress_type, hora << 11 | minuto << 5 | segundo // 2,
+        (anio - 1980) << 9 | mes << 5 | dia, info.CRC, comprimido, tamano, len(nombre), len(extra),
+        len(info.comment), 0, info.internal_attr, info.external_attr, posicion,
+    ) + nombre + extra + info.comment
+
+
+def _escribir_fin(destino, entradas, inicio, tamano):
+    if entradas > 0xFFFF or inicio > LIMITE_ZIP64 or tamano > LIMITE_ZIP64:
+        posicion = destino.tell()
+        destino.write(FIN_DIRECTORIO_ZIP64.pack(b"PK\x06\x06", FIN_DIRECTORIO_ZIP64.size - 12, 45, 45, 0, 0,
+                                                entradas, entradas, tamano, inicio))
+        destino.write(LOCALIZADOR_ZIP64.pack(b"PK\x06\x07", 0, posicion, 1))
+    destino.write(FIN_DIRECTORIO.pack(b"PK\x05\x06", 0, 0, min(entradas, 0xFFFF), min(entradas, 0xFFFF),
+                                      min(tamano, 0xFFFFFFFF), min(inicio, 0xFFFFFFFF), 0))
+
+
+# Copiar miembros de un ZIP a otro nuevo tal cual están, sin descomprimirlos
+def _copiar_en_bruto(ruta_zip, miembros, ruta_destino):
+    """
+    Escribe en `ruta_destino` un ZIP con los `miembros` (ZipInfo de `ruta_zip`): sus
+    registros locales se copian byte a byte, en el orden en que están, y el directorio
+    central se escribe de nuevo con los desplazamientos nuevos. Devuelve False si algún
+    miembro lleva descriptor de datos (zipfile no lo usa al escribir en un fichero).
+    """
+    entradas = []
+    with open(ruta_zip, 'rb') as origen, open(ruta_destino, 'wb') as destino:
+        for info in sorted(miembros, key=lambda info: info.header_offset):
+            if info.flag_bits & 0x08:
+                return False
+            origen.seek(info.header_offset)
+            cabecera = origen.read(CABECERA_LOCAL.size)
+            campos = CABECERA_LOCAL.unpack(cabecera)
+            if campos[0] != b"PK\x03\x04":
+                raise zipfile.BadZipFile(f"Cabecera local no válida para {info.filename} en {ruta_zip}")
+            nombre = origen.read(campos[10])
+            entradas.append((info, nombre, destino.tell()))
+            destino.write(cabecera + nombre)
+            _copiar_bytes(origen, destino, campos[11] + info.compress_size)
+        inicio = destino.tell()
+        for info, nombre, desplazamiento in entradas:
+            destino.write(_registro_central(info, nombre, desplazamiento))
+        _escribir_fin(destino, len(entradas), inicio, destino.tell() - inicio)
+    return True
+
+
+def _leer_indice(ruta_indice, ruta_zip):
+    """Índice de la última actualización, o None si no existe o no corresponde al ZIP actual."""
+    if not (os.path.exists(ruta_indice) and os.path.exists(ruta_zip)):
+        return None
+    with open(ruta_indice, 'r', encoding='utf-8') as f:
+        indice = json.load(f)
+    # Si el ZIP se modificó por otro medio (o una actualización se interrumpió) no es fiable
+    if indice.get("zip") != _firma(ruta_zip):
+        return None
+    return indice
+
+
+def _guardar_indice(ruta_indice, ruta_zip, miembros):
+    tmp = f"{ruta_indice}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"zip": _firma(ruta_zip), "miembros": miembros}, f)
+    os.replace(tmp, ruta_indice)
+
+
+# Crear o actualizar un ZIP con solo los ficheros que han cambiado
+def actualizar_zip(ficheros, ruta_zip):
+    """
+    `ficheros` es {nombre dentro del ZIP: ruta en disco}. Un índice junto al ZIP
+    (`<ruta_zip>.indice.json`) guarda el tamaño y la fecha de cada miembro: si solo hay
+    ficheros nuevos, se añaden al final del ZIP existente; si alguno ha cambiado o se ha
+    borrado (zipfile no sabe quitar miembros), se escribe un ZIP nuevo en un fichero
+    temporal que sustituye al anterior. En él los miembros sin cambios se copian en bruto
+    desde el ZIP anterior y solo los cambiados se leen de disco y se vuelven a escribir.
+
+    La copia en bruto es una lectura y una escritura secuenciales del ZIP, sin abrir cada
+    imagen ni volver a comprimir nada, pero su coste sigue siendo proporcional al tamaño
+    del ZIP. Con `fragmentos` (ver actualizar_archivo) solo se copia el fragmento afectado.
+    Devuelve (añadidos, sustituidos, eliminados).
+    """
+    ruta_indice = f"{ruta_zip}.indice.json"
+    indice = _leer_indice(ruta_indice, ruta_zip)
+    firmas = {nombre: _firma(ruta) for nombre, ruta in ficheros.items()}
+
+    anteriores = indice["miembros"] if indice else {}
+    nuevos = [n for n in firmas if n not in anteriores]
+    cambiados = {n for n in firmas if n in anteriores and anteriores[n] != firmas[n]}
+    eliminados = [n for n in anteriores if n not in firmas]
+    if indice is not None and not (nuevos or cambiados or eliminados):
+        return 0, 0, 0
+
+    if indice is not None and not (cambiados or eliminados):
+        with zipfile.ZipFile(ruta_zip, 'a') as zf:
+            for nombre in sorted(nuevos):
+                _escribir_miembro(zf, nombre, ficheros[nombre])
+        _guardar_indice(ruta_indice, ruta_zip, firmas)
+        return len(nuevos), 0, 0
+
+    tmp = f"{ruta_zip}.tmp"
+    if indice is not None:
+        # Miembros que cambian o se borran: copiar los demás y añadir los nuevos y los cambiados
+        with zipfile.ZipFile(ruta_zip) as zf:
+            conservados = [info for info in zf.infolist()
+                           if info.filename in firmas and info.filename not in cambiados]
+        if _copiar_en_bruto(ruta_zip, conservados, tmp):
+            with zipfile.ZipFile(tmp, 'a') as zf:
+                for nombre in sorted([*nuevos, *cambiados]):
+                    _escribir_miembro(zf, nombre, ficheros[nombre])
+            os.replace(tmp, ruta_zip)
+            _guardar_indice(ruta_indice, ruta_zip, firmas)
+            return len(nuevos), len(cambiados), len(eliminados)
+
+    # Primera vez, índice no fiable o miembros que no se pueden copiar: reconstruir el ZIP entero
+    with zipfile.ZipFile(tmp, 'w') as zf:
+        for nombre in sorted(ficheros):
+            _escribir_miembro(zf, nombre, ficheros[nombre])
+    os.replace(tmp, ruta_zip)
+    _guardar_indice(ruta_indice, ruta_zip, firmas)
+    if indice is None:
+        return len(ficheros), 0, 0
+    return len(nuevos), len(cambiados), len(eliminados)
+
+
+# Fragmento de un fichero: estable entre ejecuciones, según su primer directorio (el id del manga)
+def fragmento_de(nombre, fragmentos):
+    return zlib.crc32(nombre.split('/', 1)[0].encode('utf-8')) % fragmentos
+
+
+# Etapa de empaquetado de tomos/
+def actualizar_archivo(directorio="tomos", ruta_zip="tomos.zip", fragmentos=1):
+    """
+    Mantiene `ruta_zip` al día con el contenido de `directorio` tocando solo lo que ha
+    cambiado. Con `fragmentos` > 1 se generan en paralelo `tomos-0.zip`, `tomos-1.zip`...
+    repartiendo cada manga siempre en el mismo fragmento.
+    """
+    ficheros = _ficheros(directorio)
+    if fragmentos <= 1:
+        rutas_zip = [ruta_zip]
+        grupos = [ficheros]
+    else:
+        base, extension = os.path.splitext(ruta_zip)
+        rutas_zip = [f"{base}-{n}{extension}" for n in range(fragmentos)]
+        grupos = [{} for _ in range(fragmentos)]
+        for nombre, ruta in ficheros.items():
+            grupos[fragmento_de(nombre, fragmentos)][nombre] = ruta
+
+    # Los miembros se guardan sin comprimir, así que el trabajo es sobre todo de E/S: bastan hilos
+    with ThreadPoolExecutor(max_workers=len(rutas_zip)) as pool:
+        cambios = list(pool.map(actualizar_zip, grupos, rutas_zip))
+
+    anadidos, sustituidos, eliminados = (sum(c[i] for c in cambios) for i in range(3))
+    print(f"Archivo de imágenes actualizado ({', '.join(rutas_zip)}): {anadidos} añadidas, "
+          f"{sustituidos} sustituidas, {eliminados} eliminadas, {len(ficheros)} en total")
+    return rutas_zip
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza tomos.zip solo con las imágenes que han cambiado")
+    parser.add_argument("--directorio", default="tomos")
+    parser.add_argument("--zip", default="tomos.zip")
+    parser.add_argument("--fragmentos", type=int, default=1, help="Número de ZIP a generar en paralelo")
+    args = parser.parse_args()
+
+    actualizar_archivo(args.directorio, args.zip, args.fragmentos)